@@ -1,11 +1,13 @@
-import random, statistics, csv, argparse
+import random, csv, argparse, heapq, json, math, os, sys, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial, lru_cache
 from pathlib import Path
 
 import numpy as np
-import matplotlib
-matplotlib.use('Agg') #for headless servers
-import matplotlib.pyplot as plt
-from matplotlib.patches import Patch
+
+import dnd_store
+# Plotting lives in dnd_plots.py and is imported only when plots are drawn,
+# so worker processes and short sweep cells never load Matplotlib.
 # ---------------------------
 # Tunables
 # ---------------------------
@@ -29,17 +31,19 @@ POWER_ATTACK = dict(HIT_PENALTY=5, DMG_BONUS=10)  # GWM-like toggle (used when a
 HEALER  = dict(HP=63, AC=12, ATK_MOD=2, DMG_MOD=2, DMG_DIE=6)
 HEALER_SLOTS_L10 = {1: 4, 2: 3, 3: 2, 4: 2, 5: 1}
 
+# spell -> (die, base slot level); dice rolled = 1 + max(0, slot_level - base)
+HEAL_SPELLS = {
+    "cure_wounds": (8, 1),
+    "healing_word": (4, 1),
+    "mass_healing_word": (4, 3),  # requires slot >= 3
+}
+
 def heal_amount(spell: str, slot_level: int, mod: int) -> int:
-    if spell == "cure_wounds":
-        dice = 1 + max(0, slot_level - 1)
-        return sum(roll(8) for _ in range(dice)) + mod
-    elif spell == "healing_word":
-        dice = 1 + max(0, slot_level - 1)
-        return sum(roll(4) for _ in range(dice)) + mod
-    elif spell == "mass_healing_word":  # requires slot >= 3
-        dice = 1 + max(0, slot_level - 3)
-        return sum(roll(4) for _ in range(dice)) + mod
-    return 0
+    if spell not in HEAL_SPELLS:
+        return 0
+    die, base = HEAL_SPELLS[spell]
+    # One roll per die, as before the healer batch path: keeps seeded full-party results unchanged
+    return sum(roll(die) for _ in range(1 + max(0, slot_level - base))) + mod
 
 # Rogue (lvl 10)
 ROGUE   = dict(HP=80, AC=16, ATK_MOD=6, DMG_MOD=3, DMG_DIE=8)
@@ -137,6 +141,7 @@ DOOM_MARAUDER.update(dict(
 # ---------- Output directories ----------
 CSV_BASE   = Path("csv")
 GRAPH_BASE = Path("graphs")
+STORE_BASE = Path("results")  # columnar binary store (see dnd_store.py)
 
 def ensure_dir(p: Path):
     p.mkdir(parents=True, exist_ok=True)
@@ -162,6 +167,35 @@ def all_monsters_graph_dir() -> Path:
 def roll(d): 
     return random.randint(1, d)
 
+@lru_cache(maxsize=None)
+def dice_sum_cdf(d: int, n: int) -> tuple:
+    # CDF of the sum of n d-sided dice over n..n*d, built once by convolution
+    dist = [1.0]
+    for _ in range(n):
+        nxt = [0.0] * (len(dist) + d - 1)
+        for i, p in enumerate(dist):
+            for k in range(d):
+                nxt[i + k] += p / d
+        dist = nxt
+    cdf, acc = [], 0.0
+    for p in dist:
+        acc += p
+        cdf.append(acc)
+    cdf[-1] = 1.0
+    return tuple(cdf)
+
+def sample_dice_sums(rng, d: int, n):
+    """Sums of n d-sided dice by inverse CDF: one uniform draw per entry of the integer array `n` (0 -> 0)."""
+    n = np.asarray(n)
+    out = np.zeros(n.shape, dtype=np.int64)
+    u = rng.random(n.shape)
+    for k in np.unique(n):
+        if k <= 0:
+            continue
+        sel = (n == k)
+        out[sel] = k + np.searchsorted(np.asarray(dice_sum_cdf(d, int(k))), u[sel], side="right")
+    return out
+
 def roll_attack():
     r = roll(20)
     return r, (r == 20), (r == 1)
@@ -232,41 +266,230 @@ def conditional_prob(wins, cond):
     den = sum(1 for c in cond if c)
     return (num/den) if den else float("nan")
 
-def summarize_many(sim_fn, w_die, monster, n_sims=10_000):
-    results = []
-    for _ in range(n_sims):
-        m = dict(monster)  # shallow copy for per-sim state
-        results.append(sim_fn(w_die, m))
-
-    wins = [r["warrior_won"] for r in results]
-    base = sum(wins) / n_sims
-    party_first = [r["party_first"] for r in results]
-    first_crit = [r["first_attack_crit"] for r in results]
-    first_miss = [r["first_attack_miss"] for r in results]
-    got_crit_first = [r["received_crit_first_turn"] for r in results]
+# Conditions tracked per fight: (tally key, result flag)
+CONDITIONS = (("party_first", "party_first"),
+              ("first_crit", "first_attack_crit"),
+              ("first_miss", "first_attack_miss"),
+              ("got_crit_first", "received_crit_first_turn"))
 
-    all_streaks = []
-    for r in results:
-        all_streaks.extend(s for s in r["crit_streaks"] if s >= 0)
-    pos = [s for s in all_streaks if s > 0]
-    avg_streak = statistics.mean(pos) if pos else 0.0
-    min_streak = min(pos) if pos else 0
-    max_streak = max(pos) if pos else 0
+BATCH_BLOCK = 50_000  # fights per vectorized block
 
+def run_chunk(sim_fn, w_die, monster, n, seed=None):
+    """
+    Runs `n` fights and returns mergeable tallies (counts, streak stats, timing).
+    `seed` reseeds the RNG first; parallel workers get one per chunk.
+    """
+    if seed is not None:
+        random.seed(seed)
+    batch = BATCH_SIMS.get(sim_fn)
+    if batch is not None:
+        # Vectorized scenario, in blocks to bound memory
+        t = None
+        for k in range(0, n, BATCH_BLOCK):
+            t = merge_tallies(t, batch(w_die, monster, min(BATCH_BLOCK, n - k)))
+        return t
+    t0 = time.perf_counter()
+    t = dict(n=0, wins=0, streak_n=0, streak_sum=0, streak_min=0, streak_max=0)
+    for key, _ in CONDITIONS:
+        t[key] = 0
+        t[key + "_wins"] = 0
+    for _ in range(n):
+        # Simulators keep per-fight state locally, so stat blocks are shared read-only
+        r = sim_fn(w_die, monster)
+        won = r["warrior_won"]
+        t["wins"] += won
+        for key, flag in CONDITIONS:
+            if r[flag]:
+                t[key] += 1
+                t[key + "_wins"] += won
+        for s in r["crit_streaks"]:
+            if s > 0:
+                t["streak_min"] = s if t["streak_n"] == 0 else min(t["streak_min"], s)
+                t["streak_max"] = max(t["streak_max"], s)
+                t["streak_n"] += 1
+                t["streak_sum"] += s
+    t["n"] = n
+    t["elapsed"] = time.perf_counter() - t0
+    return t
+
+def merge_tallies(a, b):
+    if a is None:
+        return dict(b)
+    out = {k: a[k] + b[k] for k in a}
+    if a["streak_n"] and b["streak_n"]:
+        out["streak_min"] = min(a["streak_min"], b["streak_min"])
+    else:
+        out["streak_min"] = a["streak_min"] or b["streak_min"]
+    out["streak_max"] = max(a["streak_max"], b["streak_max"])
+    return out
+
+def tally_to_row(w_die, t):
+    n, wins = t["n"], t["wins"]
+    base = wins / n
+    cond = {key: (t[key + "_wins"] / t[key]) if t[key] else float("nan") for key, _ in CONDITIONS}
     return {
         "warrior_die": f"d{w_die}",
-        "wins": sum(wins),
-        "losses": n_sims - sum(wins),
+        "wins": wins,
+        "losses": n - wins,
         "baseline_P(win)": base,
-        "P(win | party first)": conditional_prob(wins, party_first),
-        "P(win | first attack crit)": conditional_prob(wins, first_crit),
-        "ΔP(win) if first attack missed": conditional_prob(wins, first_miss) - base,
-        "ΔP(win) if received crit on monster first turn": conditional_prob(wins, got_crit_first) - base,
-        "crit_streak_min": min_streak,
-        "crit_streak_max": max_streak,
-        "crit_streak_avg>0": avg_streak,
+        "P(win | party first)": cond["party_first"],
+        "P(win | first attack crit)": cond["first_crit"],
+        "ΔP(win) if first attack missed": cond["first_miss"] - base,
+        "ΔP(win) if received crit on monster first turn": cond["got_crit_first"] - base,
+        "crit_streak_min": t["streak_min"],
+        "crit_streak_max": t["streak_max"],
+        "crit_streak_avg>0": (t["streak_sum"] / t["streak_n"]) if t["streak_n"] else 0.0,
     }
-    
+
+def summarize_many(sim_fn, w_die, monster, n_sims=10_000):
+    return tally_to_row(w_die, run_chunk(sim_fn, w_die, monster, n_sims))
+
+def ci_halfwidth(t, z=1.96):
+    # Wilson 95% half-width of baseline P(win) so far (non-zero even at p = 0 or 1)
+    n = t["n"]
+    p = t["wins"] / n
+    return z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+
+def run_cells(cells, n_sims, chunk=2_000, executor=None, progress=None, seed=0, on_cell=None):
+    """
+    cells: list of (label, sim_fn, w_die, opponent). Each cell runs `n_sims`
+    fights in chunks of `chunk`; chunks run in-process (same RNG stream as
+    summarize_many) or on `executor` with a per-chunk seed derived from
+    (seed, label, chunk index). Calls on_cell(i, row) as each cell finishes
+    and returns the rows in cell order.
+    """
+    sizes = [min(chunk, n_sims - k) for k in range(0, n_sims, chunk)]
+    tallies = [None] * len(cells)
+    pending = [len(sizes)] * len(cells)
+    rows = [None] * len(cells)
+
+    def absorb(i, t):
+        tallies[i] = merge_tallies(tallies[i], t)
+        pending[i] -= 1
+        if progress:
+            progress.chunk_done(cells[i][0], t, tallies[i])
+        if pending[i] == 0:
+            rows[i] = tally_to_row(cells[i][2], tallies[i])
+            if progress:
+                progress.cell_done()
+            if on_cell:
+                on_cell(i, rows[i])
+
+    if executor is None:
+        for i, (label, sim_fn, w_die, opponent) in enumerate(cells):
+            for n in sizes:
+                absorb(i, run_chunk(sim_fn, w_die, opponent, n))
+    else:
+        futures = {}
+        for i, (label, sim_fn, w_die, opponent) in enumerate(cells):
+            for k, n in enumerate(sizes):
+                fut = executor.submit(run_chunk, sim_fn, w_die, opponent, n, f"{seed}:{label}:{k}")
+                futures[fut] = i
+        for fut in as_completed(futures):
+            absorb(futures[fut], fut.result())
+    return rows
+
+# ---------------------------
+# Progress reporting
+# ---------------------------
+class Progress:
+    """
+    Throttled progress line on stderr plus a JSON heartbeat file, both fed from
+    chunk tallies. The heartbeat's `updated` timestamp lets a scheduler tell a
+    stuck run (stale file) from a slow one (fresh file, low fights_per_s).
+    """
+    def __init__(self, total_cells, total_fights, workers=1, heartbeat=None, interval=1.0, enabled=True):
+        self.total_cells, self.total_fights = total_cells, total_fights
+        self.workers = workers
+        self.heartbeat = Path(heartbeat) if heartbeat else None
+        self.interval = interval
+        self.enabled = enabled
+        self.started = self.last = time.time()
+        self.cells_done = self.fights_done = 0
+        self.busy = 0.0        # summed worker seconds spent in chunks
+        self.current, self.ci = "", float("nan")
+        self.tty = sys.stderr.isatty()
+        self._beat("running")
+
+    def chunk_done(self, label, chunk_tally, cell_tally):
+        self.fights_done += chunk_tally["n"]
+        self.busy += chunk_tally["elapsed"]
+        self.current, self.ci = label, ci_halfwidth(cell_tally)
+        now = time.time()
+        if now - self.last >= self.interval:
+            self.last = now
+            self._print()
+            self._beat("running")
+
+    def cell_done(self):
+        self.cells_done += 1
+
+    def stats(self):
+        elapsed = max(time.time() - self.started, 1e-9)
+        rate = self.fights_done / elapsed
+        left = self.total_fights - self.fights_done
+        return dict(
+            elapsed_s=elapsed,
+            fights_per_s=rate,
+            fights_per_s_per_worker=(self.fights_done / self.busy) if self.busy else 0.0,
+            eta_s=(left / rate) if rate > 0 else None,
+        )
+
+    def _print(self):
+        if not self.enabled:
+            return
+        s = self.stats()
+        eta = "?" if s["eta_s"] is None else f"{int(s['eta_s'] // 60)}m{int(s['eta_s'] % 60):02d}s"
+        line = (f"[{self.cells_done}/{self.total_cells} cells | {self.fights_done:,}/{self.total_fights:,} fights | "
+                f"{s['fights_per_s']:,.0f} fights/s, {s['fights_per_s_per_worker']:,.0f}/s/worker | ETA {eta}] "
+                f"{self.current} CI±{self.ci:.4f}")
+        print(("\r" + line) if self.tty else line, end="" if self.tty else "\n", file=sys.stderr, flush=True)
+
+    def _beat(self, status):
+        if not self.heartbeat:
+            return
+        beat = dict(status=status, pid=os.getpid(), started=self.started, updated=time.time(),
+                    workers=self.workers, cells_done=self.cells_done, cells_total=self.total_cells,
+                    fights_done=self.fights_done, fights_total=self.total_fights,
+                    current=self.current, ci_halfwidth=None if math.isnan(self.ci) else self.ci,
+                    **self.stats())
+        self.heartbeat.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.heartbeat.with_name(self.heartbeat.name + ".tmp")
+        tmp.write_text(json.dumps(beat, indent=1), encoding="utf-8")
+        os.replace(tmp, self.heartbeat)
+
+    def close(self, status="done"):
+        self._print()
+        if self.enabled and self.tty:
+            print(file=sys.stderr)
+        self._beat(status)
+
+# ---------- Binary store records ----------
+SCENARIOS = (("solo", "dnd_1v1_summaries.csv"),
+             ("healer", "dnd_healer_summaries.csv"),
+             ("full", "dnd_fullparty_summaries.csv"))
+MONSTER_STAT_DEFAULTS = dict(HP=0, AC=0, ATK_MOD=0, DMG_MOD=0, DMG_DIE=0, ATTACKS=1, REGEN=0)
+# Columns that describe a cell; everything after them is the summarize_many row
+CONTEXT_KEYS = ("run", "monster", "scenario", "party", "group", "n_sims", "die") + \
+               tuple(f"monster_{k}" for k in MONSTER_STAT_DEFAULTS)
+
+def cell_record(run, monster_key, scenario, party, group, n_sims, row, monster=None):
+    mon = MONSTERS[monster_key] if monster is None else monster
+    rec = dict(run=run, monster=monster_key, scenario=scenario, party=",".join(party),
+               group=group, n_sims=n_sims, die=int(row["warrior_die"][1:]))
+    rec.update({f"monster_{k}": int(mon.get(k, v)) for k, v in MONSTER_STAT_DEFAULTS.items()})
+    rec.update(row)
+    return rec
+
+def store_summaries(store, run, monster_key, scenario) -> list[dict]:
+    # Rows in summarize_many's shape, ordered like DICE_TO_TEST
+    keys = [k for k in dnd_store.read_manifest(store)["columns"] if k not in CONTEXT_KEYS]
+    rows = dnd_store.select_rows(store, keys=keys + ["die"], run=run, monster=monster_key, scenario=scenario)
+    rows.sort(key=lambda r: r["die"])
+    for r in rows:
+        r.pop("die")
+    return rows
+
 def write_csv(path, rows):
     path = Path(path)
     ensure_dir(path.parent)
@@ -683,23 +906,338 @@ def simulate_battle_with_healer(w_die=10, monster=GIANT_APE):
     )
 
 # ---------------------------
-# Full Party scenario
+# Healer scenario, batched
 # ---------------------------
-def simulate_battle_full_party(w_die=10, monster=GIANT_APE):
-    w_hp = WARRIOR["HP"]; h_hp = HEALER["HP"]; r_hp = ROGUE["HP"]; z_hp = WIZARD["HP"]
-    max_w, max_h, max_r, max_z = w_hp, h_hp, r_hp, z_hp
+SLOT_LEVELS = 5
+
+def _slot_choice_tables():
+    # Best slot level per availability bitmask (bit L-1 set = level L has slots left)
+    masks = range(1 << SLOT_LEVELS)
+    def best(mask, lo, hi):
+        cand = [lvl for lvl in range(lo, hi + 1) if mask & (1 << (lvl - 1))]
+        return max(cand) if cand else 0
+    best_ge3 = np.array([best(m, 3, SLOT_LEVELS) for m in masks], dtype=np.int64)
+    best_any = np.array([best(m, 1, SLOT_LEVELS) for m in masks], dtype=np.int64)
+    best_hw = np.array([best(m, 1, 2) or best(m, 1, SLOT_LEVELS) for m in masks], dtype=np.int64)
+    return best_ge3, best_any, best_hw
+
+SLOT_BEST_GE3, SLOT_BEST_ANY, SLOT_BEST_HW = _slot_choice_tables()
+
+def simulate_healer_batch(w_die, monster, n, rng=None):
+    """
+    Runs `n` warrior + healer fights in lockstep with NumPy and returns run_chunk
+    tallies. Same rules as simulate_battle_with_healer: per-fight state lives in
+    length-n arrays, healer slots in an n x 5 count array, triage choices are
+    boolean masks over lookup tables indexed by the slot-availability bitmask,
+    and heal / breath dice come from precomputed sum distributions.
+    """
+    t_start = time.perf_counter()
+    if rng is None:
+        rng = np.random.default_rng(random.getrandbits(64))
+    def d(sides, size):
+        return rng.integers(1, sides + 1, size)
+
+    max_w, max_h, max_m = WARRIOR["HP"], HEALER["HP"], monster["HP"]
+    w_ac, h_ac, m_ac = WARRIOR["AC"], HEALER["AC"], monster_effective_ac(monster)
+    w_atk, w_dmg = WARRIOR["ATK_MOD"], WARRIOR["DMG_MOD"]
+    m_atk, m_die, m_mod = monster["ATK_MOD"], monster["DMG_DIE"], monster["DMG_MOD"]
+    crit_extra = monster.get("CRIT_EXTRA_WEAPON_DICE", 0)
+    regen = monster.get("REGEN", 0)
+    has_counter = bool(monster.get("COUNTER_ON_MISS"))
+    breath = monster.get("BREATH")
+    breath_max = monster.get("BREATH_CHARGES", 1) if breath else 0
+    wolf = monster.get("WOLF")
+
+    w = np.full(n, max_w, dtype=np.int64)
+    h = np.full(n, max_h, dtype=np.int64)
+    m = np.full(n, max_m, dtype=np.int64)
+    slots = np.tile(np.array([HEALER_SLOTS_L10.get(l, 0) for l in range(1, SLOT_LEVELS + 1)], dtype=np.int64), (n, 1))
+    slot_bits = 1 << np.arange(SLOT_LEVELS)
+    action_surge = np.full(n, ACTION_SURGE_USES, dtype=np.int64)
+    second_wind = np.ones(n, dtype=bool)
+    sup_dice = np.full(n, SUPERIORITY_DICE_N, dtype=np.int64)
+    adv_next = np.zeros(n, dtype=bool)
+    breath_ready = np.full(n, bool(breath))
+    breath_charges = np.full(n, breath_max, dtype=np.int64)
+    counter_ready = np.full(n, has_counter)
+    wolf_summoned = np.zeros(n, dtype=bool)
+    wolf_left = np.zeros(n, dtype=np.int64)
+
+    first_w_done = np.zeros(n, dtype=bool)
+    first_crit = np.zeros(n, dtype=bool)
+    first_miss = np.zeros(n, dtype=bool)
+    first_m_done = np.zeros(n, dtype=bool)
+    got_crit_first = np.zeros(n, dtype=bool)
+    cur_streak = np.zeros(n, dtype=np.int64)
+    streak = dict(n=0, sum=0, min=0, max=0)
+
+    def close_streaks(idx):
+        s = cur_streak[idx]
+        s = s[s > 0]
+        if s.size:
+            streak["min"] = int(s.min()) if streak["n"] == 0 else min(streak["min"], int(s.min()))
+            streak["max"] = max(streak["max"], int(s.max()))
+            streak["n"] += int(s.size)
+            streak["sum"] += int(s.sum())
+        cur_streak[idx] = 0
+
+    # Initiative: 0 warrior, 1 healer, 2 monster; ties keep that order like initiative_order
+    keys = d(20, (n, 3)) * 32 + d(20, (n, 3))
+    order = np.argsort(-keys, axis=1, kind="stable")
+    party_first = order[:, 0] != 2
+
+    def warrior_attack(I, is_first):
+        k = I.size
+        has_adv = adv_next[I].copy()
+        adv_next[I] = False
+        atk_mod = w_atk - POWER_ATTACK["HIT_PENALTY"] * has_adv
+        dmg_mod = w_dmg + POWER_ATTACK["DMG_BONUS"] * has_adv
+        r1, r2 = d(20, k), d(20, k)
+        r = np.where(has_adv, np.maximum(r1, r2), r1)
+        crit = (r1 == 20) | (has_adv & (r2 == 20))
+        miss = np.where(has_adv, (r1 == 1) & (r2 == 1), r1 == 1)
+        hit = ~miss & (crit | (r + atk_mod >= m_ac))
+        need = monster["AC"] - (r + atk_mod)
+        use_sup = ~miss & ~hit & (sup_dice[I] > 0) & (need >= 1) & (need <= SUPERIORITY_DIE_D)
+        sup_dice[I] -= use_sup
+        hit |= use_sup & (r + d(SUPERIORITY_DIE_D, k) + atk_mod >= m_ac)
+
+        if is_first:
+            f = ~first_w_done[I]
+            first_w_done[I[f]] = True
+            first_crit[I[f]] = crit[f]
+            first_miss[I[f]] = ~hit[f]
+
+        # Counter on miss (the monster is alive whenever the warrior acts)
+        c = ~hit & counter_ready[I] & (m[I] > 0)
+        if c.any():
+            J = I[c]
+            rc = d(20, J.size)
+            cc = rc == 20
+            lands = (rc != 1) & (cc | (rc + m_atk >= w_ac))
+            cd = d(monster.get("COUNTER_DAMAGE_DIE", m_die), J.size) + monster.get("COUNTER_DAMAGE_MOD", m_mod)
+            cd += cc * d(monster.get("COUNTER_DAMAGE_DIE", m_die), J.size)
+            w[J] -= cd * lands
+            counter_ready[J] = False
+
+        trip = hit & (sup_dice[I] > 0) & ~has_adv & (m[I] > 0.5 * max_m)
+        sup_dice[I] -= trip
+        adv_next[I[trip]] = True
+        dmg_total = d(w_die, k) + crit * d(w_die, k) + dmg_mod + trip * d(SUPERIORITY_DIE_D, k)
+        m[I] -= dmg_total * hit
+        cur_streak[I[crit]] += 1
+        close_streaks(I[~crit])
+
+    def warrior_turn(I):
+        sw = second_wind[I] & (w[I] <= max_w * SECOND_WIND_THRESHOLD)
+        J = I[sw]
+        w[J] = np.minimum(max_w, w[J] + d(10, J.size) + WARRIOR_LEVEL)
+        second_wind[J] = False
+        warrior_attack(I, True)
+        expected_next = (w_die + 1) / 2 + w_dmg + POWER_ATTACK["DMG_BONUS"] * adv_next[I]
+        surge = (m[I] > 0) & (action_surge[I] > 0) & (first_crit[I] | (m[I] <= 1.2 * expected_next))
+        J = I[surge]
+        action_surge[J] -= 1
+        if J.size:
+            warrior_attack(J, False)
+
+    def healer_attack(I):
+        r = d(20, I.size)
+        crit = r == 20
+        hit = (r != 1) & (crit | (r + HEALER["ATK_MOD"] >= m_ac))
+        dmg_total = d(HEALER["DMG_DIE"], I.size) + crit * d(HEALER["DMG_DIE"], I.size) + HEALER["DMG_MOD"]
+        m[I] -= dmg_total * hit
+
+    def healer_turn(I):
+        wi, hi = w[I], h[I]
+        full = (wi >= max_w) & (hi >= max_h)
+        both_injured = (wi < max_w) & (hi < max_h)
+        someone_low = (wi < max_w * 0.5) | (hi < max_h * 0.5)
+        avail = ((slots[I] > 0) * slot_bits).sum(axis=1)
+        lvl_mass, lvl_any, lvl_hw = SLOT_BEST_GE3[avail], SLOT_BEST_ANY[avail], SLOT_BEST_HW[avail]
+
+        mass = ~full & both_injured & (lvl_mass >= 3)
+        cure = ~full & ~mass & someone_low & (lvl_any >= 1)
+        hw = ~full & ~mass & ~cure & (lvl_hw >= 1)
+        lvl = np.where(mass, lvl_mass, np.where(cure, lvl_any, lvl_hw))
+        heals = mass | cure | hw
+
+        healer_attack(I[~heals])
+
+        # Heal dice: cure d8 x L, healing word d4 x L, mass healing word d4 x (L - 2)
+        mod = HEALER["DMG_MOD"]
+        heal = np.zeros(I.size, dtype=np.int64)
+        for spell, sel in (("cure_wounds", cure), ("healing_word", hw), ("mass_healing_word", mass)):
+            if sel.any():
+                die, base = HEAL_SPELLS[spell]
+                heal[sel] = sample_dice_sums(rng, die, 1 + np.maximum(0, lvl[sel] - base)) + mod
+        to_w = mass | (heals & ~mass & (wi <= hi))
+        to_h = mass | (heals & ~mass & (wi > hi))
+        w[I[to_w]] = np.minimum(max_w, wi[to_w] + heal[to_w])
+        h[I[to_h]] = np.minimum(max_h, hi[to_h] + heal[to_h])
+        J = I[heals]
+        slots[J, lvl[heals] - 1] -= 1
+
+    def monster_turn(I):
+        if regen:
+            m[I] = np.minimum(max_m, m[I] + regen)
+
+        used_breath = np.zeros(I.size, dtype=bool)
+        if breath:
+            recharge = ~breath_ready[I] & np.isin(d(6, I.size), breath["RECHARGE"])
+            breath_ready[I[recharge]] = True
+            breath_charges[I[recharge]] = breath_max
+            used_breath = breath_ready[I] & (breath_charges[I] > 0)
+            J = I[used_breath]
+            base = sample_dice_sums(rng, breath["DIE"], np.full(J.size, breath["N_DICE"]))
+            per_w = np.where(rng.random(J.size) < breath["SAVE_SUCCESS_P"], base // 2, base)
+            per_h = np.where(rng.random(J.size) < breath["SAVE_SUCCESS_P"], base // 2, base)
+            use_two = (breath_charges[J] >= 2) & ((2 * per_w >= w[J]) | (2 * per_h >= h[J]))
+            applied = 1 + use_two
+            w[J] -= per_w * applied
+            h[J] -= per_h * applied
+            breath_charges[J] -= applied
+            breath_ready[J] = breath_charges[J] > 0
+
+        if wolf:
+            summon = ~wolf_summoned[I] & (m[I] <= max_m * wolf["TRIGGER_PCT"])
+            wolf_summoned[I[summon]] = True
+            wolf_left[I[summon]] = wolf["DURATION"]
+            J = I[wolf_left[I] > 0]
+            bite = d(wolf["DIE"], J.size) + wolf["MOD"]
+            to_h = (h[J] > 0) & ((h[J] <= w[J]) | (w[J] <= 0))
+            to_w = ~to_h & (w[J] > 0)
+            h[J] -= bite * to_h
+            w[J] -= bite * to_w
+            wolf_left[J] -= 1
+
+        J = I[~used_breath]
+        for _ in range(monster.get("ATTACKS", 1)):
+            to_h = ((h[J] <= w[J]) & (h[J] > 0)) | ((w[J] <= 0) & (h[J] > 0))
+            r = d(20, J.size)
+            crit = r == 20
+            f = ~first_m_done[J]
+            got_crit_first[J[f]] = crit[f]
+            first_m_done[J] = True
+            hit = (r != 1) & (crit | (r + m_atk >= np.where(to_h, h_ac, w_ac)))
+            dmg_total = d(m_die, J.size) + crit * d(m_die, J.size) + m_mod
+            if crit_extra > 0:
+                dmg_total += crit * sample_dice_sums(rng, m_die, np.full(J.size, crit_extra))
+            dmg_total *= hit
+            h[J] -= dmg_total * to_h
+            w[J] -= dmg_total * ~to_h
+
+    live = np.arange(n)
+    t = 0
+    while live.size:
+        slot = t % 3
+        if slot == 0:
+            counter_ready[live] = has_counter
+        actor = order[live, slot]
+        warrior_turn(live[actor == 0])
+        healer_turn(live[actor == 1])
+        monster_turn(live[actor == 2])
+        live = live[(w[live] > 0) & (h[live] > 0) & (m[live] > 0)]
+        t += 1
+    close_streaks(np.arange(n))
 
-    action_surge = ACTION_SURGE_USES
-    second_wind_available = True
-    sup_dice = SUPERIORITY_DICE_N
-    warrior_adv_next = False
+    won = (m <= 0) & ((w > 0) | (h > 0))
+    tally = dict(n=n, wins=int(won.sum()), streak_n=streak["n"], streak_sum=streak["sum"],
+                 streak_min=streak["min"], streak_max=streak["max"])
+    for (key, _), flag in zip(CONDITIONS, (party_first, first_crit, first_miss, got_crit_first)):
+        tally[key] = int(flag.sum())
+        tally[key + "_wins"] = int((flag & won).sum())
+    tally["elapsed"] = time.perf_counter() - t_start
+    return tally
 
-    healer_slots = dict(HEALER_SLOTS_L10); SPELL_MOD = HEALER["DMG_MOD"]
-    wizard_slots = dict(WIZARD_SLOTS_L10)
+# Scenarios with a vectorized implementation; run_chunk dispatches to them
+BATCH_SIMS = {simulate_battle_with_healer: simulate_healer_batch}
 
-    order = initiative_order(["warrior", "healer", "rogue", "wizard", "monster"])
-    party_first = (min(order.index("warrior"), order.index("healer"), order.index("rogue"), order.index("wizard"))
-                   < order.index("monster"))
+# ---------------------------
+# Encounter engine (N party members vs M monsters)
+# ---------------------------
+PARTY_STATS = {"warrior": WARRIOR, "healer": HEALER, "rogue": ROGUE, "wizard": WIZARD}
+FULL_PARTY = ("warrior", "healer", "rogue", "wizard")
+# Monsters focus the lowest-HP member; ties go to the squishier role first.
+TARGET_PRIORITY = {"healer": 0, "wizard": 1, "rogue": 2, "warrior": 3}
+
+def parse_party(spec: str) -> tuple:
+    roles = tuple(s.strip().lower() for s in spec.split(",") if s.strip())
+    unknown = [r for r in roles if r not in PARTY_STATS]
+    if unknown or not roles:
+        raise ValueError(f"Unknown party roles {unknown}; choose from {sorted(PARTY_STATS)}")
+    return roles
+
+def healer_best_slot(slots: dict, min_level=1, max_level=9) -> int:
+    cand = [lvl for lvl, cnt in slots.items() if cnt > 0 and min_level <= lvl <= max_level]
+    return max(cand) if cand else 0
+
+def lowest_hp(heap, hp):
+    # Lazy-deletion min-heap of (hp, tiebreak, idx): an entry is live only while
+    # it still matches the combatant's current HP, so updates are a single push.
+    while heap:
+        h, _tie, idx = heap[0]
+        if h > 0 and hp[idx] == h:
+            return idx
+        heapq.heappop(heap)
+    return -1
+
+def simulate_encounter(w_die, monsters, party=FULL_PARTY):
+    """
+    Generic encounter: `party` is a sequence of role names (duplicates allowed),
+    `monsters` one stat dict or a list of them. Combatants live in indexed arrays;
+    targeting uses lazy heaps and initiative is a cursor over a fixed order, so a
+    round costs O(n log n) in the number of combatants.
+    Metrics (first attack, crit streaks) follow the first warrior in the party.
+    """
+    if isinstance(monsters, dict):
+        monsters = [monsters]
+    n_pc, n_mon = len(party), len(monsters)
+    stats = [PARTY_STATS[role] for role in party]
+    is_rogue = [role == "rogue" for role in party]
+    is_wizard = [role == "wizard" for role in party]
+    lead = party.index("warrior") if "warrior" in party else -1
+
+    # Party state (indexed by member)
+    pc_hp = [s["HP"] for s in stats]
+    pc_max = list(pc_hp)
+    pc_ac = [s["AC"] for s in stats]
+    pc_tie = [TARGET_PRIORITY[role] for role in party]
+    action_surge = [ACTION_SURGE_USES] * n_pc
+    second_wind = [True] * n_pc
+    sup_dice = [SUPERIORITY_DICE_N] * n_pc
+    adv_next = [False] * n_pc
+    uncanny_ready = [True] * n_pc
+    slots = [dict(HEALER_SLOTS_L10) if role == "healer" else
+             dict(WIZARD_SLOTS_L10) if role == "wizard" else None for role in party]
+    pcs_up = n_pc
+    n_injured = 0   # members below max HP
+    n_low = 0       # members at or below half HP
+    threat_heap = [(pc_hp[i], pc_tie[i], i) for i in range(n_pc)]   # monster targeting
+    triage_heap = [(1.0, i, i) for i in range(n_pc)]                # lowest HP fraction
+    heapq.heapify(threat_heap)
+    heapq.heapify(triage_heap)
+    pc_frac = [1.0] * n_pc
+
+    # Monster state (indexed by monster)
+    m_hp = [m["HP"] for m in monsters]
+    m_max = list(m_hp)
+    breath_cfg = [m.get("BREATH") for m in monsters]
+    breath_ready = [bool(b) for b in breath_cfg]
+    breath_max = [m.get("BREATH_CHARGES", 1) if b else 0 for m, b in zip(monsters, breath_cfg)]
+    breath_charges = list(breath_max)
+    counter_ready = [bool(m.get("COUNTER_ON_MISS")) for m in monsters]
+    wolf_cfg = [m.get("WOLF") for m in monsters]
+    wolf_rounds_left = [0] * n_mon
+    wolf_summoned = [False] * n_mon
+    monsters_up = n_mon
+    focus_heap = [(m_hp[j], 0, j) for j in range(n_mon)]
+    heapq.heapify(focus_heap)
+
+    # Initiative: ids < n_pc are party members, the rest are monsters
+    order = initiative_order(list(range(n_pc + n_mon)))
+    party_first = order[0] < n_pc
+    n_turns = len(order)
 
     first_warrior_attack_done = False
     first_attack_was_crit = False
@@ -710,313 +1248,288 @@ def simulate_battle_full_party(w_die=10, monster=GIANT_APE):
     cur_streak = 0
     max_streak_in_battle = 0
     all_streaks = []
-
-    rogue_uncanny_ready = True
     allies_attacked_this_round = False
-    alive_party = lambda: (w_hp > 0) or (h_hp > 0) or (r_hp > 0) or (z_hp > 0)
 
-    monster_max_hp = monster["HP"]
-    breath_cfg = monster.get("BREATH")
-    breath_ready = bool(breath_cfg)
-    breath_max_charges = monster.get("BREATH_CHARGES", 1) if breath_cfg else 0
-    breath_charges = breath_max_charges if breath_ready else 0
-    marauder_counter_ready = bool(monster.get("COUNTER_ON_MISS"))
-    wolf_cfg = monster.get("WOLF")
-    wolf_rounds_left = 0
-    wolf_summoned = False
-
-    def marauder_counter(attacker_name: str):
-        nonlocal w_hp, h_hp, r_hp, z_hp, marauder_counter_ready, rogue_uncanny_ready
-        if (not monster.get("COUNTER_ON_MISS")) or (not marauder_counter_ready) or (monster["HP"] <= 0):
+    def set_pc_hp(i, new):
+        nonlocal pcs_up, n_injured, n_low
+        old, mx = pc_hp[i], pc_max[i]
+        pcs_up += (new > 0) - (old > 0)
+        n_injured += (new < mx) - (old < mx)
+        n_low += (new <= mx * 0.5) - (old <= mx * 0.5)
+        pc_hp[i] = new
+        pc_frac[i] = new / mx
+        if new > 0:
+            heapq.heappush(threat_heap, (new, pc_tie[i], i))
+        heapq.heappush(triage_heap, (pc_frac[i], i, i))
+
+    def heal_pc(i, amount):
+        set_pc_hp(i, min(pc_max[i], pc_hp[i] + amount))
+
+    def set_m_hp(j, new):
+        nonlocal monsters_up
+        monsters_up += (new > 0) - (m_hp[j] > 0)
+        m_hp[j] = new
+        if new > 0:
+            heapq.heappush(focus_heap, (new, 0, j))
+
+    def lowest_fraction():
+        while True:
+            frac, _i, i = triage_heap[0]
+            if pc_frac[i] == frac:
+                return i
+            heapq.heappop(triage_heap)
+
+    def hurt_pc(i, amount, crit):
+        if is_rogue[i] and ROGUE_UNCANNY_DODGE and uncanny_ready[i] and not crit:
+            amount //= 2
+            uncanny_ready[i] = False
+        set_pc_hp(i, pc_hp[i] - amount)
+
+    def marauder_counter(j, i):
+        mon = monsters[j]
+        if (not mon.get("COUNTER_ON_MISS")) or (not counter_ready[j]) or (m_hp[j] <= 0):
             return
         r2, c2, m2 = roll_attack()
         if m2:
-            marauder_counter_ready = False
+            counter_ready[j] = False
             return
-        ac_map = {"warrior": WARRIOR["AC"], "healer": HEALER["AC"], "rogue": ROGUE["AC"], "wizard": WIZARD["AC"]}
-        if c2 or ((r2 + monster["ATK_MOD"]) >= ac_map[attacker_name]):
-            dmg_amt = dmg(monster.get("COUNTER_DAMAGE_DIE", monster["DMG_DIE"]),
-                          monster.get("COUNTER_DAMAGE_MOD", monster["DMG_MOD"]), c2)
-            if attacker_name == "rogue" and ROGUE_UNCANNY_DODGE and rogue_uncanny_ready and not c2:
-                dmg_amt //= 2
-                rogue_uncanny_ready = False
-            if   attacker_name == "warrior": w_hp -= dmg_amt
-            elif attacker_name == "healer":  h_hp -= dmg_amt
-            elif attacker_name == "rogue":   r_hp -= dmg_amt
-            else:                            z_hp -= dmg_amt
-        marauder_counter_ready = False
+        if c2 or ((r2 + mon["ATK_MOD"]) >= pc_ac[i]):
+            hurt_pc(i, dmg(mon.get("COUNTER_DAMAGE_DIE", mon["DMG_DIE"]),
+                           mon.get("COUNTER_DAMAGE_MOD", mon["DMG_MOD"]), c2), c2)
+        counter_ready[j] = False
 
     def end_streak():
-        nonlocal cur_streak, max_streak_in_battle, all_streaks
-        cur_streak, max_streak_local = end_streak_if_any(cur_streak, all_streaks, max_streak_in_battle)
-        max_streak_in_battle = max(max_streak_in_battle, max_streak_local)
-
-    def monster_choose_target():
-        candidates = []
-        if w_hp > 0: candidates.append(("warrior", w_hp, WARRIOR["AC"]))
-        if h_hp > 0: candidates.append(("healer",  h_hp, HEALER["AC"]))
-        if r_hp > 0: candidates.append(("rogue",   r_hp, ROGUE["AC"]))
-        if z_hp > 0: candidates.append(("wizard",  z_hp, WIZARD["AC"]))
-        candidates.sort(key=lambda x: (x[1], ["healer","wizard","rogue","warrior"].index(x[0])))
-        return candidates[0] if candidates else (None, 0, 0)
-
-    t = 0
-    while (monster["HP"] > 0) and alive_party():
-        if (t % len(order)) == 0:
-            allies_attacked_this_round = False
-            rogue_uncanny_ready = True
-            marauder_counter_ready = bool(monster.get("COUNTER_ON_MISS"))
-
-        actor = order[t % len(order)]
-
-        if actor == "warrior" and w_hp > 0 and monster["HP"] > 0:
-            if second_wind_available and (w_hp <= max_w * SECOND_WIND_THRESHOLD):
-                w_hp = min(max_w, w_hp + roll(10) + WARRIOR_LEVEL)
-                second_wind_available = False
-
-            def do_one_warrior_attack(is_first):
-                nonlocal cur_streak, sup_dice, warrior_adv_next
-                nonlocal first_warrior_attack_done, first_attack_was_crit, first_attack_was_miss
-
-                has_adv = warrior_adv_next
-                warrior_adv_next = False
-                use_power = has_adv
-                atk_mod = WARRIOR["ATK_MOD"] - (POWER_ATTACK["HIT_PENALTY"] if use_power else 0)
-                dmg_mod = WARRIOR["DMG_MOD"] + (POWER_ATTACK["DMG_BONUS"] if use_power else 0)
-
-                r, crit, miss = roll_attack_adv(has_adv)
-                final_hit = False
-                if not miss:
-                    raw_hit = crit or ((r + atk_mod) >= monster_effective_ac(monster))
-                    if (not raw_hit) and (sup_dice > 0):
-                        need = monster["AC"] - (r + atk_mod)
-                        if 1 <= need <= SUPERIORITY_DIE_D:
-                            sup_dice -= 1
-                            add = roll(SUPERIORITY_DIE_D)
-                            raw_hit = (crit or ((r + add + atk_mod)>= monster_effective_ac(monster)))
-                    final_hit = raw_hit
-
-                if is_first and (not first_warrior_attack_done):
-                    first_warrior_attack_done = True
-                    first_attack_was_crit = crit
-                    first_attack_was_miss = (not final_hit)
-
-                if final_hit:
-                    extra = 0
-                    do_trip = (sup_dice > 0) and (not has_adv) and (monster["HP"] > 0.5 * monster_max_hp)
-                    if do_trip:
-                        sup_dice -= 1
-                        extra = roll(SUPERIORITY_DIE_D)
-                        warrior_adv_next = True
-                    if crit:
-                        total = roll(w_die) + roll(w_die) + dmg_mod + extra
-                        cur_streak += 1
-                    else:
-                        end_streak()
-                        total = roll(w_die) + dmg_mod + extra
-                    monster["HP"] -= total
-                else:
-                    end_streak()
-                    marauder_counter(attacker_name="warrior")
-
-            do_one_warrior_attack(is_first=True)
-            if (monster["HP"] > 0) and (action_surge > 0):
-                avg_weapon = (w_die + 1) / 2
-                expected_next = avg_weapon + WARRIOR["DMG_MOD"] + (POWER_ATTACK["DMG_BONUS"] if warrior_adv_next else 0)
-                if first_attack_was_crit or (monster["HP"] <= 1.2 * expected_next):
-                    action_surge -= 1
-                    do_one_warrior_attack(is_first=False)
-
-            allies_attacked_this_round = True
-
-        elif actor == "healer" and h_hp > 0 and monster["HP"] > 0:
-            if (w_hp >= max_w) and (h_hp >= max_h) and (r_hp >= max_r) and (z_hp >= max_z):
-                r, crit, miss = roll_attack()
-                if not miss and (crit or (r + HEALER["ATK_MOD"]) >= monster_effective_ac(monster)):
-                    monster["HP"] -= dmg(HEALER["DMG_DIE"], HEALER["DMG_MOD"], crit)
-                allies_attacked_this_round = True
+        nonlocal cur_streak, max_streak_in_battle
+        cur_streak, max_streak_in_battle = end_streak_if_any(cur_streak, all_streaks, max_streak_in_battle)
+
+    def warrior_attack(i, j, is_first):
+        nonlocal cur_streak, first_warrior_attack_done, first_attack_was_crit, first_attack_was_miss
+        mon = monsters[j]
+        has_adv = adv_next[i]
+        adv_next[i] = False
+        use_power = has_adv
+        atk_mod = WARRIOR["ATK_MOD"] - (POWER_ATTACK["HIT_PENALTY"] if use_power else 0)
+        dmg_mod = WARRIOR["DMG_MOD"] + (POWER_ATTACK["DMG_BONUS"] if use_power else 0)
+
+        r, crit, miss = roll_attack_adv(has_adv)
+        final_hit = False
+        if not miss:
+            raw_hit = crit or ((r + atk_mod) >= monster_effective_ac(mon))
+            if (not raw_hit) and (sup_dice[i] > 0):
+                need = mon["AC"] - (r + atk_mod)
+                if 1 <= need <= SUPERIORITY_DIE_D:
+                    sup_dice[i] -= 1
+                    add = roll(SUPERIORITY_DIE_D)
+                    raw_hit = crit or ((r + add + atk_mod) >= monster_effective_ac(mon))
+            final_hit = raw_hit
+
+        tracked = (i == lead)
+        if tracked and is_first and (not first_warrior_attack_done):
+            first_warrior_attack_done = True
+            first_attack_was_crit = crit
+            first_attack_was_miss = (not final_hit)
+
+        if final_hit:
+            extra = 0
+            do_trip = (sup_dice[i] > 0) and (not has_adv) and (m_hp[j] > 0.5 * m_max[j])
+            if do_trip:
+                sup_dice[i] -= 1
+                extra = roll(SUPERIORITY_DIE_D)
+                adv_next[i] = True
+            if crit:
+                total = roll(w_die) + roll(w_die) + dmg_mod + extra
+                if tracked: cur_streak += 1
             else:
-                injured = []
-                if w_hp < max_w: injured.append(("warrior", max_w - w_hp))
-                if h_hp < max_h: injured.append(("healer",  max_h - h_hp))
-                if r_hp < max_r: injured.append(("rogue",   max_r - r_hp))
-                if z_hp < max_z: injured.append(("wizard",  max_z - z_hp))
-
-                both_injured = len(injured) >= 2
-                someone_low  = (w_hp <= max_w*0.5) or (h_hp <= max_h*0.5) or (r_hp <= max_r*0.5) or (z_hp <= max_z*0.5)
-
-                def best_available(pred):
-                    cand = [lvl for lvl,cnt in healer_slots.items() if cnt>0 and pred(lvl,cnt)]
-                    return max(cand) if cand else 0
-
-                chosen = None
-                if both_injured:
-                    lvl = best_available(lambda L,C: L >= 3)
-                    if lvl >= 3: chosen = ("mass_healing_word", lvl)
-                if (chosen is None) and someone_low:
-                    lvl = best_available(lambda L,C: True)
-                    if lvl >= 1: chosen = ("cure_wounds", lvl)
-                if (chosen is None) and injured:
-                    lvl = best_available(lambda L,C: L <= 2) or best_available(lambda L,C: True)
-                    if lvl >= 1: chosen = ("healing_word", lvl)
-
-                if chosen is None:
-                    r, crit, miss = roll_attack()
-                    if not miss and (crit or (r + HEALER["ATK_MOD"])>= monster_effective_ac(monster)):
-                        monster["HP"] -= dmg(HEALER["DMG_DIE"], HEALER["DMG_MOD"], crit)
-                    else:
-                        marauder_counter(attacker_name="healer")
-                    allies_attacked_this_round = True
-                else:
-                    spell, lvl = chosen
-                    if spell == "mass_healing_word":
-                        heal = heal_amount(spell, lvl, SPELL_MOD)
-                        w_hp = min(max_w, w_hp + heal)
-                        h_hp = min(max_h, h_hp + heal)
-                        r_hp = min(max_r, r_hp + heal)
-                        z_hp = min(max_z, z_hp + heal)
-                    else:
-                        target = min([("warrior", w_hp, max_w), ("healer", h_hp, max_h),
-                                      ("rogue", r_hp, max_r), ("wizard", z_hp, max_z)],
-                                     key=lambda t: (t[1]/t[2] if t[2]>0 else 1.0))
-                        heal = heal_amount(spell, lvl, SPELL_MOD)
-                        if   target[0] == "warrior": w_hp = min(max_w, w_hp + heal)
-                        elif target[0] == "healer":  h_hp = min(max_h, h_hp + heal)
-                        elif target[0] == "rogue":   r_hp = min(max_r, r_hp + heal)
-                        else:                        z_hp = min(max_z, z_hp + heal)
-                    healer_slots[lvl] -= 1
-
-        elif actor == "rogue" and r_hp > 0 and monster["HP"] > 0:
-            has_adv = (ROGUE_STEADY_AIM and not allies_attacked_this_round)
-            sa_available = has_adv or allies_attacked_this_round
-            r, crit, miss = roll_attack_adv(has_adv)
-            if not miss and (crit or (r + ROGUE["ATK_MOD"]) >= monster_effective_ac(monster)):
-                weapon = (roll(ROGUE["DMG_DIE"]) + (roll(ROGUE["DMG_DIE"]) if crit else 0)) + ROGUE["DMG_MOD"]
-                total = weapon
-                if sa_available:
-                    sa_dice = SNEAK_ATTACK_DICE * (2 if crit else 1)
-                    total += sum(roll(SNEAK_ATTACK_DIE) for _ in range(sa_dice))
-                monster["HP"] -= total
+                if tracked: end_streak()
+                total = roll(w_die) + dmg_mod + extra
+            set_m_hp(j, m_hp[j] - total)
+        else:
+            if tracked: end_streak()
+            marauder_counter(j, i)
+
+    def warrior_turn(i, j):
+        if second_wind[i] and (pc_hp[i] <= pc_max[i] * SECOND_WIND_THRESHOLD):
+            heal_pc(i, roll(10) + WARRIOR_LEVEL)
+            second_wind[i] = False
+        warrior_attack(i, j, is_first=True)
+        j = lowest_hp(focus_heap, m_hp)
+        if (j >= 0) and (action_surge[i] > 0):
+            avg_weapon = (w_die + 1) / 2
+            expected_next = avg_weapon + WARRIOR["DMG_MOD"] + (POWER_ATTACK["DMG_BONUS"] if adv_next[i] else 0)
+            if first_attack_was_crit or (m_hp[j] <= 1.2 * expected_next):
+                action_surge[i] -= 1
+                warrior_attack(i, j, is_first=False)
+
+    def healer_turn(i, j):
+        # Returns True when the healer made an attack roll this turn.
+        mon = monsters[j]
+        if n_injured == 0:
+            r, crit, miss = roll_attack()
+            if not miss and (crit or (r + HEALER["ATK_MOD"]) >= monster_effective_ac(mon)):
+                set_m_hp(j, m_hp[j] - dmg(HEALER["DMG_DIE"], HEALER["DMG_MOD"], crit))
+            return True
+
+        my_slots = slots[i]
+        chosen = None
+        if n_injured >= 2:
+            lvl = healer_best_slot(my_slots, min_level=3)
+            if lvl >= 3: chosen = ("mass_healing_word", lvl)
+        if (chosen is None) and n_low > 0:
+            lvl = healer_best_slot(my_slots)
+            if lvl >= 1: chosen = ("cure_wounds", lvl)
+        if chosen is None:
+            lvl = healer_best_slot(my_slots, max_level=2) or healer_best_slot(my_slots)
+            if lvl >= 1: chosen = ("healing_word", lvl)
+
+        if chosen is None:
+            r, crit, miss = roll_attack()
+            if not miss and (crit or (r + HEALER["ATK_MOD"]) >= monster_effective_ac(mon)):
+                set_m_hp(j, m_hp[j] - dmg(HEALER["DMG_DIE"], HEALER["DMG_MOD"], crit))
             else:
-                marauder_counter(attacker_name="rogue")
-            allies_attacked_this_round = True
-
-        elif actor == "wizard" and z_hp > 0 and monster["HP"] > 0:
-            did_attack_roll = False
-            high = wizard_highest_slot(wizard_slots)
-            if high > 0:
-                mm_darts = high + 2
-                expected_mm = mm_darts * 3.5
-                if monster.get("AUTO_SPELL_RESIST_PCT"): expected_mm *= (1 - monster["AUTO_SPELL_RESIST_PCT"])
-                if expected_mm >= monster["HP"]:
-                    dmg_mm = wizard_magic_missile_damage(high)
-                    if monster.get("AUTO_SPELL_RESIST_PCT"):
-                        dmg_mm = int(round(dmg_mm * (1 - monster["AUTO_SPELL_RESIST_PCT"])))
-                    monster["HP"] -= dmg_mm
-                    wizard_slots[high] -= 1
-                else:
-                    r, crit, miss = roll_attack()
-                    did_attack_roll = True
-                    if not miss and (crit or (r + WIZARD["ATK_MOD"]) >= monster_effective_ac(monster, is_spell_attack=True)):
-                        monster["HP"] -= wizard_chromatic_orb_damage(high, crit)
-                    else:
-                        marauder_counter(attacker_name="wizard")
-                    wizard_slots[high] -= 1
+                marauder_counter(j, i)
+            return True
+
+        spell, lvl = chosen
+        heal = heal_amount(spell, lvl, HEALER["DMG_MOD"])
+        if spell == "mass_healing_word":
+            for k in range(n_pc):
+                heal_pc(k, heal)
+        else:
+            heal_pc(lowest_fraction(), heal)
+        my_slots[lvl] -= 1
+        return False
+
+    def rogue_turn(i, j):
+        mon = monsters[j]
+        has_adv = (ROGUE_STEADY_AIM and not allies_attacked_this_round)
+        sa_available = has_adv or allies_attacked_this_round
+        r, crit, miss = roll_attack_adv(has_adv)
+        if not miss and (crit or (r + ROGUE["ATK_MOD"]) >= monster_effective_ac(mon)):
+            total = (roll(ROGUE["DMG_DIE"]) + (roll(ROGUE["DMG_DIE"]) if crit else 0)) + ROGUE["DMG_MOD"]
+            if sa_available:
+                sa_dice = SNEAK_ATTACK_DICE * (2 if crit else 1)
+                total += sum(roll(SNEAK_ATTACK_DIE) for _ in range(sa_dice))
+            set_m_hp(j, m_hp[j] - total)
+        else:
+            marauder_counter(j, i)
+
+    def wizard_turn(i, j):
+        # Returns True when the wizard made an attack roll this turn.
+        mon = monsters[j]
+        my_slots = slots[i]
+        resist = mon.get("AUTO_SPELL_RESIST_PCT")
+        high = wizard_highest_slot(my_slots)
+        if high > 0:
+            expected_mm = (high + 2) * 3.5
+            if resist: expected_mm *= (1 - resist)
+            if expected_mm >= m_hp[j]:
+                dmg_mm = wizard_magic_missile_damage(high)
+                if resist:
+                    dmg_mm = int(round(dmg_mm * (1 - resist)))
+                set_m_hp(j, m_hp[j] - dmg_mm)
+                my_slots[high] -= 1
+                return False
+            r, crit, miss = roll_attack()
+            if not miss and (crit or (r + WIZARD["ATK_MOD"]) >= monster_effective_ac(mon, is_spell_attack=True)):
+                set_m_hp(j, m_hp[j] - wizard_chromatic_orb_damage(high, crit))
             else:
-                r, crit, miss = roll_attack()
-                did_attack_roll = True
-                if not miss and (crit or (r + WIZARD["ATK_MOD"]) >= monster_effective_ac(monster, is_spell_attack=True)):
-                    monster["HP"] -= wizard_fire_bolt_damage(crit)
+                marauder_counter(j, i)
+            my_slots[high] -= 1
+            return True
+        r, crit, miss = roll_attack()
+        if not miss and (crit or (r + WIZARD["ATK_MOD"]) >= monster_effective_ac(mon, is_spell_attack=True)):
+            set_m_hp(j, m_hp[j] - wizard_fire_bolt_damage(crit))
+        else:
+            marauder_counter(j, i)
+        return True
+
+    def monster_turn(j):
+        nonlocal first_monster_attack_done, received_crit_first_turn
+        mon = monsters[j]
+        if mon.get("REGEN"):
+            set_m_hp(j, min(m_max[j], m_hp[j] + mon["REGEN"]))
+
+        cfg = breath_cfg[j]
+        if cfg and not breath_ready[j]:
+            if roll(6) in cfg["RECHARGE"]:
+                breath_ready[j] = True
+                breath_charges[j] = breath_max[j]
+
+        alive_targets = {i: pc_hp[i] for i in range(n_pc) if pc_hp[i] > 0} if (cfg and breath_ready[j]) else {}
+        used_breath, breath_ready[j], breath_charges[j], per = try_breath(
+            cfg, breath_ready[j], breath_charges[j], alive_targets
+        )
+        for i, d in per.items():
+            set_pc_hp(i, pc_hp[i] - d)
+
+        wolf = wolf_cfg[j]
+        if wolf and (not wolf_summoned[j]) and (m_hp[j] <= m_max[j] * wolf["TRIGGER_PCT"]):
+            wolf_summoned[j] = True
+            wolf_rounds_left[j] = wolf["DURATION"]
+        if wolf and wolf_rounds_left[j] > 0:
+            tgt = lowest_hp(threat_heap, pc_hp)
+            if tgt >= 0:
+                set_pc_hp(tgt, pc_hp[tgt] - (roll(wolf["DIE"]) + wolf["MOD"]))
+            wolf_rounds_left[j] -= 1
+
+        if used_breath:
+            return
+        for _ in range(mon.get("ATTACKS", 1)):
+            tgt = lowest_hp(threat_heap, pc_hp)
+            if tgt < 0: break
+            r, crit, miss = roll_attack()
+            if not first_monster_attack_done:
+                if crit: received_crit_first_turn = True
+                first_monster_attack_done = True
+            if miss: continue
+
+            tgt_ac = pc_ac[tgt]
+            if not (((r + mon["ATK_MOD"]) >= tgt_ac) or crit): continue
+
+            base = dmg(mon["DMG_DIE"], mon["DMG_MOD"], crit)
+            if crit and mon.get("CRIT_EXTRA_WEAPON_DICE", 0) > 0:
+                base += sum(roll(mon["DMG_DIE"]) for _ in range(mon["CRIT_EXTRA_WEAPON_DICE"]))
+
+            if is_wizard[tgt] and WIZARD_SHIELD_ACTIVE and not crit and ((r + mon["ATK_MOD"]) < (tgt_ac + 5)):
+                # Shield turns the hit into a miss if the wizard still has a slot
+                if wizard_spend_lowest_slot(slots[tgt]) != 0:
+                    continue
+            hurt_pc(tgt, base, crit)
+
+    cursor = 0
+    while monsters_up > 0 and pcs_up > 0:
+        if cursor == 0:
+            allies_attacked_this_round = False
+            for i in range(n_pc): uncanny_ready[i] = True
+            for j in range(n_mon): counter_ready[j] = bool(monsters[j].get("COUNTER_ON_MISS"))
+
+        actor = order[cursor]
+        if actor < n_pc:
+            if pc_hp[actor] > 0:
+                j = lowest_hp(focus_heap, m_hp)
+                role = party[actor]
+                if role == "warrior":
+                    warrior_turn(actor, j)
+                    allies_attacked_this_round = True
+                elif role == "healer":
+                    if healer_turn(actor, j): allies_attacked_this_round = True
+                elif role == "rogue":
+                    rogue_turn(actor, j)
+                    allies_attacked_this_round = True
                 else:
-                    marauder_counter(attacker_name="wizard")
-            if did_attack_roll:
-                allies_attacked_this_round = True
+                    if wizard_turn(actor, j): allies_attacked_this_round = True
+        elif m_hp[actor - n_pc] > 0:
+            monster_turn(actor - n_pc)
 
-        elif actor == "monster" and monster["HP"] > 0:
-            if monster.get("REGEN"):
-                monster["HP"] = min(monster_max_hp, monster["HP"] + monster["REGEN"])
-
-            if breath_cfg and not breath_ready:
-                if roll(6) in breath_cfg["RECHARGE"]:
-                    breath_ready = True
-                    breath_charges = breath_max_charges
-
-            alive_targets = {}
-            if w_hp > 0: alive_targets["w"] = w_hp
-            if h_hp > 0: alive_targets["h"] = h_hp
-            if r_hp > 0: alive_targets["r"] = r_hp
-            if z_hp > 0: alive_targets["z"] = z_hp
-
-            used_breath, breath_ready, breath_charges, per = try_breath(
-                breath_cfg, breath_ready, breath_charges, alive_targets
-            )
-            if used_breath:
-                if "w" in per: w_hp -= per["w"]
-                if "h" in per: h_hp -= per["h"]
-                if "r" in per: r_hp -= per["r"]
-                if "z" in per: z_hp -= per["z"]
-
-            if wolf_cfg and (not wolf_summoned) and (monster["HP"] <= monster_max_hp * wolf_cfg["TRIGGER_PCT"]):
-                wolf_summoned = True
-                wolf_rounds_left = wolf_cfg["DURATION"]
-
-            if wolf_cfg and wolf_rounds_left > 0:
-                tgt_name, _tgt_hp, _tgt_ac = monster_choose_target()
-                if tgt_name:
-                    bite = roll(wolf_cfg["DIE"]) + wolf_cfg["MOD"]
-                    if   tgt_name == "warrior": w_hp -= bite
-                    elif tgt_name == "healer":  h_hp -= bite
-                    elif tgt_name == "rogue":   r_hp -= bite
-                    else:                       z_hp -= bite
-                wolf_rounds_left -= 1
-
-            if not used_breath:
-                for _ in range(monster.get("ATTACKS", 1)):
-                    tgt_name, tgt_hp, tgt_ac = monster_choose_target()
-                    if tgt_name is None: break
-                    r, crit, miss = roll_attack()
-                    if not first_monster_attack_done:
-                        if crit: received_crit_first_turn = True
-                        first_monster_attack_done = True
-                    if miss: continue
-
-                    def apply_damage(amount):
-                        nonlocal w_hp, h_hp, r_hp, z_hp, rogue_uncanny_ready
-                        dmg_amt = amount
-                        if tgt_name == "rogue" and ROGUE_UNCANNY_DODGE and rogue_uncanny_ready and not crit:
-                            dmg_amt //= 2
-                            rogue_uncanny_ready = False
-                        if   tgt_name == "warrior": w_hp -= dmg_amt
-                        elif tgt_name == "healer":  h_hp -= dmg_amt
-                        elif tgt_name == "rogue":   r_hp -= dmg_amt
-                        else:                       z_hp -= dmg_amt
-
-                    would_hit = ((r + monster["ATK_MOD"]) >= tgt_ac) or crit
-                    if not would_hit: continue
-
-                    base = dmg(monster["DMG_DIE"], monster["DMG_MOD"], crit)
-                    if crit and monster.get("CRIT_EXTRA_WEAPON_DICE", 0) > 0:
-                        base += sum(roll(monster["DMG_DIE"]) for _ in range(monster["CRIT_EXTRA_WEAPON_DICE"]))
-
-                    if tgt_name == "wizard" and WIZARD_SHIELD_ACTIVE and not crit:
-                        within = ((r + monster["ATK_MOD"]) < (tgt_ac + 5)) and ((r + monster["ATK_MOD"]) >= tgt_ac)
-                        if within:
-                            spent = wizard_spend_lowest_slot(wizard_slots)
-                            if spent == 0:
-                                apply_damage(base)
-                        else:
-                            apply_damage(base)
-                    else:
-                        apply_damage(base)
-
-        t += 1
-        if monster["HP"] <= 0 or not alive_party(): break
+        cursor += 1
+        if cursor == n_turns:
+            cursor = 0
 
     if cur_streak > 0:
         all_streaks.append(cur_streak)
         max_streak_in_battle = max(max_streak_in_battle, cur_streak)
 
-    party_won = (monster["HP"] <= 0) and alive_party()
+    party_won = (monsters_up == 0) and (pcs_up > 0)
     return dict(
         warrior_won = party_won,
         party_first = party_first,
@@ -1027,6 +1540,13 @@ def simulate_battle_full_party(w_die=10, monster=GIANT_APE):
         max_streak = max_streak_in_battle if max_streak_in_battle > 0 else 0
     )
 
+# ---------------------------
+# Full Party scenario
+# ---------------------------
+def simulate_battle_full_party(w_die=10, monster=GIANT_APE):
+    # Warrior, healer, rogue and wizard vs one monster
+    return simulate_encounter(w_die, [monster], FULL_PARTY)
+
 # ---------------------------
 # Main
 # ---------------------------
@@ -1040,142 +1560,158 @@ def parse_args():
                    help="Number of simulations per die per scenario (default 10000).")
     p.add_argument("--seed", type=int, default=42,
                    help="RNG seed (default 42).")
+    p.add_argument("--party", type=str, default=",".join(FULL_PARTY),
+                   help="Comma-separated roles for the full-party scenario, duplicates allowed "
+                        "(default warrior,healer,rogue,wizard).")
+    p.add_argument("--group", type=int, default=1,
+                   help="Number of copies of the monster faced in the full-party scenario (default 1).")
+    p.add_argument("--store", type=str, default=str(STORE_BASE),
+                   help="Directory of the columnar binary result store (default results/).")
+    p.add_argument("--no-csv", action="store_true",
+                   help="Skip the csv/<MONSTER>/ export; results still go to the binary store.")
+    p.add_argument("--npz", action="store_true",
+                   help="Also write a compressed .npz snapshot of the store when the run ends.")
+    p.add_argument("--from-store", action="store_true",
+                   help="Skip simulation and rebuild the plots of the latest run in the store.")
+    p.add_argument("--workers", type=int, default=1,
+                   help="Worker processes; 1 runs serially with the --seed stream (default 1).")
+    p.add_argument("--chunk", type=int, default=2_000,
+                   help="Fights per aggregation chunk / progress update (default 2000).")
+    p.add_argument("--heartbeat", type=str, default=None,
+                   help="Heartbeat JSON path (default <store>/heartbeat.json).")
+    p.add_argument("--progress-interval", type=float, default=1.0,
+                   help="Seconds between progress lines and heartbeat writes (default 1).")
+    p.add_argument("--no-progress", action="store_true",
+                   help="Do not print progress lines (the heartbeat file is still written).")
+    p.add_argument("--no-plots", action="store_true",
+                   help="Skip all charts (Matplotlib is then never imported).")
+    p.add_argument("--sensitivity", action="store_true",
+                   help="Sobol sensitivity analysis of baseline P(win) to the tunables in "
+                        "dnd_sensitivity.SENSITIVITY_PARAMS instead of the dice suite.")
+    p.add_argument("--sobol-n", type=int, default=64,
+                   help="Saltelli base samples; evaluates n * (params + 2) points (default 64).")
+    p.add_argument("--sobol-fights", type=int, default=200,
+                   help="Fights per sample point, same seed at every point (default 200).")
+    p.add_argument("--sobol-scenario", choices=("solo", "healer", "full"), default="full",
+                   help="Scenario analysed by --sensitivity (default full).")
+    p.add_argument("--sobol-die", type=int, default=10,
+                   help="Warrior damage die used by --sensitivity (default 10).")
+    p.add_argument("--sobol-bootstrap", type=int, default=500,
+                   help="Bootstrap resamples for the index confidence intervals (default 500).")
     return p.parse_args()
 
-def _sanitize_filename(s: str) -> str:
-    return "".join(ch if ch.isalnum() or ch in ("-", "_") else "_" for ch in s)
-
-def _numeric_metrics(rows: list[dict]) -> list[str]:
-    # take keys from first row that are numeric in all rows
-    metrics = []
-    for k, v in rows[0].items():
-        if k == "warrior_die":
-            continue
-        if all(isinstance(r.get(k), (int, float)) for r in rows):
-            metrics.append(k)
-    return metrics
-
-def _ensure_same_dice(rows: list[dict]) -> list[str]:
-    return [r["warrior_die"] for r in rows]
-
-def plot_per_monster(monster_key: str,
-                     rows_solo: list[dict],
-                     rows_heal: list[dict],
-                     rows_full: list[dict]):
-    dice_labels = _ensure_same_dice(rows_solo)  # assumes same dice order across scenarios
-    x = np.arange(len(dice_labels))
-    width = 0.27
-
-    metrics = _numeric_metrics(rows_solo)  # same schema for all three
-    out_dir = monster_graph_dir(monster_key)
-
-    for metric in metrics:
-        y_solo  = [r[metric] for r in rows_solo]
-        y_heal  = [r[metric] for r in rows_heal]
-        y_full  = [r[metric] for r in rows_full]
-
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.bar(x - width, y_solo,  width, label="Solo")
-        ax.bar(x,          y_heal, width, label="Healer")
-        ax.bar(x + width,  y_full, width, label="Full Party")
-
-        ax.set_xlabel("Damage Die")
-        ax.set_ylabel("Data Value")
-        ax.set_title(f"{metric} - {monster_key}")
-        ax.set_xticks(x, dice_labels)
-        ax.legend()
-        fig.tight_layout()
-
-        fname = out_dir / f"plot_{_sanitize_filename(metric)}_{monster_key}.png"
-        fig.savefig(fname, dpi=150)
-        plt.close(fig)
-        
-# Plot all monsters together for each metric & scenario
-def plot_all_monsters(results_by_monster: dict[str, dict[str, list[dict]]]):
-    if not results_by_monster:
-        return
-
-    # Use any monster to derive metric keys & dice labels
-    sample_monster = next(iter(results_by_monster))
-    dice_labels = _ensure_same_dice(results_by_monster[sample_monster]['solo'])
-    n_dice = len(dice_labels)
-    metrics = _numeric_metrics(results_by_monster[sample_monster]['solo'])
-
-    team_keys = [("solo", "Solo"), ("healer", "Healer"), ("full", "Full Party")]
-    monsters = list(results_by_monster.keys())
-    x = np.arange(len(monsters))
-    width = 0.8 / n_dice  # fit all dice per monster
-
-    # Consistent colors per die + proper legend using proxy patches
-    color_cycle = plt.rcParams['axes.prop_cycle'].by_key().get('color', plt.cm.tab10.colors)
-    colors = [color_cycle[i % len(color_cycle)] for i in range(n_dice)]
-    legend_patches = [Patch(facecolor=colors[i], label=dlabel) for i, dlabel in enumerate(dice_labels)]
-
-    out_dir = all_monsters_graph_dir()
-
-    for metric in metrics:
-        for team_key, team_label in team_keys:
-            fig, ax = plt.subplots(figsize=(12, 6))
-            for i, dlabel in enumerate(dice_labels):
-                ys = []
-                for m in monsters:
-                    rows = results_by_monster[m][team_key]
-                    idx = [row["warrior_die"] for row in rows].index(dlabel)
-                    ys.append(rows[idx][metric])
-                # One bar per monster, offset by die index; color fixed per die
-                ax.bar(x + (i - (n_dice - 1) / 2) * width, ys, width, color=colors[i])
-
-            ax.set_xlabel("Monster")
-            ax.set_ylabel("Data Value")
-            ax.set_title(f"{metric} - All Monsters - {team_label}")
-            ax.set_xticks(x, monsters)
-            ax.legend(handles=legend_patches, title="Damage Die")
-            fig.tight_layout()
-
-            fname = out_dir / f"final_{_sanitize_filename(metric)}_{_sanitize_filename(team_key)}_all_monsters.png"
-            fig.savefig(fname, dpi=150)
-            plt.close(fig)
-
-def run_suite_for_monster(monster_key: str, n_sims: int):
-    monster = MONSTERS[monster_key]
-    rows_1v1  = [summarize_many(simulate_battle_1v1,         d, monster, n_sims) for d in DICE_TO_TEST]
-    rows_heal = [summarize_many(simulate_battle_with_healer, d, monster, n_sims) for d in DICE_TO_TEST]
-    rows_full = [summarize_many(simulate_battle_full_party,  d, monster, n_sims) for d in DICE_TO_TEST]
-
-    # Write CSVs into csv/<MONSTER>/
-    out_csv = monster_csv_dir(monster_key)
-    write_csv(out_csv / "dnd_1v1_summaries.csv", rows_1v1)
-    write_csv(out_csv / "dnd_healer_summaries.csv", rows_heal)
-    write_csv(out_csv / "dnd_fullparty_summaries.csv", rows_full)
-
-    # Per-monster grouped bar charts into graphs/<MONSTER>/
-    plot_per_monster(monster_key, rows_1v1, rows_heal, rows_full)
+def scenario_sims(monster, party=FULL_PARTY, group: int = 1) -> dict:
+    """{scenario: (sim_fn, opponent)} for the three scenarios of a suite."""
+    encounter = partial(simulate_encounter, party=tuple(party))
+    return {"solo": (simulate_battle_1v1, monster),
+            "healer": (simulate_battle_with_healer, monster),
+            "full": (encounter, [monster] * group)}
+
+def run_suite_for_monster(monster_key: str, n_sims: int, party=FULL_PARTY, group: int = 1,
+                          store=STORE_BASE, run: int = 0, write_csvs: bool = True,
+                          executor=None, progress=None, chunk: int = 2_000, seed: int = 0,
+                          plots: bool = True):
+    scenarios = scenario_sims(MONSTERS[monster_key], party, group)
+    cells = [(f"{monster_key}/{scenario}/d{d}", sim_fn, d, opponent)
+             for scenario, (sim_fn, opponent) in scenarios.items() for d in DICE_TO_TEST]
+    keys = [(scenario, d) for scenario in scenarios for d in DICE_TO_TEST]
+
+    # Each finished cell is appended to the binary store right away
+    def on_cell(i, row):
+        dnd_store.append_rows(store, [cell_record(run, monster_key, keys[i][0], party, group, n_sims, row)])
+
+    rows = run_cells(cells, n_sims, chunk, executor, progress, seed, on_cell)
+    results = {s: [row for (scenario, _), row in zip(keys, rows) if scenario == s] for s in scenarios}
+    rows_1v1, rows_heal, rows_full = results["solo"], results["healer"], results["full"]
+
+    # Optional CSV export into csv/<MONSTER>/
+    out_csv = monster_csv_dir(monster_key) if write_csvs else None
+    if write_csvs:
+        for scenario, fname in SCENARIOS:
+            write_csv(out_csv / fname, results[scenario])
+
+    # Per-monster grouped bar charts into graphs/<MONSTER>/, read back from the store
+    if plots:
+        from dnd_plots import plot_per_monster
+        plot_per_monster(monster_key, *(store_summaries(store, run, monster_key, s) for s, _ in SCENARIOS),
+                         out_dir=monster_graph_dir(monster_key))
 
     print(f"Monster: {monster_key}")
     print("---- 1v1 summaries ----")
     for r in rows_1v1: print(r)
     print("\n---- Healer summaries ----")
     for r in rows_heal: print(r)
-    print("\n---- Full Party summaries ----")
+    print(f"\n---- Full Party summaries ({', '.join(party)} vs {group}x {monster_key}) ----")
     for r in rows_full: print(r)
-    print(f"\nFiles written in {out_csv} and {monster_graph_dir(monster_key)}\n")
+    print(f"\nFiles written in {out_csv or store}" + (f" and {GRAPH_BASE / monster_key}" if plots else "") + "\n")
 
     return {"solo": rows_1v1, "healer": rows_heal, "full": rows_full}
 
 def main():
     args = parse_args()
     random.seed(args.seed)
+    try:
+        party = parse_party(args.party)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    group = max(1, args.group)
+    store = Path(args.store)
+
+    if args.from_store:
+        replot_from_store(store)
+        return
 
-    if args.all_monsters:
-        results_by_monster = {}
-        for key in MONSTERS.keys():
-            results_by_monster[key] = run_suite_for_monster(key, args.sims)
-        # Final comparison plots across monsters for each metric & team
-        plot_all_monsters(results_by_monster)
-        print("Final cross-monster comparison plots written (see files starting with 'final_').")
-    else:
-        monster, mname = get_monster(args.monster)
-        run_suite_for_monster(mname, args.sims)
+    if args.sensitivity:
+        import dnd_sensitivity
+        dnd_sensitivity.main(args, party, group, store)
+        return
+
+    run = dnd_store.begin_run(store, dict(seed=args.seed, sims=args.sims, party=",".join(party), group=group))
+    keys = list(MONSTERS) if args.all_monsters else [get_monster(args.monster)[1]]
+    n_cells = len(keys) * len(SCENARIOS) * len(DICE_TO_TEST)
+    workers = max(1, args.workers)
+    heartbeat = args.heartbeat or (store / "heartbeat.json")
+    progress = Progress(n_cells, n_cells * args.sims, workers, heartbeat,
+                        args.progress_interval, enabled=not args.no_progress)
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    suite = dict(store=store, run=run, write_csvs=not args.no_csv, executor=executor,
+                 progress=progress, chunk=max(1, args.chunk), seed=args.seed, plots=not args.no_plots)
+    try:
+        for key in keys:
+            run_suite_for_monster(key, args.sims, party, group, **suite)
+        if args.all_monsters and not args.no_plots:
+            # Final comparison plots across monsters for each metric & team
+            from dnd_plots import plot_all_monsters
+            plot_all_monsters(results_from_store(store, run), out_dir=all_monsters_graph_dir())
+            print("Final cross-monster comparison plots written (see files starting with 'final_').")
+    except BaseException:
+        progress.close("failed")
+        raise
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+    progress.close("done")
+
+    if args.npz:
+        print(f"Compressed snapshot: {dnd_store.export_npz(store)}")
+
+def results_from_store(store, run) -> dict:
+    cols = dnd_store.load_columns(store)
+    monsters = [m for m in MONSTERS if ((cols["run"] == run) & (cols["monster"] == m)).any()]
+    return {m: {s: store_summaries(store, run, m, s) for s, _ in SCENARIOS} for m in monsters}
+
+def replot_from_store(store):
+    cols = dnd_store.load_columns(store)
+    if not len(cols.get("run", ())):
+        raise SystemExit(f"No results stored in {store}")
+    run = int(cols["run"].max())
+    results_by_monster = results_from_store(store, run)
+    from dnd_plots import plot_per_monster, plot_all_monsters
+    for key, res in results_by_monster.items():
+        plot_per_monster(key, res["solo"], res["healer"], res["full"], out_dir=monster_graph_dir(key))
+    if len(results_by_monster) > 1:
+        plot_all_monsters(results_by_monster, out_dir=all_monsters_graph_dir())
+    print(f"Plots for run {run} ({', '.join(results_by_monster)}) rebuilt from {store}")
 
 def get_monster(name: str):
     key = name.strip().upper().replace(" ", "_")
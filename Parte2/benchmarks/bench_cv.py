@@ -0,0 +1,48 @@
+"""
+Benchmark de la etapa de cross-validation de evaluate_models según --jobs.
+
+Usa manos aleatorias etiquetadas con el evaluador exacto y las mismas features y
+modelos que poker_analysis.py (modo --fast: 3 folds, RF de 120 árboles). Mide el
+tiempo de pared de cross_validate_models para cada valor de --jobs.
+
+Uso: python Parte2/benchmarks/bench_cv.py [--rows 100000] [--jobs 1 2 4 -1]
+"""
+import argparse, os, sys, time
+from pathlib import Path
+
+import pandas as pd
+from sklearn.model_selection import StratifiedKFold
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import poker_analysis as pa  # noqa: E402
+from poker_eval import classify_cards  # noqa: E402
+from bench_features import random_hands  # noqa: E402
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--rows", type=int, default=100_000)
+    p.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4, -1])
+    p.add_argument("--folds", type=int, default=3)
+    args = p.parse_args()
+
+    X_raw = random_hands(args.rows)
+    y = pd.Series(classify_cards(X_raw).astype(int), name="y")
+    X = pd.concat([X_raw, pa.make_hand_features(X_raw)], axis=1)
+    skf = StratifiedKFold(n_splits=args.folds, shuffle=True, random_state=pa.RANDOM_STATE)
+    scoring = {"accuracy": "accuracy", "f1_macro": "f1_macro"}
+
+    print(f"{args.rows} filas, {args.folds} folds, {os.cpu_count()} CPUs")
+    print(f"{'jobs':>6}{'cv_jobs':>9}{'hilos':>7}{'segundos':>10}{'speedup':>9}")
+    base = None
+    for jobs in [None] + args.jobs:
+        models = pa.build_models(fast=True)
+        t0 = time.perf_counter()
+        pa.cross_validate_models(models, X, y, skf, scoring, jobs=jobs)
+        dt = time.perf_counter() - t0
+        base = base or dt
+        cv_jobs, inner = (1, "-1") if jobs is None else pa.balance_jobs(jobs, args.folds)
+        print(f"{str(jobs):>6}{cv_jobs:>9}{inner:>7}{dt:>10.2f}{base / dt:>8.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark de eda_plots: histogramas de pandas por columna (original) vs conteos con
+np.bincount en una pasada + figuras dibujadas desde los conteos.
+
+Genera manos con poker_synth.py (distribución natural), comprueba que los conteos de
+eda_counts coinciden con value_counts de pandas y mide, para cada tamaño, el tiempo
+de la versión original, el de contar (frame_eda_counts) y el de dibujar las 11
+figuras desde los conteos, en serie y con --jobs procesos. Las figuras van a una
+carpeta temporal.
+
+Uso: python Parte2/benchmarks/bench_eda.py [--rows 100000 1000000 10000000] [--jobs 2]
+     (la versión original solo se mide hasta --legacy-max filas)
+"""
+import argparse, os, sys, tempfile, time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import poker_analysis as pa  # noqa: E402
+from poker_synth import generate  # noqa: E402
+
+plt = pa.plt
+
+def eda_plots_legacy(X_raw: pd.DataFrame, y: pd.Series):
+    """Versión original: value_counts y un histograma de pandas por columna (recorre los datos 11 veces)."""
+    plt.figure()
+    y.value_counts().sort_index().plot(kind="bar")
+    plt.title("Distribución de etiquetas (mano de póker)")
+    plt.tight_layout()
+    plt.savefig(os.path.join(pa.OUTPUTS_DIR, "labels_distribution.png"))
+    plt.close()
+    for col, bins in [(f"R{k}", 13) for k in range(1, 6)] + [(f"S{k}", 4) for k in range(1, 6)]:
+        plt.figure()
+        X_raw[col].plot(kind="hist", bins=bins)
+        plt.title(f"Histograma {col}")
+        plt.tight_layout()
+        plt.savefig(os.path.join(pa.OUTPUTS_DIR, f"hist_{col}.png"))
+        plt.close()
+
+def check_counts(X_raw: pd.DataFrame, y: pd.Series, counts: np.ndarray):
+    for col, a, (lo, k) in zip(pa.COLNAMES, pa._EDA_OFFSETS, pa.EDA_VALUES.values()):
+        ref = (y if col == "y" else X_raw[col]).value_counts().reindex(range(lo, lo + k), fill_value=0)
+        assert np.array_equal(counts[a + lo:a + lo + k], ref.to_numpy()), col
+
+def timed(fn, *args, **kwargs) -> float:
+    t0 = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - t0
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    p.add_argument("--jobs", type=int, default=2, help="Procesos para dibujar las figuras en paralelo.")
+    p.add_argument("--legacy-max", type=int, default=10_000_000, help="Filas máximas para medir la versión original.")
+    args = p.parse_args()
+
+    pa.OUTPUTS_DIR = tempfile.mkdtemp(prefix="bench_eda_")
+    print(f"{os.cpu_count()} CPUs; figuras en {pa.OUTPUTS_DIR}")
+    print(f"{'filas':>11}{'original s':>12}{'conteo s':>10}{'dibujo s':>10}{f'dibujo x{args.jobs} s':>14}{'speedup':>9}")
+    for n in args.rows:
+        cards = generate(n, seed=0)
+        X_raw = pd.DataFrame(cards[:, :10], columns=pa.COLNAMES[:-1])
+        y = pd.Series(cards[:, 10].astype(int), name="y")
+        counts = pa.frame_eda_counts(X_raw, y)
+        check_counts(X_raw, y, counts)
+        legacy = timed(eda_plots_legacy, X_raw, y) if n <= args.legacy_max else None
+        count_s = timed(pa.frame_eda_counts, X_raw, y)
+        draw_s = timed(pa.eda_plots, None, None, counts=counts)
+        draw_par = timed(pa.eda_plots, None, None, counts=counts, jobs=args.jobs)
+        total = count_s + draw_s
+        old = f"{legacy:>12.2f}" if legacy is not None else f"{'-':>12}"
+        speed = f"{legacy / total:>8.1f}x" if legacy is not None else f"{'-':>9}"
+        print(f"{n:>11,}{old}{count_s:>10.3f}{draw_s:>10.2f}{draw_par:>14.2f}{speed}")
+
+if __name__ == "__main__":
+    main()
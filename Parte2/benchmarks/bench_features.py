@@ -0,0 +1,130 @@
+"""
+Benchmark de make_hand_features: versión por filas (original) vs vectorizada, y
+representación ancha (int64/float64) vs compacta (uint8/float32) vs compacta + bitboard.
+
+Genera manos aleatorias válidas (5 cartas distintas de una baraja de 52), verifica
+que la versión vectorizada (compact=False) produce exactamente el mismo DataFrame que
+la versión por filas y mide tiempos, bytes por fila y, con --fit, el ajuste de un RF.
+
+Uso: python Parte2/benchmarks/bench_features.py [--rows 10000 100000 1000000] [--repeat 3] [--fit 200000]
+     (la versión por filas solo se mide hasta --legacy-max filas; por encima se extrapola)
+"""
+import argparse, sys, time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from poker_analysis import make_hand_features, feature_frame  # noqa: E402
+from poker_eval import classify_cards  # noqa: E402
+
+def random_hands(n: int, seed: int = 0) -> pd.DataFrame:
+    """Manos aleatorias con las columnas S1,R1,...,S5,R5 del dataset UCI."""
+    rng = np.random.default_rng(seed)
+    cards = np.argsort(rng.random((n, 52)), axis=1)[:, :5]
+    cols = {}
+    for k in range(5):
+        cols[f"S{k+1}"] = (cards[:, k] // 13 + 1).astype(np.uint8)
+        cols[f"R{k+1}"] = (cards[:, k] % 13 + 1).astype(np.uint8)
+    return pd.DataFrame(cols)
+
+def wide_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Representación original: crudas int64 + features int64/float64."""
+    return pd.concat([df.astype(np.int64), make_hand_features(df, compact=False)], axis=1)
+
+REPRESENTATIONS = {
+    "ancha": wide_frame,
+    "compacta": feature_frame,
+    "compacta+bitboard": lambda df: feature_frame(df, bitboard=True),
+}
+
+def make_hand_features_legacy(df_cards: pd.DataFrame) -> pd.DataFrame:
+    """Implementación original (bucle por fila), conservada como referencia."""
+    ranks = df_cards[["R1","R2","R3","R4","R5"]].values
+    suits = df_cards[["S1","S2","S3","S4","S5"]].values
+    keys = ["unique_ranks", "unique_suits", "max_count_rank", "max_count_suit",
+            "num_pairs", "has_three", "has_four", "is_flush",
+            "is_straight", "straight_high_rank",
+            "rank_sum", "rank_mean", "rank_std",
+            "top1_rank", "top2_rank", "top3_rank",
+            "rank_gap12", "rank_gap23", "rank_gap34", "rank_gap45"]
+    feats = {k: [] for k in keys}
+    for i in range(df_cards.shape[0]):
+        r_sorted = np.sort(ranks[i, :].astype(int))
+        s = suits[i, :].astype(int)
+        cnt_r = Counter(r_sorted)
+        cnt_s = Counter(s)
+        diffs = np.diff(r_sorted)
+        straight = bool(np.all(diffs == 1))
+        max_cnt_s = max(cnt_s.values())
+        row = [len(np.unique(r_sorted)), len(np.unique(s)), max(cnt_r.values()), max_cnt_s,
+               sum(1 for v in cnt_r.values() if v == 2),
+               int(any(v == 3 for v in cnt_r.values())), int(any(v == 4 for v in cnt_r.values())),
+               int(max_cnt_s == 5), int(straight), int(r_sorted[-1]) if straight else 0,
+               int(r_sorted.sum()), float(r_sorted.mean()), float(r_sorted.std()),
+               int(r_sorted[-1]), int(r_sorted[-2]), int(r_sorted[-3])] + [int(g) for g in diffs]
+        for k, v in zip(keys, row):
+            feats[k].append(v)
+    return pd.DataFrame(feats, index=df_cards.index)
+
+def best_of(fn, df, repeat: int) -> float:
+    ts = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(df)
+        ts.append(time.perf_counter() - t0)
+    return min(ts)
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--fit", type=int, default=0, help="Filas para comparar el ajuste de un RF por representación (0 = omitir).")
+    p.add_argument("--legacy-max", type=int, default=100_000,
+                   help="Máximo de filas para medir la versión por filas (más allá se extrapola).")
+    args = p.parse_args()
+
+    # Igualdad exacta (valores, dtypes, columnas e índice) en una muestra que incluye todas las jugadas
+    check = random_hands(20_000, seed=1)
+    pd.testing.assert_frame_equal(make_hand_features(check, compact=False), make_hand_features_legacy(check), check_exact=True)
+    print("OK: salida idéntica a la implementación por filas (20.000 manos)\n")
+
+    print(f"{'filas':>10}{'por filas s':>14}{'vectorizada s':>16}{'speedup':>10}")
+    legacy_rate = None
+    for n in args.rows:
+        df = random_hands(n)
+        t_vec = best_of(lambda d: make_hand_features(d, compact=False), df, args.repeat)
+        if n <= args.legacy_max:
+            t_old = best_of(make_hand_features_legacy, df, 1)
+            legacy_rate = t_old / n
+            old = f"{t_old:>14.3f}"
+        else:
+            t_old = legacy_rate * n if legacy_rate else float("nan")
+            old = f"{'~' + format(t_old, '.1f'):>14}"
+        print(f"{n:>10}{old}{t_vec:>16.4f}{t_old / t_vec:>9.0f}x")
+
+    n = max(args.rows)
+    df = random_hands(n)
+    print(f"\n{n} filas{'representación':>20}{'columnas':>10}{'bytes/fila':>12}{'MB':>8}{'build s':>9}")
+    for name, fn in REPRESENTATIONS.items():
+        t = best_of(fn, df, args.repeat)
+        X = fn(df)
+        nbytes = X.memory_usage(index=False).sum()
+        print(f"{'':>{len(str(n)) + 6}}{name:>20}{X.shape[1]:>10}{nbytes / n:>12.0f}{nbytes / 2**20:>8.1f}{t:>9.3f}")
+
+    if args.fit:
+        df = random_hands(args.fit, seed=2)
+        y = classify_cards(df)
+        print(f"\nRandomForest (60 árboles, max_depth=12, n_jobs=1) sobre {args.fit} filas")
+        for name, fn in REPRESENTATIONS.items():
+            X = fn(df)
+            rf = RandomForestClassifier(n_estimators=60, max_depth=12, random_state=0, n_jobs=1)
+            t0 = time.perf_counter()
+            rf.fit(X, y)
+            print(f"{name:>20}: fit {time.perf_counter() - t0:.2f}s, acc train {rf.score(X, y):.4f}")
+
+if __name__ == "__main__":
+    main()
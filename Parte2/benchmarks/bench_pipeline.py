@@ -0,0 +1,114 @@
+"""
+Benchmark del pipeline completo de poker_analysis.py con detección de regresiones.
+
+Ejecuta `poker_analysis.py --sample N <--args>` para cada --samples (en --workdir, que
+debe contener la carpeta de datos) y lee el outputs/profile.json que deja cada
+ejecución: tiempo de pared, CPU y memoria pico por etapa. Con --repeat > 1 se queda
+con el mejor tiempo y el menor pico de cada etapa.
+
+Los resultados se comparan con una línea base guardada (--baseline, creada con
+--save-baseline en la misma máquina): una etapa es una regresión si su tiempo supera
+el de la base en más de --tolerance (relativo) y de --min-seconds (absoluto), o si su
+memoria pico crece más de --rss-tolerance y de --min-rss-mb. Sale con código 1 si hay
+alguna, para poder usarlo en CI.
+
+Uso: python Parte2/benchmarks/bench_pipeline.py --samples 25000 100000 --save-baseline
+     python Parte2/benchmarks/bench_pipeline.py --samples 25000 100000
+"""
+import argparse, json, os, shlex, subprocess, sys
+from pathlib import Path
+
+PIPELINE = Path(__file__).resolve().parent.parent / "poker_analysis.py"
+DEFAULT_ARGS = "--fast --oof --offline"
+
+def run_once(sample: int, extra: list, workdir: str) -> dict:
+    """Ejecuta el pipeline una vez y retorna su profile.json."""
+    cmd = [sys.executable, str(PIPELINE), "--sample", str(sample), *extra]
+    proc = subprocess.run(cmd, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(cmd)} falló:\n{proc.stderr[-2000:]}")
+    with open(os.path.join(workdir, "outputs", "profile.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+def best_of(reports: list) -> dict:
+    """Por etapa (y total): mejor tiempo de pared / CPU y menor pico entre repeticiones."""
+    out = {}
+    for rep in reports:
+        rows = [(s["stage"], s) for s in rep["stages"]] + [("total", {"wall_s": rep["total_wall_s"],
+                                                                      "cpu_s": rep["total_cpu_s"],
+                                                                      "peak_rss_mb": rep["peak_rss_mb"]})]
+        for name, s in rows:
+            cur = out.setdefault(name, {"wall_s": s["wall_s"], "cpu_s": s["cpu_s"], "peak_rss_mb": s["peak_rss_mb"]})
+            cur["wall_s"] = min(cur["wall_s"], s["wall_s"])
+            cur["cpu_s"] = min(cur["cpu_s"], s["cpu_s"])
+            if s["peak_rss_mb"] is not None and cur["peak_rss_mb"] is not None:
+                cur["peak_rss_mb"] = min(cur["peak_rss_mb"], s["peak_rss_mb"])
+    return out
+
+def regressions(result: dict, base: dict, tol: float, min_s: float, rss_tol: float, min_mb: float) -> list:
+    """Lista de (muestra, etapa, métrica, base, actual) que empeoran más que los umbrales."""
+    found = []
+    for sample, stages in result.items():
+        for name, cur in stages.items():
+            ref = base.get(sample, {}).get(name)
+            if ref is None:
+                continue
+            if cur["wall_s"] > ref["wall_s"] * (1 + tol) and cur["wall_s"] - ref["wall_s"] > min_s:
+                found.append((sample, name, "wall_s", ref["wall_s"], cur["wall_s"]))
+            if (cur["peak_rss_mb"] and ref["peak_rss_mb"] and cur["peak_rss_mb"] > ref["peak_rss_mb"] * (1 + rss_tol)
+                    and cur["peak_rss_mb"] - ref["peak_rss_mb"] > min_mb):
+                found.append((sample, name, "peak_rss_mb", ref["peak_rss_mb"], cur["peak_rss_mb"]))
+    return found
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--samples", type=int, nargs="+", default=[25_000, 100_000])
+    p.add_argument("--args", default=DEFAULT_ARGS, help=f"Opciones de poker_analysis.py (por defecto: '{DEFAULT_ARGS}').")
+    p.add_argument("--repeat", type=int, default=1)
+    p.add_argument("--workdir", default=".", help="Carpeta de trabajo del pipeline (con data/; escribe en outputs/).")
+    p.add_argument("--baseline", default=None,
+                   help="Línea base JSON (por defecto: <workdir>/outputs/bench_pipeline_baseline.json).")
+    p.add_argument("--save-baseline", action="store_true", help="Guarda estos resultados como nueva línea base.")
+    p.add_argument("--tolerance", type=float, default=0.25, help="Aumento relativo de tiempo tolerado.")
+    p.add_argument("--min-seconds", type=float, default=0.5, help="Aumento absoluto de tiempo ignorado (ruido).")
+    p.add_argument("--rss-tolerance", type=float, default=0.2, help="Aumento relativo de memoria pico tolerado.")
+    p.add_argument("--min-rss-mb", type=float, default=20.0, help="Aumento absoluto de memoria pico ignorado.")
+    args = p.parse_args()
+
+    extra = shlex.split(args.args)
+    baseline = args.baseline or os.path.join(args.workdir, "outputs", "bench_pipeline_baseline.json")
+    result = {}
+    for n in args.samples:
+        stages = result[str(n)] = best_of([run_once(n, extra, args.workdir) for _ in range(args.repeat)])
+        print(f"\n--sample {n} {args.args} (mejor de {args.repeat})")
+        print(f"{'etapa':<24}{'pared s':>9}{'CPU s':>9}{'pico MB':>9}")
+        for name, s in stages.items():
+            rss = f"{s['peak_rss_mb']:>9.0f}" if s["peak_rss_mb"] else f"{'-':>9}"
+            print(f"{name:<24}{s['wall_s']:>9.2f}{s['cpu_s']:>9.2f}{rss}")
+
+    with open(os.path.join(args.workdir, "outputs", "bench_pipeline.json"), "w", encoding="utf-8") as f:
+        json.dump({"args": args.args, "samples": result}, f, indent=1)
+
+    if args.save_baseline:
+        with open(baseline, "w", encoding="utf-8") as f:
+            json.dump({"args": args.args, "samples": result}, f, indent=1)
+        print(f"\nLínea base guardada en {baseline}")
+        return
+    if not os.path.exists(baseline):
+        print(f"\nSin línea base en {baseline} (créala con --save-baseline)")
+        return
+    with open(baseline, encoding="utf-8") as f:
+        base = json.load(f)
+    if base["args"] != args.args:
+        print(f"\nAviso: la línea base se midió con '{base['args']}'")
+    found = regressions(result, base["samples"], args.tolerance, args.min_seconds, args.rss_tolerance, args.min_rss_mb)
+    if not found:
+        print(f"\nSin regresiones frente a {baseline}")
+        return
+    print(f"\nRegresiones frente a {baseline}:")
+    for sample, name, metric, ref, cur in found:
+        print(f"  --sample {sample:<9}{name:<24}{metric:<13}{ref:>9.2f} -> {cur:>9.2f} ({cur / ref - 1:+.0%})")
+    sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Prueba de carga del servicio local poker_service.py.
+
+Lanza `--clients` hilos que envían `--requests` peticiones cada uno (con `--hands` manos
+aleatorias por petición) sobre conexiones HTTP persistentes, y mide latencia de cliente
+(p50/p99) y throughput. Al final muestra los contadores de /stats del servidor (tamaño
+medio de micro-lote, latencia del lado del servidor).
+
+Con --spawn arranca el servicio (modelo de outputs/models/) para cada valor de
+--wait-ms y compara el efecto del micro-batching (--max-batch-rows 1 lo desactiva);
+sin --spawn usa uno ya arrancado en --url.
+
+Uso: python Parte2/benchmarks/loadtest_service.py --spawn --wait-ms 0 2 5 --clients 16 --requests 200
+"""
+import argparse, http.client, json, subprocess, sys, threading, time
+from pathlib import Path
+from urllib.parse import urlparse
+
+import numpy as np
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE))
+from bench_features import random_hands  # noqa: E402
+
+def request(conn, method: str, path: str, body: dict = None) -> dict:
+    data = None if body is None else json.dumps(body)
+    conn.request(method, path, body=data, headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    out = json.loads(resp.read())
+    if resp.status != 200:
+        raise RuntimeError(f"{method} {path}: {resp.status} {out}")
+    return out
+
+def wait_ready(host: str, port: int, timeout: float = 60.0):
+    t0 = time.perf_counter()
+    while True:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=5)
+            request(conn, "GET", "/health")
+            conn.close()
+            return
+        except OSError:
+            if time.perf_counter() - t0 > timeout:
+                raise
+            time.sleep(0.2)
+
+def run_load(host: str, port: int, clients: int, requests: int, hands: int) -> dict:
+    pool = random_hands(max(10_000, hands), seed=3).to_numpy().tolist()
+    latencies = [[] for _ in range(clients)]
+    errors = []
+
+    def client(k: int):
+        rng = np.random.default_rng(k)
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        try:
+            for _ in range(requests):
+                idx = rng.integers(0, len(pool), hands)
+                t0 = time.perf_counter()
+                out = request(conn, "POST", "/predict", {"hands": [pool[i] for i in idx]})
+                latencies[k].append(time.perf_counter() - t0)
+                assert len(out["pred"]) == hands
+        except Exception as e:
+            errors.append(e)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=client, args=(k,)) for k in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    if errors:
+        raise errors[0]
+    lat = np.concatenate(latencies) * 1000
+    conn = http.client.HTTPConnection(host, port, timeout=5)
+    server = request(conn, "GET", "/stats")
+    conn.close()
+    return {"p50": np.percentile(lat, 50), "p99": np.percentile(lat, 99), "rps": len(lat) / elapsed,
+            "hands_s": len(lat) * hands / elapsed, "server": server}
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--url", default="http://127.0.0.1:8765")
+    p.add_argument("--spawn", action="store_true", help="Arranca poker_service.py para cada --wait-ms.")
+    p.add_argument("--wait-ms", type=float, nargs="+", default=[0, 2, 5], help="--max-wait-ms del servicio (con --spawn).")
+    p.add_argument("--max-batch-rows", type=int, default=4096,
+                   help="--max-batch-rows del servicio (con --spawn; 1 = sin micro-batching para peticiones de 1 mano).")
+    p.add_argument("--model", default="randomforest")
+    p.add_argument("--clients", type=int, default=16)
+    p.add_argument("--requests", type=int, default=200, help="Peticiones por cliente.")
+    p.add_argument("--hands", type=int, default=1, help="Manos por petición.")
+    args = p.parse_args()
+
+    url = urlparse(args.url)
+    host, port = url.hostname, url.port
+    print(f"{args.clients} clientes x {args.requests} peticiones x {args.hands} mano(s)")
+    print(f"{'wait ms':>8}{'p50 ms':>9}{'p99 ms':>9}{'pet/s':>9}{'manos/s':>10}{'lote medio':>12}{'srv p99 ms':>12}")
+    for wait in (args.wait_ms if args.spawn else [None]):
+        proc = None
+        if args.spawn:
+            proc = subprocess.Popen([sys.executable, str(HERE.parent / "poker_service.py"), "--model", args.model,
+                                     "--host", host, "--port", str(port), "--max-wait-ms", str(wait),
+                                     "--max-batch-rows", str(args.max_batch_rows)],
+                                    stdout=subprocess.DEVNULL)
+        try:
+            wait_ready(host, port)
+            r = run_load(host, port, args.clients, args.requests, args.hands)
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+        srv = r["server"]
+        print(f"{'-' if wait is None else wait:>8}{r['p50']:>9.2f}{r['p99']:>9.2f}{r['rps']:>9.0f}{r['hands_s']:>10.0f}"
+              f"{srv['mean_batch_hands']:>12.1f}{srv['latency_ms']['p99']:>12.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
+import contextlib
+import json
 import os
+import shutil
+import sys
+import time
 import warnings
-from typing import Tuple, List
+from typing import Tuple
 
 import numpy as np
 import pandas as pd
@@ -10,178 +15,451 @@ import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
-from collections import Counter
-from sklearn.model_selection import StratifiedKFold, train_test_split, cross_validate
+import joblib
+import sklearn
+from joblib import parallel_config
+from sklearn import config_context
+from sklearn.base import clone
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (habilita HalvingGridSearchCV)
+from sklearn.model_selection import StratifiedKFold, train_test_split, cross_validate, HalvingGridSearchCV
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
-from sklearn.metrics import accuracy_score, f1_score, classification_report, confusion_matrix, ConfusionMatrixDisplay
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import (accuracy_score, f1_score, classification_report, confusion_matrix, ConfusionMatrixDisplay,
+                             get_scorer)
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.naive_bayes import GaussianNB
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.inspection import permutation_importance
 
-warnings.filterwarnings("ignore", category=UserWarning)
+from poker_data import DATA_DIR, COLNAMES, load_cards, split_rows, iter_card_chunks
+from poker_eval import CARD_COLS, N_CLASSES, classify_cards, canonicalize_cards, decode_keys
+from poker_synth import STRATIFY, ensure_synthetic
+
+try:
+    import resource
+except ImportError:  # Windows: sin tiempo de CPU de los hijos ni memoria pico de respaldo
+    resource = None
 
-# URLs del dataset Poker Hand (train y test)
-DATA_URL_TRAIN = "https://archive.ics.uci.edu/ml/machine-learning-databases/poker/poker-hand-training-true.data"
-DATA_URL_TEST  = "https://archive.ics.uci.edu/ml/machine-learning-databases/poker/poker-hand-testing.data"
+warnings.filterwarnings("ignore", category=UserWarning)
 
 # Directorio de salida para resultados y gráficos
 OUTPUTS_DIR = "outputs"
+FEATURES_DIR = os.path.join(OUTPUTS_DIR, "features")  # Dataset con features en formato columnar (--stream)
+MODELS_DIR = os.path.join(OUTPUTS_DIR, "models")  # Modelos ajustados + esquema de features (poker_predict.py)
+INCREMENTAL_MODELS_DIR = os.path.join(OUTPUTS_DIR, "models_incremental")  # Modelos de --incremental
+PROFILE_PATH = os.path.join(OUTPUTS_DIR, "profile.json")  # Tiempos y memoria por etapa (StageProfiler)
+CHUNK_ROWS = 200_000
+UCI_SPLITS = ("train", "test")
+# Columna -> (primer valor, nº de valores) de los conteos de EDA, en el orden de COLNAMES
+EDA_VALUES = {c: (0, N_CLASSES) if c == "y" else (1, 4) if c.startswith("S") else (1, 13) for c in COLNAMES}
+_EDA_OFFSETS = np.cumsum([0] + [lo + k for lo, k in EDA_VALUES.values()])  # tramo de bins de cada columna
 RANDOM_STATE = 42  # Semilla fija para reproducibilidad
 
 def ensure_outputs():
     """Asegura que la carpeta de outputs exista."""
     os.makedirs(OUTPUTS_DIR, exist_ok=True)
 
-def load_poker_data(sample_n: int = None) -> Tuple[pd.DataFrame, pd.Series]:
+def _read_peak_rss_mb() -> float:
+    """Memoria pico (MB) del proceso: VmHWM en Linux, ru_maxrss en otros sistemas (None sin ninguno)."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    unit = 1 if sys.platform == "darwin" else 1024  # ru_maxrss: bytes en macOS, KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 2**20
+
+def _reset_peak_rss() -> bool:
+    """Reinicia VmHWM (Linux, /proc/self/clear_refs); False si no se puede y el pico es el del proceso."""
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def _cpu_seconds() -> Tuple[float, float]:
+    """(CPU del proceso con todos sus hilos, CPU de los procesos hijos ya terminados)."""
+    children = 0.0
+    if resource is not None:
+        ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+        children = ru.ru_utime + ru.ru_stime
+    return time.process_time(), children
+
+class StageProfiler:
+    """
+    Tiempo de pared, tiempo de CPU y memoria pico de cada etapa del pipeline.
+    Las etapas pueden anidarse (`depth`); el pico de una etapa incluye el de sus hijas.
+    En Linux el pico se mide por etapa (se reinicia VmHWM al empezar cada una); en otros
+    sistemas es el pico del proceso hasta el final de la etapa (`rss_scope`). El CPU de
+    los workers de joblib/loky no se cuenta: siguen vivos al terminar la etapa.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.stages, self._stack = [], []
+        self.started, self._cpu0 = time.perf_counter(), _cpu_seconds()
+
+    @contextlib.contextmanager
+    def stage(self, name: str, **info):
+        """Mide el bloque `with` como la etapa `name`; `info` (p. ej. rows=...) se añade al registro."""
+        if self._stack:
+            self._stack[-1]["peak"] = max(self._stack[-1]["peak"], _read_peak_rss_mb() or 0.0)
+        scoped = _reset_peak_rss()
+        rec = {"stage": name, "depth": len(self._stack), **info}
+        self.stages.append(rec)
+        frame = {"peak": 0.0, "t0": time.perf_counter(), "cpu0": _cpu_seconds()}
+        self._stack.append(frame)
+        try:
+            yield rec
+        finally:
+            self._stack.pop()
+            cpu = _cpu_seconds()
+            peak = max(frame["peak"], _read_peak_rss_mb() or 0.0)
+            rec.update(wall_s=time.perf_counter() - frame["t0"], cpu_s=cpu[0] - frame["cpu0"][0],
+                       children_cpu_s=cpu[1] - frame["cpu0"][1], peak_rss_mb=peak or None,
+                       rss_scope="stage" if scoped else "process")
+            if self._stack:
+                self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+
+    def last(self, name: str) -> dict:
+        """Último registro terminado de la etapa `name` (None si no se ha medido)."""
+        return next((r for r in reversed(self.stages) if r["stage"] == name and "wall_s" in r), None)
+
+    def report(self, **meta) -> dict:
+        cpu = _cpu_seconds()
+        done = [r for r in self.stages if "wall_s" in r]
+        return {**meta, "total_wall_s": time.perf_counter() - self.started, "total_cpu_s": cpu[0] - self._cpu0[0],
+                "peak_rss_mb": max([r["peak_rss_mb"] or 0.0 for r in done], default=None), "stages": done}
+
+    def write(self, path: str, **meta) -> dict:
+        """Guarda el informe en `path` (JSON) y lo retorna."""
+        report = self.report(**meta)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        return report
+
+PROFILER = StageProfiler()  # etapas de la ejecución actual (main -> outputs/profile.json)
+
+def sample_rows(total: int, sample_n: int = None):
+    """
+    Índices de la muestra (mismo orden que `df.sample(n, random_state=RANDOM_STATE)`),
+    o None si se usa todo el dataset.
     """
-    Descarga y carga los datos de Poker Hand.
+    if sample_n is None or sample_n <= 0 or sample_n >= total:
+        return None
+    return np.random.RandomState(RANDOM_STATE).choice(total, sample_n, replace=False)
+
+def load_poker_data(sample_n: int = None, data_dir: str = DATA_DIR, download: bool = True,
+                    verify: bool = False, splits=UCI_SPLITS) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Carga los datos de Poker Hand (train + test) desde la caché local de `data_dir`
+    (ver poker_data.py); si falta algún split se lanza PokerDataError.
     - sample_n: número de filas a tomar (None o -1 para todo el dataset).
-    Retorna X (features crudas) y (etiquetas).
+    - splits: splits de UCI o rutas `.npy` (n, 11), p. ej. manos de poker_synth.py.
+    Retorna X (features crudas, uint8) y (etiquetas).
     """
-    colnames = ["S1","R1","S2","R2","S3","R3","S4","R4","S5","R5","y"]
-    df_tr = pd.read_csv(DATA_URL_TRAIN, header=None, names=colnames)
-    try:
-        df_te = pd.read_csv(DATA_URL_TEST, header=None, names=colnames)
-    except Exception:
-        df_te = pd.DataFrame(columns=colnames)
-    df = pd.concat([df_tr, df_te], axis=0, ignore_index=True)
+    df = pd.DataFrame(load_cards(splits, data_dir, download=download, verify=verify), columns=COLNAMES)
 
     # Muestreo opcional para acelerar experimentos
-    if sample_n is not None and sample_n > 0 and sample_n < len(df):
-        df = df.sample(n=sample_n, random_state=RANDOM_STATE).reset_index(drop=True)
+    rows = sample_rows(len(df), sample_n)
+    if rows is not None:
+        df = df.iloc[rows].reset_index(drop=True)
 
     X = df.drop(columns=["y"]).copy()
     y = df["y"].copy().astype(int)
     return X, y
 
-def make_hand_features(df_cards: pd.DataFrame) -> pd.DataFrame:
+def make_hand_features(df_cards: pd.DataFrame, compact: bool = True) -> pd.DataFrame:
     """
     Construye nuevas características a partir de las 5 cartas de la mano:
     - Conteos de rangos y suits
     - Indicadores de jugadas (pares, tríos, póker, flush, straight)
     - Estadísticos de rangos (suma, media, desviación, gaps)
+    Implementación vectorizada: opera sobre la matriz completa (n, 5) sin bucles por fila.
+    Con compact=True los enteros son uint8 y rank_mean/rank_std float32; con compact=False,
+    int64/float64 como la versión original por filas.
     """
-    ranks = df_cards[["R1","R2","R3","R4","R5"]].values
-    suits = df_cards[["S1","S2","S3","S4","S5"]].values
+    ranks = df_cards[["R1","R2","R3","R4","R5"]].to_numpy(dtype=np.int64)
+    suits = df_cards[["S1","S2","S3","S4","S5"]].to_numpy(dtype=np.int64)
+    n = ranks.shape[0]
+    r_sorted = np.sort(ranks, axis=1)
+
+    # Conteos por fila con un único bincount: desplazamos cada fila a su propio bloque de 13 (o 4) bins
+    offs = np.arange(n, dtype=np.int64)[:, None]
+    cnt_r = np.bincount((ranks - 1 + 13 * offs).ravel(), minlength=13 * n).reshape(n, 13)
+    cnt_s = np.bincount((suits - 1 + 4 * offs).ravel(), minlength=4 * n).reshape(n, 4)
+
+    # Detectar patrones
+    max_cnt_s = cnt_s.max(axis=1) if n else np.zeros(0, dtype=np.int64)
+    gaps = np.diff(r_sorted, axis=1)
+    straight = np.all(gaps == 1, axis=1)
 
     feats = {
-        "unique_ranks": [], "unique_suits": [], "max_count_rank": [], "max_count_suit": [],
-        "num_pairs": [], "has_three": [], "has_four": [], "is_flush": [],
-        "is_straight": [], "straight_high_rank": [],
-        "rank_sum": [], "rank_mean": [], "rank_std": [],
-        "top1_rank": [], "top2_rank": [], "top3_rank": [],
-        "rank_gap12": [], "rank_gap23": [], "rank_gap34": [], "rank_gap45": [],
+        "unique_ranks": np.count_nonzero(cnt_r, axis=1),
+        "unique_suits": np.count_nonzero(cnt_s, axis=1),
+        "max_count_rank": cnt_r.max(axis=1) if n else np.zeros(0, dtype=np.int64),
+        "max_count_suit": max_cnt_s,
+        "num_pairs": (cnt_r == 2).sum(axis=1),
+        "has_three": (cnt_r == 3).any(axis=1),
+        "has_four": (cnt_r == 4).any(axis=1),
+        "is_flush": max_cnt_s == 5,
+        "is_straight": straight,
+        "straight_high_rank": np.where(straight, r_sorted[:, -1], 0),
+        "rank_sum": r_sorted.sum(axis=1),
+        "rank_mean": r_sorted.mean(axis=1),
+        "rank_std": r_sorted.std(axis=1),
+        "top1_rank": r_sorted[:, -1],
+        "top2_rank": r_sorted[:, -2],
+        "top3_rank": r_sorted[:, -3],
+        "rank_gap12": gaps[:, 0],
+        "rank_gap23": gaps[:, 1],
+        "rank_gap34": gaps[:, 2],
+        "rank_gap45": gaps[:, 3],
     }
+    # Todos los enteros caben en uint8 (rank_sum <= 65); compact=False reproduce int64/float64
+    int_t, float_t = (np.uint8, np.float32) if compact else (np.int64, np.float64)
+    feats = {k: v.astype(float_t if k in ("rank_mean", "rank_std") else int_t) for k, v in feats.items()}
+    return pd.DataFrame(feats, index=df_cards.index)
+
+# Popcount y bit más alto para máscaras de hasta 14 bits (tablas en lugar de bucles por bit)
+POPCOUNT14 = np.array([bin(m).count("1") for m in range(1 << 14)], dtype=np.uint8)
+HIGHBIT14 = np.array([m.bit_length() for m in range(1 << 14)], dtype=np.uint8)
 
-    def is_sequence(sorted_ranks: List[int]):
-        """Detecta si los rangos son consecutivos (straight)."""
-        diffs = np.diff(sorted_ranks)
-        if np.all(diffs == 1):
-            return True, int(sorted_ranks[-1])
-        return False, 0
-
-    # Iterar por cada mano
-    for i in range(df_cards.shape[0]):
-        r = ranks[i, :].astype(int)
-        s = suits[i, :].astype(int)
-        r_sorted = np.sort(r)
-
-        # Conteos de rangos y suits
-        uniq_r = np.unique(r_sorted)
-        uniq_s = np.unique(s)
-        from collections import Counter as C
-        cnt_r = C(r_sorted)
-        cnt_s = C(s)
-
-        # Detectar patrones
-        counts_r_sorted = sorted(cnt_r.values(), reverse=True)
-        max_cnt_r = counts_r_sorted[0] if counts_r_sorted else 0
-        num_pairs = sum(1 for v in cnt_r.values() if v == 2)
-        has_three = 1 if any(v == 3 for v in cnt_r.values()) else 0
-        has_four = 1 if any(v == 4 for v in cnt_r.values()) else 0
-        max_cnt_s = max(cnt_s.values()) if cnt_s else 0
-        is_flush = 1 if max_cnt_s == 5 else 0
-        straight, high = is_sequence(r_sorted)
-
-        # Gaps entre cartas ordenadas
-        gaps = np.diff(r_sorted)
-        gap12, gap23, gap34, gap45 = (int(gaps[0]), int(gaps[1]), int(gaps[2]), int(gaps[3]))
-
-        # Guardar features
-        feats["unique_ranks"].append(len(uniq_r))
-        feats["unique_suits"].append(len(uniq_s))
-        feats["max_count_rank"].append(max_cnt_r)
-        feats["max_count_suit"].append(max_cnt_s)
-        feats["num_pairs"].append(num_pairs)
-        feats["has_three"].append(has_three)
-        feats["has_four"].append(has_four)
-        feats["is_flush"].append(is_flush)
-        feats["is_straight"].append(1 if straight else 0)
-        feats["straight_high_rank"].append(high)
-        feats["rank_sum"].append(int(r_sorted.sum()))
-        feats["rank_mean"].append(float(r_sorted.mean()))
-        feats["rank_std"].append(float(r_sorted.std()))
-        feats["top1_rank"].append(int(r_sorted[-1]))
-        feats["top2_rank"].append(int(r_sorted[-2]))
-        feats["top3_rank"].append(int(r_sorted[-3]))
-        feats["rank_gap12"].append(gap12)
-        feats["rank_gap23"].append(gap23)
-        feats["rank_gap34"].append(gap34)
-        feats["rank_gap45"].append(gap45)
+def card_bitboards(df_cards: pd.DataFrame) -> np.ndarray:
+    """Mano como bitboard de 52 bits (uint64): bit (suit-1)*13 + (rango-1) por carta."""
+    ranks = df_cards[["R1","R2","R3","R4","R5"]].to_numpy(dtype=np.uint64)
+    suits = df_cards[["S1","S2","S3","S4","S5"]].to_numpy(dtype=np.uint64)
+    bits = np.left_shift(np.uint64(1), (suits - np.uint64(1)) * np.uint64(13) + ranks - np.uint64(1))
+    return np.bitwise_or.reduce(bits, axis=1)
 
+def make_bitboard_features(df_cards: pd.DataFrame) -> pd.DataFrame:
+    """
+    Features a partir del bitboard de 52 bits:
+    - Máscaras de 13 bits por suit y de rangos (OR de las cuatro)
+    - Popcounts por suit (cartas de cada palo)
+    - Escalera por operaciones de bits, con el as alto y bajo, y su carta más alta (14 = as)
+    - One-hot empaquetado de las 52 cartas (uint8), para que los árboles vean cada carta
+    """
+    bb = card_bitboards(df_cards)
+    feats = {}
+    suit_masks = [((bb >> np.uint64(13 * k)) & np.uint64(0x1FFF)).astype(np.uint16) for k in range(4)]
+    rank_mask = suit_masks[0] | suit_masks[1] | suit_masks[2] | suit_masks[3]
+    feats["rank_mask"] = rank_mask
+    for k, m in enumerate(suit_masks, start=1):
+        feats[f"suit_mask_{k}"] = m
+    for k, m in enumerate(suit_masks, start=1):
+        feats[f"suit_count_{k}"] = POPCOUNT14[m]
+    # El as (bit 0) también ocupa el bit 13 para la escalera alta 10-J-Q-K-A
+    m = rank_mask | ((rank_mask & 1) << 13)
+    run = m & (m >> 1) & (m >> 2) & (m >> 3) & (m >> 4)
+    feats["straight_any"] = (run != 0).astype(np.uint8)
+    feats["straight_top"] = np.where(run != 0, HIGHBIT14[run] + 4, 0).astype(np.uint8)
+    onehot = ((bb[:, None] >> np.arange(52, dtype=np.uint64)) & np.uint64(1)).astype(np.uint8)
+    for i in range(52):
+        feats[f"card_S{i // 13 + 1}R{i % 13 + 1}"] = onehot[:, i]
     return pd.DataFrame(feats, index=df_cards.index)
 
-def build_dataset(sample_n: int = None) -> Tuple[pd.DataFrame, pd.Series]:
+def feature_frame(X_raw: pd.DataFrame, bitboard: bool = False) -> pd.DataFrame:
+    """Columnas crudas + features de mano (+ features de bitboard si se piden)."""
+    parts = [X_raw, make_hand_features(X_raw)]
+    if bitboard:
+        parts.append(make_bitboard_features(X_raw))
+    return pd.concat(parts, axis=1)
+
+def dedupe_cards(blocks) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Colapsa manos equivalentes (mismo multiconjunto de cartas salvo permutación de suits)
+    en una fila canónica con su número de apariciones. `blocks` es un iterable de
+    matrices (n, 11) S1,R1,...,S5,R5,y; la memoria está acotada por las 134.459 manos
+    canónicas posibles, no por el número de filas.
+    Retorna (cartas canónicas uint8 (m, 11), conteos int64 (m,)).
+    """
+    keys = np.empty(0, dtype=np.int64)
+    counts = np.empty(0, dtype=np.int64)
+    for block in blocks:
+        block = np.asarray(block)
+        # La etiqueta va en la clave para detectar manos iguales con etiquetas distintas
+        k, c = np.unique(canonicalize_cards(block) * 10 + block[:, 10], return_counts=True)
+        keys, inv = np.unique(np.concatenate([keys, k]), return_inverse=True)
+        counts = np.bincount(inv, weights=np.concatenate([counts, c]), minlength=len(keys)).astype(np.int64)
+    hands, labels = keys // 10, keys % 10
+    if len(np.unique(hands)) != len(hands):
+        raise ValueError("La misma mano canónica aparece con etiquetas distintas")
+    cards = np.empty((len(keys), 11), dtype=np.uint8)
+    cards[:, :10] = decode_keys(hands)
+    cards[:, 10] = labels
+    return cards, counts
+
+def build_dataset(sample_n: int = None, data_dir: str = DATA_DIR, bitboard: bool = False) -> Tuple[pd.DataFrame, pd.Series]:
     """Carga los datos y genera el dataset extendido con features derivadas."""
-    X_raw, y = load_poker_data(sample_n=sample_n)
-    X_feat = make_hand_features(X_raw)
-    X_all = pd.concat([X_raw, X_feat], axis=1)
-    return X_all, y
+    X_raw, y = load_poker_data(sample_n=sample_n, data_dir=data_dir)
+    return feature_frame(X_raw, bitboard), y
 
-def eda_plots(X_raw: pd.DataFrame, y: pd.Series):
-    """Genera y guarda los gráficos de EDA (distribución de etiquetas, histogramas de R y S)."""
-    ensure_outputs()
+def stream_features(sample_n: int = None, data_dir: str = DATA_DIR, download: bool = True, verify: bool = False,
+                    out_dir: str = FEATURES_DIR, chunk_rows: int = CHUNK_ROWS, bitboard: bool = False,
+                    dedup: bool = False, splits=UCI_SPLITS) -> str:
+    """
+    Versión por bloques de build_dataset: lee los datos crudos en bloques de `chunk_rows`
+    filas, calcula las features de cada bloque y las escribe en un `.npy` por columna
+    (mismas filas, orden y tipos que la versión en memoria). La memoria pico depende
+    de `chunk_rows`, no del tamaño del dataset. Con dedup=True se escriben las manos
+    canónicas únicas (dedupe_cards) con una columna `sample_weight` de conteos.
+    Retorna la carpeta de salida.
+    """
+    total = split_rows(splits, data_dir, download=download, verify=verify)
+    rows = sample_rows(total, sample_n)
+    n = total if rows is None else len(rows)
+    raw = iter_card_chunks(splits, data_dir, chunk_rows, rows=rows, download=download, verify=verify)
+    # Conteos de EDA de los bloques crudos, antes de dedupe_cards (que reordena cartas y suits)
+    raw_counts = []
+    def counted(blocks):
+        for start, block in blocks:
+            raw_counts.append(eda_counts(block.T))
+            yield start, block
+    chunks = counted(raw)
+    weights = None
+    if dedup:
+        cards, weights = dedupe_cards(block for _, block in chunks)
+        n = len(cards)
+        chunks = ((a, cards[a:a + chunk_rows]) for a in range(0, n, chunk_rows))
+
+    tmp = out_dir + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    # Cada columna es un .npy cuya cabecera (con el total de filas) se escribe al principio;
+    # los bloques se añaden al final del fichero, sin mapear la salida en memoria
+    columns, files = [], {}
+    try:
+        for start, block in chunks:
+            df = pd.DataFrame(block, columns=COLNAMES)
+            X_raw = df.drop(columns=["y"])
+            part = pd.concat([feature_frame(X_raw, bitboard), df[["y"]]], axis=1)
+            if weights is not None:
+                part["sample_weight"] = weights[start:start + len(part)]
+            if not files:
+                for i, c in enumerate(part.columns):
+                    fname = f"{i:03d}_{c}.npy"
+                    f = files[c] = open(os.path.join(tmp, fname), "wb")
+                    np.lib.format.write_array_header_1_0(
+                        f, {"descr": part[c].dtype.str, "fortran_order": False, "shape": (n,)})
+                    columns.append({"name": c, "file": fname, "dtype": part[c].dtype.str})
+            for c, f in files.items():
+                f.write(np.ascontiguousarray(part[c].to_numpy()).tobytes())
+    finally:
+        for f in files.values():
+            f.close()
 
-    # Distribución de etiquetas
+    with open(os.path.join(tmp, "schema.json"), "w", encoding="utf-8") as f:
+        json.dump({"rows": n, "columns": columns, "sample": sample_n, "chunk_rows": chunk_rows, "dedup": dedup,
+                   "eda_counts": np.sum(raw_counts, axis=0).tolist()}, f, indent=1)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp, out_dir)
+    return out_dir
+
+def load_features(out_dir: str = FEATURES_DIR) -> Tuple[pd.DataFrame, pd.Series, np.ndarray]:
+    """
+    Abre el dataset de stream_features con memory mapping (sin copiar columnas).
+    Retorna X, y y los sample_weight (None si el dataset no está deduplicado).
+    """
+    with open(os.path.join(out_dir, "schema.json"), encoding="utf-8") as f:
+        schema = json.load(f)
+    arrays = {c["name"]: np.load(os.path.join(out_dir, c["file"]), mmap_mode="r") for c in schema["columns"]}
+    y = pd.Series(arrays.pop("y"), name="y", copy=False)
+    weights = arrays.pop("sample_weight", None)
+    return pd.DataFrame(arrays, copy=False), y, weights
+
+def load_eda_counts(out_dir: str = FEATURES_DIR) -> np.ndarray:
+    """Conteos de EDA acumulados por stream_features (None si el dataset es anterior a ellos)."""
+    with open(os.path.join(out_dir, "schema.json"), encoding="utf-8") as f:
+        counts = json.load(f).get("eda_counts")
+    return None if counts is None else np.asarray(counts)
+
+def eda_counts(columns, sample_weight=None) -> np.ndarray:
+    """
+    Conteos de cada valor de las 11 columnas S1..R5, y de un bloque (p. ej. `block.T`),
+    con un np.bincount entero por columna, concatenados en el orden de EDA_VALUES.
+    Los conteos de varios bloques se suman. Con sample_weight, cada fila cuenta tantas
+    veces como su peso.
+    """
+    w = None if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+    return np.concatenate([np.bincount(c, weights=w, minlength=lo + k)
+                           for c, (lo, k) in zip(columns, EDA_VALUES.values())])
+
+def frame_eda_counts(X_raw: pd.DataFrame, y: pd.Series, sample_weight=None, chunk_rows: int = CHUNK_ROWS) -> np.ndarray:
+    """eda_counts de un DataFrame (en memoria o memory-mapped) recorrido por bloques de filas."""
+    cols = [X_raw[c].to_numpy() for c in COLNAMES[:-1]] + [np.asarray(y)]
+    counts = 0
+    for a in range(0, len(y), chunk_rows):
+        counts = counts + eda_counts([c[a:a + chunk_rows] for c in cols],
+                                     None if sample_weight is None else sample_weight[a:a + chunk_rows])
+    return np.asarray(counts)
+
+def _save_bar(fname: str, values, heights, title: str, xlabel: str):
     plt.figure()
-    y.value_counts().sort_index().plot(kind="bar")
-    plt.title("Distribución de etiquetas (mano de póker)")
-    plt.xlabel("Clase (0..9)")
+    plt.bar(values, heights)
+    plt.xticks(values)
+    plt.title(title)
+    plt.xlabel(xlabel)
     plt.ylabel("Frecuencia")
     plt.tight_layout()
-    plt.savefig(os.path.join(OUTPUTS_DIR, "labels_distribution.png"))
+    plt.savefig(os.path.join(OUTPUTS_DIR, fname))
     plt.close()
 
-    # Histogramas de rangos
-    for col in ["R1","R2","R3","R4","R5"]:
-        plt.figure()
-        X_raw[col].plot(kind="hist", bins=13)
-        plt.title(f"Histograma {col}")
-        plt.xlabel("Rango (1..13)")
-        plt.tight_layout()
-        plt.savefig(os.path.join(OUTPUTS_DIR, f"hist_{col}.png"))
-        plt.close()
-
-    # Histogramas de suits
-    for col in ["S1","S2","S3","S4","S5"]:
-        plt.figure()
-        X_raw[col].plot(kind="hist", bins=4)
-        plt.title(f"Histograma {col}")
-        plt.xlabel("Suit (1..4)")
-        plt.tight_layout()
-        plt.savefig(os.path.join(OUTPUTS_DIR, f"hist_{col}.png"))
-        plt.close()
-
-def evaluate_models(X: pd.DataFrame, y: pd.Series, cv_splits: int = 5, fast: bool = False) -> pd.DataFrame:
-    """
-    Evalúa modelos (Logistic Regression y Random Forest):
-    - Cross-validation estratificada
-    - Reportes de clasificación
-    - Matrices de confusión
-    - Importancias de variables
+def eda_plots(X_raw: pd.DataFrame, y: pd.Series, sample_weight=None, counts: np.ndarray = None, jobs: int = None):
+    """
+    Genera y guarda los gráficos de EDA (distribución de etiquetas, histogramas de R y S).
+    Con sample_weight (manos deduplicadas) cada fila cuenta tantas veces como su peso.
+    Los datos se recorren una sola vez (eda_counts por bloques) y las figuras se dibujan
+    desde los conteos; con `counts` (p. ej. los de stream_features) ni siquiera se leen.
+    jobs: procesos para dibujar las 11 figuras (None = en serie).
     """
     ensure_outputs()
+    if counts is None:
+        counts = frame_eda_counts(X_raw, y, sample_weight)
 
+    figures = []
+    for col, a, (lo, k) in zip(COLNAMES, _EDA_OFFSETS, EDA_VALUES.values()):
+        values, heights = np.arange(lo, lo + k), counts[a + lo:a + lo + k]
+        if col == "y":  # Distribución de etiquetas
+            figures.append(("labels_distribution.png", values, heights,
+                            "Distribución de etiquetas (mano de póker)", "Clase (0..9)"))
+        else:  # Histogramas de suits y rangos
+            xlabel = "Suit (1..4)" if col.startswith("S") else "Rango (1..13)"
+            figures.append((f"hist_{col}.png", values, heights, f"Histograma {col}", xlabel))
+    if jobs is None or jobs == 1:
+        for fig in figures:
+            _save_bar(*fig)
+    else:
+        joblib.Parallel(n_jobs=jobs)(joblib.delayed(_save_bar)(*fig) for fig in figures)
+
+def balance_jobs(jobs: int, folds: int) -> Tuple[int, int]:
+    """
+    Reparte `jobs` núcleos (-1 = todos) entre folds en paralelo y árboles del RF,
+    de modo que folds × árboles no supere el total. Retorna (cv_jobs, rf_jobs).
+    """
+    total = (os.cpu_count() or 1) if jobs == -1 else max(1, jobs)
+    cv_jobs = min(folds, total)
+    return cv_jobs, max(1, total // cv_jobs)
+
+# Modelos disponibles (--models): nombre -> etiqueta en cv_results.csv / clave de params (tune_models)
+MODEL_LABELS = {"logreg": "LogisticRegression", "randomforest": "RandomForest", "hgb": "HistGradientBoosting"}
+PARAM_KEYS = {"logreg": "logreg", "randomforest": "rf", "hgb": "hgb"}
+DEFAULT_MODELS = ("logreg", "randomforest")
+
+def build_models(fast: bool = False, params: dict = None, names=DEFAULT_MODELS) -> list:
+    """
+    Modelos a evaluar, en el orden de `names` (por defecto [Regresión Logística, Random Forest]).
+    `params` ({"logreg": {...}, "rf": {...}, "hgb": {...}}, p. ej. de tune_models) sustituye
+    los valores por defecto.
+    """
     # Modelo 1: Regresión Logística
     logreg = Pipeline([
         ("scaler", StandardScaler()),
@@ -196,103 +474,755 @@ def evaluate_models(X: pd.DataFrame, y: pd.Series, cv_splits: int = 5, fast: boo
         n_jobs=-1,
         class_weight="balanced_subsample"
     )
+    # Modelo 3: Gradient boosting por histogramas. Las features compactas (uint8 con menos
+    # de 256 valores) caben cada una en sus propios bins, sin pérdida. Early stopping sobre
+    # la pérdida de entrenamiento: el split de validación estratificado falla con clases
+    # de una sola fila (escalera real en folds pequeños o deduplicados).
+    hgb = HistGradientBoostingClassifier(
+        max_iter=300 if not fast else 150,
+        learning_rate=0.2 if not fast else 0.3,
+        early_stopping=True,
+        validation_fraction=None,
+        n_iter_no_change=10,
+        class_weight="balanced",
+        random_state=RANDOM_STATE,
+    )
+    models = {"logreg": logreg, "randomforest": rf, "hgb": hgb}
+    if params:
+        for name, key in PARAM_KEYS.items():
+            models[name].set_params(**params.get(key, {}))
+    return [models[name] for name in names]
+
+# Rejillas de --tune (5 + 48 candidatos)
+TUNE_GRIDS = {
+    "logreg": {"clf__C": [0.01, 0.1, 1.0, 10.0, 100.0]},
+    "rf": {"n_estimators": [60, 120, 200], "max_depth": [8, 12, 20, None],
+           "min_samples_leaf": [1, 4], "max_features": ["sqrt", 0.5]},
+}
+
+def pareto_front(df: pd.DataFrame, cost: str = "mean_fit_time", score: str = "mean_test_score") -> pd.DataFrame:
+    """Filas no dominadas: ninguna otra es a la vez más barata y con mejor score."""
+    d = df.sort_values([cost, score], ascending=[True, False])
+    return d[d[score] > d[score].cummax().shift(fill_value=-np.inf)]
+
+def tune_models(X, y, fast: bool = False, jobs: int = None, sample_weight=None, factor: int = 3) -> dict:
+    """
+    Búsqueda por successive halving (HalvingGridSearchCV) sobre TUNE_GRIDS: todos los
+    candidatos se evalúan con un subconjunto estratificado pequeño de filas y solo el
+    mejor 1/`factor` pasa a la siguiente ronda con `factor` veces más filas, hasta usar
+    todas. Los candidatos × folds de cada ronda corren en paralelo con `jobs`.
+    Guarda todas las evaluaciones (tune_results.csv), el frente de Pareto tiempo de
+    ajuste / Macro-F1 de cada ronda (tune_pareto.csv y .png; solo son comparables los
+    candidatos evaluados con las mismas filas) y la mejor configuración (tune_best.json).
+    Retorna {"logreg": {...}, "rf": {...}} para build_models.
+    """
+    ensure_outputs()
+    folds = 3 if fast else 5
+    skf = StratifiedKFold(n_splits=folds, shuffle=True, random_state=RANDOM_STATE)
+    w = None if sample_weight is None else np.asarray(sample_weight)
+    scoring = get_scorer("f1_macro")
+    best, frames, report = {}, [], {}
+    for name, model in zip(("logreg", "rf"), build_models(fast)):
+        grid = TUNE_GRIDS[name]
+        n_cand = int(np.prod([len(v) for v in grid.values()]))
+        if jobs is None:
+            search_jobs, ctx = 1, contextlib.nullcontext()
+        else:
+            search_jobs, inner = balance_jobs(jobs, n_cand * folds)
+            ctx = parallel_config(backend="loky", max_nbytes="1M", mmap_mode="r", inner_max_num_threads=inner)
+            if "n_jobs" in model.get_params():
+                model.set_params(n_jobs=inner)
+        t0 = time.perf_counter()
+        with config_context(enable_metadata_routing=w is not None), ctx:
+            fit_params = {}
+            if w is not None:
+                model = request_sample_weight(model)
+                scoring = get_scorer("f1_macro").set_score_request(sample_weight=True)
+                fit_params = {"sample_weight": w}
+            search = HalvingGridSearchCV(model, grid, factor=factor, cv=skf, scoring=scoring, refit=False,
+                                         return_train_score=False, random_state=RANDOM_STATE, n_jobs=search_jobs)
+            search.fit(X, y, **fit_params)
+        elapsed = time.perf_counter() - t0
+
+        res = pd.DataFrame(search.cv_results_)[["iter", "n_resources", "params", "mean_fit_time",
+                                                "mean_test_score", "std_test_score"]]
+        res.insert(0, "model", name)
+        res["params"] = res["params"].map(lambda d: json.dumps(d, sort_keys=True))
+        # Coste de la rejilla completa: cada candidato con todas las filas, extrapolando su
+        # tiempo de ajuste (lineal en filas) desde la ronda más grande a la que llegó
+        last = res.loc[res.groupby("params")["n_resources"].idxmax()]
+        grid_cost = float((last["mean_fit_time"] * len(y) / last["n_resources"]).sum() * folds)
+        best[name] = search.best_params_
+        report[name] = {"best_params": search.best_params_, "best_f1_macro": float(search.best_score_),
+                        "candidates": n_cand, "rounds": int(res["iter"].max()) + 1,
+                        "seconds": elapsed, "grid_fit_seconds_est": grid_cost}
+        frames.append(res)
+        print(f"{name}: {n_cand} candidatos, {report[name]['rounds']} rondas, {elapsed:.1f}s "
+              f"(rejilla completa ~{grid_cost:.0f}s de ajuste) -> {search.best_params_} "
+              f"f1_macro={search.best_score_:.4f}")
+
+    results = pd.concat(frames, ignore_index=True)
+    front = results.groupby(["model", "iter"], group_keys=False)[results.columns].apply(pareto_front)
+    results.to_csv(os.path.join(OUTPUTS_DIR, "tune_results.csv"), index=False)
+    front.to_csv(os.path.join(OUTPUTS_DIR, "tune_pareto.csv"), index=False)
+    with open(os.path.join(OUTPUTS_DIR, "tune_best.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1, default=str)
+
+    fig, axes = plt.subplots(1, 2, figsize=(11, 4.5))
+    for ax, (name, res) in zip(axes, results.groupby("model")):
+        for it, r in res.groupby("iter"):
+            color = plt.cm.viridis(it / max(1, res["iter"].max()))
+            label = f"ronda {it + 1}: {r['n_resources'].iloc[0]} filas"
+            ax.scatter(r["mean_fit_time"], r["mean_test_score"], s=12, alpha=0.4, color=color, label=label)
+            f = front[(front["model"] == name) & (front["iter"] == it)]
+            ax.step(f["mean_fit_time"], f["mean_test_score"], where="post", color=color)
+        ax.set_xscale("log")
+        ax.set_xlabel("Tiempo de ajuste por fold (s)")
+        ax.set_ylabel("Macro-F1 (CV)")
+        ax.set_title(f"{name}: frente de Pareto por ronda")
+        ax.legend(fontsize=7)
+    fig.tight_layout()
+    fig.savefig(os.path.join(OUTPUTS_DIR, "tune_pareto.png"))
+    plt.close(fig)
+    return best
+
+MAJORITY_MIN_SHARE = 0.10  # Clases con más de este peso en los datos (0 y 1 en Poker Hand) se submuestrean
+
+def majority_subsample(y, frac: float, sample_weight=None, seed: int = RANDOM_STATE) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Máscara de filas a conservar para entrenar y pesos de importancia exactos.
+    Las clases mayoritarias conservan round(frac * n_c) filas elegidas al azar y sus pesos
+    se multiplican por (peso total de la clase / peso conservado), de modo que el peso de
+    cada clase coincide exactamente con el de los datos completos. El resto de clases se
+    conserva entero con su peso.
+    """
+    y = np.asarray(y)
+    w = np.ones(len(y)) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    keep = np.ones(len(y), dtype=bool)
+    fit_w = w.copy()
+    totals = pd.Series(w).groupby(y).sum()
+    for c in totals.index[totals / totals.sum() > MAJORITY_MIN_SHARE]:
+        idx = np.flatnonzero(y == c)
+        kept = rng.choice(idx, size=max(1, int(round(frac * len(idx)))), replace=False)
+        keep[idx] = False
+        keep[kept] = True
+        fit_w[kept] *= totals[c] / w[kept].sum()
+    return keep, fit_w
+
+class SubsampledCV:
+    """Splitter que quita de cada fold de entrenamiento las filas fuera de `keep`; los folds de test no se tocan."""
+
+    def __init__(self, cv, keep: np.ndarray):
+        self.cv, self.keep = cv, keep
+
+    def split(self, X, y=None, groups=None):
+        for tr, te in self.cv.split(X, y, groups):
+            yield tr[self.keep[tr]], te
+
+    def get_n_splits(self, X=None, y=None, groups=None):
+        return self.cv.get_n_splits(X, y, groups)
+
+def request_sample_weight(model, alias="sample_weight"):
+    """Copia del modelo que pide `sample_weight` en fit (metadata routing), pasos del Pipeline incluidos."""
+    model = clone(model)
+    for est in (model.named_steps.values() if isinstance(model, Pipeline) else [model]):
+        est.set_fit_request(sample_weight=alias)
+    return model
+
+def model_label(model) -> str:
+    """Nombre corto de un modelo de build_models para informes: logreg, randomforest o hgb (si no, la clase)."""
+    est = model.steps[-1][1] if isinstance(model, Pipeline) else model
+    return {"LogisticRegression": "logreg", "RandomForestClassifier": "randomforest",
+            "HistGradientBoostingClassifier": "hgb"}.get(type(est).__name__, type(est).__name__)
+
+def fit_model(model, X, y, sample_weight=None):
+    """fit con sample_weight opcional, repartido entre los pasos si el modelo es un Pipeline."""
+    if sample_weight is None:
+        return model.fit(X, y)
+    if isinstance(model, Pipeline):
+        return model.fit(X, y, **{f"{step}__sample_weight": sample_weight for step in model.named_steps})
+    return model.fit(X, y, sample_weight=sample_weight)
+
+def cross_validate_models(models: list, X, y, cv, scoring, jobs: int = None, return_estimator: bool = False,
+                          sample_weight=None, fit_weight=None) -> list:
+    """
+    cross_validate de cada modelo con los mismos folds (con return_estimator, también los
+    modelos ajustados y los índices de cada fold).
+    - jobs=None: folds en serie (1 proceso para evitar problemas en Windows).
+    - jobs=N/-1: folds en procesos (loky). X e y se vuelcan una vez a memmaps de solo
+      lectura que comparten todos los workers, y cada worker limita sus hilos (n_jobs
+      del modelo y BLAS) según balance_jobs para no sobresuscribir la CPU.
+    - sample_weight: se enruta (metadata routing, `params=`) al fit de cada modelo y a
+      los scorers, de modo que las métricas son las de las filas originales.
+    - fit_weight: pesos solo para el fit (p. ej. de importancia tras submuestrear), un
+      array común o una lista con uno por modelo; los scorers siguen usando sample_weight (o 1).
+    """
+    kw = dict(scoring=scoring, cv=cv, return_train_score=False,
+              return_estimator=return_estimator, return_indices=return_estimator)
+    weighted = sample_weight is not None or fit_weight is not None
+    with config_context(enable_metadata_routing=weighted):
+        if weighted:
+            score_w = np.ones(len(y)) if sample_weight is None else np.asarray(sample_weight)
+            if fit_weight is None or not isinstance(fit_weight, (list, tuple)):
+                fit_weight = [fit_weight] * len(models)
+            fit_ws = [score_w if fw is None else np.asarray(fw) for fw in fit_weight]
+            models = [request_sample_weight(m, "fit_weight") for m in models]
+            kw["scoring"] = {k: get_scorer(v).set_score_request(sample_weight="score_weight") for k, v in scoring.items()}
+
+        def params(i):
+            return {"params": {"fit_weight": fit_ws[i], "score_weight": score_w}} if weighted else {}
+        out = []
+        if jobs is None:
+            for i, m in enumerate(models):
+                with PROFILER.stage(f"cv/{model_label(m)}", folds=cv.get_n_splits()):
+                    out.append(cross_validate(m, X, y, n_jobs=1, **kw, **params(i)))
+            return out
+        cv_jobs, inner = balance_jobs(jobs, cv.get_n_splits())
+        print(f"CV: {cv_jobs} folds en paralelo x {inner} hilos por modelo")
+        with parallel_config(backend="loky", max_nbytes="1M", mmap_mode="r", inner_max_num_threads=inner):
+            for i, m in enumerate(models):
+                if "n_jobs" in m.get_params():
+                    m = clone(m).set_params(n_jobs=inner)
+                with PROFILER.stage(f"cv/{model_label(m)}", folds=cv.get_n_splits(), cv_jobs=cv_jobs):
+                    out.append(cross_validate(m, X, y, n_jobs=cv_jobs, **kw, **params(i)))
+        return out
+
+def oof_predict(cv_result: dict, X) -> np.ndarray:
+    """Predicciones out-of-fold: cada fila la predice el modelo del fold que no la vio."""
+    preds = np.empty(len(X), dtype=np.int64)
+    for est, te_idx in zip(cv_result["estimator"], cv_result["indices"]["test"]):
+        preds[te_idx] = est.predict(X.iloc[te_idx])
+    return preds
+
+def save_models(models: dict, X: pd.DataFrame, meta: dict = None, out_dir: str = MODELS_DIR) -> str:
+    """
+    Guarda cada modelo ajustado como `<nombre>.joblib` junto con `schema.json`: columnas y
+    tipos de las features, opciones con las que se construyeron (`meta`, p. ej. bitboard
+    y dedup) y versiones de las librerías. Escritura atómica (carpeta temporal + rename).
+    """
+    tmp = out_dir + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for name, model in models.items():
+        joblib.dump(model, os.path.join(tmp, f"{name}.joblib"))
+    schema = {
+        "models": sorted(models),
+        "columns": [{"name": c, "dtype": X[c].dtype.str} for c in X.columns],
+        "sklearn": sklearn.__version__, "numpy": np.__version__, "saved": time.time(),
+        **(meta or {}),
+    }
+    with open(os.path.join(tmp, "schema.json"), "w", encoding="utf-8") as f:
+        json.dump(schema, f, ensure_ascii=False, indent=1)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp, out_dir)
+    return out_dir
+
+def nested_stratified_order(y, seed: int = RANDOM_STATE) -> np.ndarray:
+    """
+    Permutación de las filas tal que cada prefijo es un subconjunto estratificado: dentro de
+    cada clase las filas se barajan y se reparten uniformemente a lo largo del orden.
+    Los prefijos de distinto tamaño están anidados.
+    """
+    y = np.asarray(y)
+    rng = np.random.default_rng(seed)
+    key = np.empty(len(y))
+    for c in np.unique(y):
+        idx = rng.permutation(np.flatnonzero(y == c))
+        key[idx] = (np.arange(len(idx)) + rng.random()) / len(idx)
+    return np.argsort(key, kind="stable")
+
+def learning_curve(X: pd.DataFrame, y: pd.Series, fast: bool = False, sample_weight=None, model_params: dict = None,
+                   min_rows: int = 1000, tree_steps=(10, 20, 40, 80)) -> pd.DataFrame:
+    """
+    Curva de aprendizaje del Random Forest: Macro-F1 en un holdout fijo del 20% según filas
+    de entrenamiento (prefijos anidados de nested_stratified_order, duplicando desde
+    `min_rows` hasta todo el train) y árboles (`tree_steps` y el n_estimators del modelo).
+    Para cada tamaño el bosque crece con warm_start: cada punto solo ajusta los árboles
+    nuevos, así que la curva en árboles sale al precio de un único ajuste y, con tamaños
+    que se duplican, el total cuesta ~2 veces el ajuste más grande.
+    Guarda learning_curve.csv y learning_curve.png.
+    """
+    ensure_outputs()
+    rf = build_models(fast, model_params)[1].set_params(warm_start=True)
+    w = None if sample_weight is None else np.asarray(sample_weight)
+    strat = y if y.value_counts().min() >= 2 else None
+    idx_tr, idx_te = train_test_split(np.arange(len(y)), test_size=0.2, stratify=strat, random_state=RANDOM_STATE)
+    idx_tr = idx_tr[nested_stratified_order(y.iloc[idx_tr])]
+    X_te, y_te = X.iloc[idx_te], y.iloc[idx_te]
+    w_te = None if w is None else w[idx_te]
+
+    n_train = len(idx_tr)
+    sizes = sorted({n_train // 2**k for k in range(64) if n_train // 2**k >= min_rows} | {n_train})
+    trees = sorted({t for t in tree_steps if t < rf.n_estimators} | {rf.n_estimators})
+    rows = []
+    for n in sizes:
+        sub = idx_tr[:n]
+        model = clone(rf)
+        fit_time = 0.0
+        for t in trees:
+            model.set_params(n_estimators=t)
+            t0 = time.perf_counter()
+            model.fit(X.iloc[sub], y.iloc[sub], sample_weight=None if w is None else w[sub])
+            fit_time += time.perf_counter() - t0
+            preds = model.predict(X_te)
+            rows.append({"rows": n, "trees": t, "fit_seconds": fit_time,
+                         "accuracy": accuracy_score(y_te, preds, sample_weight=w_te),
+                         "f1_macro": f1_score(y_te, preds, average="macro", sample_weight=w_te)})
+        print(f"{n:>9} filas: f1_macro={rows[-1]['f1_macro']:.4f} con {trees[-1]} árboles ({fit_time:.1f}s)")
+    curve = pd.DataFrame(rows)
+    curve.to_csv(os.path.join(OUTPUTS_DIR, "learning_curve.csv"), index=False)
+
+    total = curve.groupby("rows")["fit_seconds"].max()
+    scratch = total.sum() * sum(trees) / trees[-1]  # reajustando cada punto desde cero (coste lineal en árboles)
+    print(f"Coste total de ajuste {total.sum():.1f}s = {total.sum() / total.iloc[-1]:.2f}x el ajuste más grande "
+          f"({len(curve)} puntos; ~{scratch:.0f}s reajustando cada punto desde cero)")
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(11, 4.5))
+    for t, c in curve.groupby("trees"):
+        ax1.plot(c["rows"], c["f1_macro"], marker="o", label=f"{t} árboles")
+    ax1.set_xscale("log")
+    ax1.set_xlabel("Filas de entrenamiento")
+    ax1.set_ylabel("Macro-F1 (holdout 20%)")
+    ax1.legend(fontsize=8)
+    for n, c in curve.groupby("rows"):
+        ax2.plot(c["trees"], c["f1_macro"], marker="o", label=f"{n} filas")
+    ax2.set_xlabel("Árboles")
+    ax2.set_ylabel("Macro-F1 (holdout 20%)")
+    ax2.legend(fontsize=8)
+    fig.suptitle("Curva de aprendizaje - Random Forest (warm_start)")
+    fig.tight_layout()
+    fig.savefig(os.path.join(OUTPUTS_DIR, "learning_curve.png"))
+    plt.close(fig)
+    return curve
+
+def balanced_weights(class_counts: np.ndarray, power: float = 1.0) -> np.ndarray:
+    """
+    Pesos "balanced" (n / (clases presentes * n_c)) a partir de conteos, elevados a `power`
+    (0.5 suaviza el desbalance); 0 para clases ausentes.
+    """
+    counts = np.asarray(class_counts, dtype=np.float64)
+    present = counts > 0
+    return np.where(present, counts.sum() / (present.sum() * np.maximum(counts, 1)), 0.0) ** power
+
+def train_incremental(make_chunks, holdout: np.ndarray, class_counts: np.ndarray, epochs: int = 3,
+                      bitboard: bool = False, out_dir: str = INCREMENTAL_MODELS_DIR) -> pd.DataFrame:
+    """
+    Entrenamiento out-of-core con partial_fit: `make_chunks()` devuelve en cada época un
+    iterador nuevo de bloques uint8 (n, 11) S1,R1,...,S5,R5,y; solo hay un bloque (y sus
+    features) en memoria a la vez. Modelos:
+    - sgd_logreg: StandardScaler (partial_fit en la primera época) + SGDClassifier(log_loss),
+      `epochs` pasadas con las filas de cada bloque barajadas.
+    - gaussian_nb: GaussianNB, una sola pasada (sus estadísticos suficientes son exactos).
+    Los pesos de clase se fijan al principio con `class_counts` (los conteos del train) y
+    llegan a cada partial_fit como sample_weight: "balanced" para GaussianNB y su raíz
+    cuadrada para SGD, donde pesos de ~10^4 en las clases más raras hacen diverger los
+    pasos. Tras cada época se evalúa en `holdout` (bloque (m, 11) que no se usa para entrenar).
+    Guarda incremental_results.csv, los reportes de clasificación y los modelos (save_models).
+    """
+    ensure_outputs()
+    cw_nb, cw_sgd = balanced_weights(class_counts), balanced_weights(class_counts, power=0.5)
+    classes = np.flatnonzero(np.asarray(class_counts) > 0)  # clases que aparecen en el train
+    rng = np.random.default_rng(RANDOM_STATE)
+    scaler = StandardScaler()
+    sgd = SGDClassifier(loss="log_loss", alpha=1e-4, learning_rate="adaptive", eta0=0.01, random_state=RANDOM_STATE)
+    gnb = GaussianNB()
+    X_hold = feature_frame(pd.DataFrame(holdout[:, :10], columns=CARD_COLS), bitboard)
+    y_hold = holdout[:, 10].astype(int)
+
+    rows, t0 = [], time.perf_counter()
+    for epoch in range(1, epochs + 1):
+        n_rows = 0
+        for block in make_chunks():
+            block = block[rng.permutation(len(block))]
+            X = feature_frame(pd.DataFrame(block[:, :10], columns=CARD_COLS), bitboard)
+            y = block[:, 10]
+            if epoch == 1:
+                scaler.partial_fit(X)
+                gnb.partial_fit(X, y, classes=classes, sample_weight=cw_nb[y])
+            sgd.partial_fit(scaler.transform(X), y, classes=classes, sample_weight=cw_sgd[y])
+            n_rows += len(block)
+        elapsed = time.perf_counter() - t0
+        for name, preds in [("sgd_logreg", sgd.predict(scaler.transform(X_hold))), ("gaussian_nb", gnb.predict(X_hold))]:
+            rows.append({"epoch": epoch, "model": name, "train_rows": n_rows, "seconds": elapsed,
+                         "accuracy": accuracy_score(y_hold, preds), "f1_macro": f1_score(y_hold, preds, average="macro")})
+        print(f"Época {epoch}: {n_rows} filas, {elapsed:.1f}s - " +
+              ", ".join(f"{r['model']} f1_macro={r['f1_macro']:.4f}" for r in rows[-2:]))
+
+    results = pd.DataFrame(rows)
+    results.to_csv(os.path.join(OUTPUTS_DIR, "incremental_results.csv"), index=False)
+    models = {"sgd_logreg": Pipeline([("scaler", scaler), ("clf", sgd)]), "gaussian_nb": gnb}
+    for name, model in models.items():
+        preds = model.predict(X_hold)
+        with open(os.path.join(OUTPUTS_DIR, f"classification_report_incremental_{name}.txt"), "w", encoding="utf-8") as f:
+            f.write(classification_report(y_hold, preds, digits=4, zero_division=0))
+            f.write(f"\nAccuracy: {accuracy_score(y_hold, preds):.4f}  Macro-F1: {f1_score(y_hold, preds, average='macro'):.4f}\n")
+    save_models(models, X_hold, {"bitboard": bitboard, "dedup": False, "trained_on": "incremental (partial_fit)",
+                                 "epochs": epochs, "holdout_rows": len(y_hold),
+                                 "metrics": {r["model"]: {"accuracy": r["accuracy"], "f1_macro": r["f1_macro"]}
+                                             for r in rows[-2:]}}, out_dir)
+    return results
+
+def top_importances(model, X_eval: pd.DataFrame, y_eval, sample_weight=None, max_rows: int = 4_000,
+                    seed: int = RANDOM_STATE) -> Tuple[np.ndarray, str]:
+    """
+    Importancias de variables de un modelo ajustado y cómo se obtuvieron: las de impureza
+    si el modelo las tiene (RF), si no importancia por permutación (caída de Macro-F1, 3
+    repeticiones). Cada repetición predice todas las filas una vez por feature, así que se
+    usan como mucho `max_rows` filas de evaluación repartidas a partes iguales entre clases
+    (todas las de las clases raras), para que el Macro-F1 siga viéndolas.
+    """
+    if hasattr(model, "feature_importances_"):
+        return model.feature_importances_, "impureza"
+    rng = np.random.RandomState(seed)
+    y_arr = np.asarray(y_eval)
+    classes = np.unique(y_arr)
+    per_class = max(1, max_rows // len(classes))
+    idx = np.sort(np.concatenate([rng.permutation(np.flatnonzero(y_arr == c))[:per_class] for c in classes]))
+    w = None if sample_weight is None else np.asarray(sample_weight)[idx]
+    res = permutation_importance(model, X_eval.iloc[idx], y_arr[idx], scoring="f1_macro",
+                                 n_repeats=3, random_state=seed, sample_weight=w)
+    return res.importances_mean, "permutación"
+
+def evaluate_models(X: pd.DataFrame, y: pd.Series, cv_splits: int = 5, fast: bool = False,
+                    jobs: int = None, oof: bool = False, sample_weight=None, majority_frac: float = None,
+                    model_meta: dict = None, model_params: dict = None, models=DEFAULT_MODELS) -> pd.DataFrame:
+    """
+    Evalúa modelos (`models`: logreg, randomforest y/o hgb; por defecto los dos primeros):
+    - Cross-validation estratificada (folds en paralelo con `jobs`, ver balance_jobs)
+    - Techo de referencia: evaluador exacto por reglas (poker_eval) en los mismos folds
+    - Reportes de clasificación
+    - Matrices de confusión
+    - Importancias de variables de los modelos de árboles (RF: impureza; HGB: permutación)
+    - Coste: segundos de ajuste y CPU de la CV de cada modelo y métricas por segundo de CPU
+      (model_costs.csv)
+    Por defecto los reportes salen de un holdout del 20% (reentrenando los modelos).
+    Con oof=True salen de las predicciones out-of-fold de la propia CV y las importancias
+    del RF se promedian entre folds: cada modelo se entrena exactamente una vez por fold.
+    Con sample_weight (manos deduplicadas, ver dedupe_cards) los modelos se entrenan con
+    esos pesos y todas las métricas, reportes y matrices se ponderan por ellos.
+    Con majority_frac solo se entrena con esa fracción de las clases mayoritarias (ver
+    majority_subsample) y pesos de importancia; test, métricas y reportes usan siempre
+    la distribución completa.
+    Los modelos finales (holdout: ajustados con el 80%; oof: los del primer fold) se guardan
+    en MODELS_DIR con save_models, añadiendo `model_meta` al esquema.
+    `model_params` (p. ej. de tune_models) sustituye la configuración por defecto.
+    """
+    ensure_outputs()
+    names = list(models)
+    estimators = dict(zip(names, build_models(fast, model_params, names)))
 
     folds = 3 if fast else cv_splits
     skf = StratifiedKFold(n_splits=folds, shuffle=True, random_state=RANDOM_STATE)
     scoring = {"accuracy": "accuracy", "f1_macro": "f1_macro"}
 
-    # Cross-validation (1 proceso para evitar problemas en Windows)
-    cv_logreg = cross_validate(logreg, X, y, scoring=scoring, cv=skf, return_train_score=False, n_jobs=1)
-    cv_rf     = cross_validate(rf,    X, y, scoring=scoring, cv=skf, return_train_score=False, n_jobs=1)
+    w = None if sample_weight is None else np.asarray(sample_weight)
+    keep, fit_w, cv = None, None, skf
+    fit_ws = {}  # pesos de fit propios de un modelo (si no, fit_w)
+    if majority_frac is not None:
+        keep, fit_w = majority_subsample(y, majority_frac, w)
+        cv = SubsampledCV(skf, keep)
+        # "balanced" cuenta filas, no pesos (según versión de scikit-learn): se fija a mano con
+        # la distribución completa para que los pesos de importancia no corrijan dos veces
+        y_arr = np.asarray(y, dtype=np.int64)
+        classes = np.unique(y_arr)
+        counts = np.bincount(y_arr, weights=w)[classes]
+        balanced = dict(zip(classes.tolist(), counts.sum() / (len(classes) * counts)))
+        if "logreg" in estimators:
+            estimators["logreg"].set_params(clf__class_weight=balanced)
+        if "randomforest" in estimators:
+            estimators["randomforest"].set_params(class_weight=balanced)
+        if "hgb" in estimators:
+            # HGB busca el dict con las etiquetas ya recodificadas a 0..k-1 (falla si falta una
+            # clase intermedia en el fold): el factor "balanced" va en los pesos de fit
+            estimators["hgb"].set_params(class_weight=None)
+            fit_ws["hgb"] = fit_w * np.asarray(pd.Series(y_arr).map(balanced), dtype=np.float64)
+        print(f"Submuestreo de mayoritarias: se entrena con {keep.sum()} de {len(keep)} filas")
+    cv_out = dict(zip(names, cross_validate_models([estimators[n] for n in names], X, y, cv, scoring, jobs=jobs,
+                                                   return_estimator=oof, sample_weight=w,
+                                                   fit_weight=fit_w if fit_w is None else
+                                                   [fit_ws.get(n, fit_w) for n in names])))
+    if jobs is not None and "randomforest" in estimators:
+        estimators["randomforest"].set_params(n_jobs=-1 if jobs == -1 else jobs)
+
+    # Techo: el evaluador exacto no se entrena, solo se aplica a cada fold de test
+    ev_acc, ev_f1 = [], []
+    with PROFILER.stage("cv/exact_evaluator", folds=folds):
+        for _, te_idx in skf.split(X, y):
+            preds = classify_cards(X.iloc[te_idx])
+            w_fold = None if w is None else w[te_idx]
+            ev_acc.append(accuracy_score(y.iloc[te_idx], preds, sample_weight=w_fold))
+            ev_f1.append(f1_score(y.iloc[te_idx], preds, average="macro", sample_weight=w_fold))
 
     # Consolidar resultados
+    labels = [MODEL_LABELS[n] for n in names] + ["ExactEvaluator"]
     results = pd.DataFrame({
-        "model": ["LogisticRegression"] * folds + ["RandomForest"] * folds,
-        "fold": list(range(1, folds+1)) * 2,
-        "accuracy": np.concatenate([cv_logreg["test_accuracy"], cv_rf["test_accuracy"]]),
-        "f1_macro": np.concatenate([cv_logreg["test_f1_macro"], cv_rf["test_f1_macro"]]),
+        "model": [label for label in labels for _ in range(folds)],
+        "fold": list(range(1, folds+1)) * len(labels),
+        "accuracy": np.concatenate([cv_out[n]["test_accuracy"] for n in names] + [ev_acc]),
+        "f1_macro": np.concatenate([cv_out[n]["test_f1_macro"] for n in names] + [ev_f1]),
     })
 
-    # Holdout del 20% para evaluación final
-    X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.2, stratify=y, random_state=RANDOM_STATE)
-    logreg.fit(X_tr, y_tr)
-    rf.fit(X_tr, y_tr)
+    if oof:
+        # Reportes sobre predicciones out-of-fold (todas las filas), sin reentrenar
+        eval_name = "Out-of-fold (CV)"
+        X_te, y_te, w_te = X, y, w
+        preds = {n: oof_predict(cv_out[n], X) for n in names}
+        final = {n: cv_out[n]["estimator"][0] for n in names}
+        trained_on = f"fold 1 de {folds} (CV)"
+        # Importancias por permutación del modelo del fold 1 sobre su propio fold de test
+        te1 = cv_out[names[0]]["indices"]["test"][0]
+        imp_eval = (X.iloc[te1], y.iloc[te1], None if w is None else w[te1])
+    else:
+        # Holdout del 20% para evaluación final
+        eval_name = "Holdout (20%)"
+        if w is None and keep is None:
+            X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.2, stratify=y, random_state=RANDOM_STATE)
+            w_tr = w_te = None
+        else:
+            # Deduplicado, una clase puede quedar en una sola fila (p. ej. escalera real): sin estratificar
+            strat = y if y.value_counts().min() >= 2 else None
+            idx_tr, idx_te = train_test_split(np.arange(len(y)), test_size=0.2, stratify=strat, random_state=RANDOM_STATE)
+            w_te = None if w is None else w[idx_te]
+            if keep is not None:
+                idx_tr = idx_tr[keep[idx_tr]]
+            w_tr = (fit_w if fit_w is not None else w)[idx_tr]
+            X_tr, y_tr, X_te, y_te = X.iloc[idx_tr], y.iloc[idx_tr], X.iloc[idx_te], y.iloc[idx_te]
+        for n in names:
+            with PROFILER.stage(f"fit/{n}", rows=len(y_tr)):
+                fit_model(estimators[n], X_tr, y_tr, fit_ws[n][idx_tr] if n in fit_ws else w_tr)
 
-    preds_lr = logreg.predict(X_te)
-    preds_rf = rf.predict(X_te)
+        with PROFILER.stage("predict", rows=len(y_te)):
+            preds = {n: estimators[n].predict(X_te) for n in names}
+        final = dict(estimators)
+        trained_on = "holdout (80%)"
+        imp_eval = (X_te, y_te, w_te)
 
-    acc_lr = accuracy_score(y_te, preds_lr)
-    f1_lr  = f1_score(y_te, preds_lr, average="macro")
-    acc_rf = accuracy_score(y_te, preds_rf)
-    f1_rf  = f1_score(y_te, preds_rf, average="macro")
+    metrics = {n: {"accuracy": accuracy_score(y_te, preds[n], sample_weight=w_te),
+                   "f1_macro": f1_score(y_te, preds[n], average="macro", sample_weight=w_te)} for n in names}
+    preds_ev = classify_cards(X_te)
+    acc_ev = accuracy_score(y_te, preds_ev, sample_weight=w_te)
+    f1_ev  = f1_score(y_te, preds_ev, average="macro", sample_weight=w_te)
 
     # Guardar reportes
-    with open(os.path.join(OUTPUTS_DIR, "classification_report_logreg.txt"), "w", encoding="utf-8") as f:
-        f.write(classification_report(y_te, preds_lr, digits=4))
-        f.write(f"\nAccuracy: {acc_lr:.4f}  Macro-F1: {f1_lr:.4f}\n")
-
-    with open(os.path.join(OUTPUTS_DIR, "classification_report_randomforest.txt"), "w", encoding="utf-8") as f:
-        f.write(classification_report(y_te, preds_rf, digits=4))
-        f.write(f"\nAccuracy: {acc_rf:.4f}  Macro-F1: {f1_rf:.4f}\n")
-
-    # Matrices de confusión
-    for name, preds in [("logreg", preds_lr), ("randomforest", preds_rf)]:
-        cm = confusion_matrix(y_te, preds, labels=sorted(y.unique()))
-        disp = ConfusionMatrixDisplay(confusion_matrix=cm, display_labels=sorted(y.unique()))
-        fig, ax = plt.subplots()
-        disp.plot(ax=ax, xticks_rotation=45, colorbar=False)
-        ax.set_title(f"Matriz de confusión - {name}")
-        fig.tight_layout()
-        fig.savefig(os.path.join(OUTPUTS_DIR, f"confusion_{name}.png"))
-        plt.close(fig)
-
-    # Importancias de variables (RF)
-    importances = pd.Series(rf.feature_importances_, index=X.columns).sort_values(ascending=False)
-    topk = importances.head(20)
-    plt.figure()
-    topk[::-1].plot(kind="barh")
-    plt.title("Top 20 Importancias - Random Forest")
-    plt.tight_layout()
-    plt.savefig(os.path.join(OUTPUTS_DIR, "feature_importance_rf_top20.png"))
-    plt.close()
+    for n in names:
+        with open(os.path.join(OUTPUTS_DIR, f"classification_report_{n}.txt"), "w", encoding="utf-8") as f:
+            f.write(classification_report(y_te, preds[n], digits=4, sample_weight=w_te))
+            f.write(f"\nAccuracy: {metrics[n]['accuracy']:.4f}  Macro-F1: {metrics[n]['f1_macro']:.4f}\n")
+
+    with PROFILER.stage("plots"):
+        # Matrices de confusión
+        for name in names:
+            cm = confusion_matrix(y_te, preds[name], labels=sorted(y.unique()), sample_weight=w_te).astype(np.int64)
+            disp = ConfusionMatrixDisplay(confusion_matrix=cm, display_labels=sorted(y.unique()))
+            fig, ax = plt.subplots()
+            disp.plot(ax=ax, xticks_rotation=45, colorbar=False)
+            ax.set_title(f"Matriz de confusión - {name}")
+            fig.tight_layout()
+            fig.savefig(os.path.join(OUTPUTS_DIR, f"confusion_{name}.png"))
+            plt.close(fig)
+
+        # Importancias de variables (modelos de árboles)
+        for name, short in (("randomforest", "rf"), ("hgb", "hgb")):
+            if name not in names:
+                continue
+            with PROFILER.stage(f"importances/{name}"):
+                if oof and name == "randomforest":
+                    values, how = np.mean([est.feature_importances_ for est in cv_out[name]["estimator"]], axis=0), "media de folds"
+                else:
+                    values, how = top_importances(final[name], *imp_eval)
+            importances = pd.Series(values, index=X.columns).sort_values(ascending=False)
+            topk = importances.head(20)
+            plt.figure()
+            topk[::-1].plot(kind="barh")
+            plt.title(f"Top 20 Importancias - {MODEL_LABELS[name]} ({how})")
+            plt.tight_layout()
+            plt.savefig(os.path.join(OUTPUTS_DIR, f"feature_importance_{short}_top20.png"))
+            plt.close()
 
     # Guardar métricas de CV
     results.to_csv(os.path.join(OUTPUTS_DIR, "cv_results.csv"), index=False)
     summary = results.groupby("model")[["accuracy","f1_macro"]].agg(["mean","std"])
     summary.to_csv(os.path.join(OUTPUTS_DIR, "cv_summary.csv"))
+    costs = model_costs(cv_out, jobs)
+    costs.to_csv(os.path.join(OUTPUTS_DIR, "model_costs.csv"), index=False)
+
+    with PROFILER.stage("save_models"):
+        save_models(final, X, {**(model_meta or {}), "trained_on": trained_on, "eval": eval_name, "metrics": metrics,
+                               "majority_frac": majority_frac})
 
     print("Resumen CV:")
     print(summary)
-    print("\nHoldout (20%)\n - LogReg:  acc={:.4f}, f1_macro={:.4f}\n - RF:      acc={:.4f}, f1_macro={:.4f}".format(acc_lr, f1_lr, acc_rf, f1_rf))
+    print("\nCoste de la CV (todos los folds):")
+    print(costs.to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+    print(f"\n{eval_name}")
+    short_names = {"logreg": "LogReg", "randomforest": "RF", "hgb": "HGB"}
+    for n in names:
+        print(f" - {short_names[n] + ':':<9}acc={metrics[n]['accuracy']:.4f}, f1_macro={metrics[n]['f1_macro']:.4f}")
+    print(" - Exacto:  acc={:.4f}, f1_macro={:.4f}  (techo por reglas)".format(acc_ev, f1_ev))
     return results
 
+def model_costs(cv_out: dict, jobs: int = None) -> pd.DataFrame:
+    """
+    Coste y calidad de la CV de cada modelo: segundos de ajuste y de predicción sumados
+    sobre los folds, segundos de CPU de la etapa (StageProfiler; con `jobs` los folds van
+    en workers cuyo CPU no se mide y se usan los segundos de ajuste + predicción) y
+    accuracy / Macro-F1 medios por segundo de CPU.
+    """
+    rows = []
+    for name, res in cv_out.items():
+        fit_s, score_s = float(np.sum(res["fit_time"])), float(np.sum(res["score_time"]))
+        stage = PROFILER.last(f"cv/{name}")
+        cpu_s = stage["cpu_s"] if jobs is None and stage is not None else fit_s + score_s
+        acc, f1 = float(np.mean(res["test_accuracy"])), float(np.mean(res["test_f1_macro"]))
+        rows.append({"model": name, "fit_s": fit_s, "score_s": score_s, "cpu_s": cpu_s, "accuracy": acc,
+                     "f1_macro": f1, "accuracy_per_cpu_s": acc / cpu_s, "f1_macro_per_cpu_s": f1 / cpu_s})
+    return pd.DataFrame(rows)
+
 def main():
     """Punto de entrada principal: orquesta carga, EDA, features, modelos y evaluación."""
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument("--sample", type=int, default=100000, help="Tamaño de muestra máximo a usar. Usa -1 para todo.")
     parser.add_argument("--fast", action="store_true", help="Modo rápido: CV con 3 folds y RF más ligero.")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Carpeta con los .data de UCI y la caché binaria (por defecto: data/).")
+    parser.add_argument("--offline", action="store_true", help="No descargar nunca; falla si no hay caché ni ficheros locales.")
+    parser.add_argument("--verify-data", action="store_true", help="Recalcula el SHA-256 de la caché y valida rangos antes de usarla.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Features por bloques a outputs/features/ (un .npy por columna) en vez del CSV; el entrenamiento lo lee con memory mapping.")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Filas por bloque en modo --stream.")
+    parser.add_argument("--bitboard", action="store_true",
+                        help="Añade features de bitboard: máscaras de rango/suit, popcounts, escalera por bits y one-hot de las 52 cartas.")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Canonicaliza manos (orden y suits) y entrena con filas únicas ponderadas por su número de apariciones.")
+    parser.add_argument("--majority-frac", type=float, default=None,
+                        help="Entrena con esta fracción de las clases mayoritarias (0 y 1) y pesos de importancia; "
+                             "las métricas se calculan sobre la distribución completa.")
+    parser.add_argument("--oof", action="store_true",
+                        help="Reportes, matrices de confusión e importancias a partir de la CV (out-of-fold) sin reentrenar en un holdout.")
+    parser.add_argument("--tune", action="store_true",
+                        help="Busca hiperparámetros por successive halving (filas crecientes) y evalúa la mejor configuración.")
+    parser.add_argument("--learning-curve", action="store_true",
+                        help="Solo la curva de aprendizaje del RF (filas x árboles, con warm_start) en vez de la evaluación completa.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Entrenamiento out-of-core con partial_fit (SGD log_loss y GaussianNB) por bloques de --chunk-rows; "
+                             "el primer bloque se reserva para evaluar.")
+    parser.add_argument("--epochs", type=int, default=3, help="Pasadas sobre los datos en --incremental.")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="Usa N manos sintéticas de poker_synth.py (cacheadas en data/cache/) en vez de los splits de UCI.")
+    parser.add_argument("--synthetic-stratify", choices=STRATIFY, default="none",
+                        help="Distribución de clases de --synthetic: none (natural), sqrt o uniform (sobremuestrea las raras).")
+    parser.add_argument("--models", nargs="+", choices=list(MODEL_LABELS), default=list(DEFAULT_MODELS),
+                        help="Modelos a evaluar y guardar: logreg, randomforest y/o hgb (HistGradientBoosting).")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Núcleos para la CV (-1 = todos): folds en paralelo con datos compartidos por memmap. "
+                             "Sin indicar: folds en serie como antes.")
     args = parser.parse_args()
 
     ensure_outputs()
+    PROFILER.reset()
+    try:
+        run_pipeline(args)
+    finally:
+        report = PROFILER.write(PROFILE_PATH, args=vars(args))
+        print(f"Perfil de etapas en {PROFILE_PATH} ({report['total_wall_s']:.1f}s):")
+        for r in report["stages"]:
+            if r["depth"] == 0:
+                rss = f"{r['peak_rss_mb']:.0f} MB" if r["peak_rss_mb"] else "-"
+                print(f"  {r['stage']:<22}{r['wall_s']:>8.2f}s pared {r['cpu_s']:>8.2f}s CPU  pico {rss}")
 
+def run_pipeline(args):
+    """Ejecuta el pipeline de main() con las opciones ya parseadas; cada etapa queda medida en PROFILER."""
     sample_n = None if args.sample == -1 else args.sample
-    print("Cargando datos...")
-    X_raw, y = load_poker_data(sample_n=sample_n)
-    print(f"Dataset shape (raw): {X_raw.shape}, y: {y.shape}")
+    splits, download = UCI_SPLITS, not args.offline
+    if args.synthetic:
+        with PROFILER.stage("synthetic", rows=args.synthetic):
+            splits = (str(ensure_synthetic(args.synthetic, args.data_dir, RANDOM_STATE, args.synthetic_stratify)),)
+        print(f"Datos sintéticos: {args.synthetic} manos ({args.synthetic_stratify}) desde {splits[0]}")
+    if args.incremental:
+        # Solo hay en memoria un bloque a la vez: nunca se materializa el dataset ni sus features
+        rows = sample_rows(split_rows(splits, args.data_dir, download=download, verify=args.verify_data), sample_n)
+        def blocks():
+            return iter_card_chunks(splits, args.data_dir, args.chunk_rows, rows=rows, download=download)
+        holdout, counts = None, np.zeros(N_CLASSES, dtype=np.int64)
+        with PROFILER.stage("load"):
+            for start, block in blocks():
+                if start == 0:
+                    holdout = block
+                else:
+                    counts += np.bincount(block[:, 10], minlength=N_CLASSES)
+        if not counts.sum():
+            raise ValueError(f"--incremental necesita más de un bloque de {args.chunk_rows} filas (reduce --chunk-rows)")
+        print(f"Entrenamiento incremental: {counts.sum()} filas en bloques de {args.chunk_rows}, "
+              f"{len(holdout)} reservadas para evaluar")
+        with PROFILER.stage("incremental", rows=int(counts.sum()), epochs=args.epochs):
+            train_incremental(lambda: (b for start, b in blocks() if start > 0), holdout, counts,
+                              epochs=args.epochs, bitboard=args.bitboard)
+        print(f"Listo. Resultados en outputs/incremental_results.csv y modelos en {INCREMENTAL_MODELS_DIR}/.")
+        return
+
+    if args.stream:
+        print(f"Ingeniería de características por bloques de {args.chunk_rows} filas...")
+        with PROFILER.stage("stream_features"):
+            stream_features(sample_n=sample_n, data_dir=args.data_dir, download=download,
+                            verify=args.verify_data, chunk_rows=args.chunk_rows, bitboard=args.bitboard,
+                            dedup=args.dedup, splits=splits)
+        with PROFILER.stage("load"):
+            X_all, y, weights = load_features()
+        print(f"Dataset shape (features, mmap): {X_all.shape}, y: {y.shape}")
+        if weights is not None:
+            print(f"Deduplicado: {X_all.shape[0]} manos canónicas que representan {int(weights.sum())} filas")
+
+        print("Generando EDA...")
+        with PROFILER.stage("eda"):
+            eda_plots(X_all[COLNAMES[:-1]], y, sample_weight=weights, counts=load_eda_counts(), jobs=args.jobs)
+    else:
+        print("Cargando datos...")
+        with PROFILER.stage("load") as st:
+            X_raw, y = load_poker_data(sample_n=sample_n, data_dir=args.data_dir, download=download,
+                                       verify=args.verify_data, splits=splits)
+            st["rows"] = len(y)
+        print(f"Dataset shape (raw): {X_raw.shape}, y: {y.shape}")
+
+        print("Generando EDA...")
+        with PROFILER.stage("eda"):
+            eda_plots(X_raw, y, jobs=args.jobs)
+
+        weights = None
+        if args.dedup:
+            with PROFILER.stage("dedup"):
+                cards, weights = dedupe_cards([np.column_stack([X_raw[CARD_COLS].to_numpy(), y.to_numpy()])])
+            X_raw = pd.DataFrame(cards[:, :10], columns=CARD_COLS)
+            y = pd.Series(cards[:, 10].astype(int), name="y")
+            print(f"Deduplicado: {len(y)} manos canónicas que representan {int(weights.sum())} filas")
+
+        print("Ingeniería de características...")
+        with PROFILER.stage("features", rows=len(y)):
+            X_all = feature_frame(X_raw, bitboard=args.bitboard)
+        with PROFILER.stage("export_csv", rows=len(y)):
+            out = X_all if weights is None else X_all.assign(sample_weight=weights)
+            out.to_csv(os.path.join(OUTPUTS_DIR, "dataset_with_features.csv"), index=False)
 
-    print("Generando EDA...")
-    eda_plots(X_raw, y)
+    params = None
+    if args.tune:
+        print("Buscando hiperparámetros (successive halving)...")
+        with PROFILER.stage("tune"):
+            params = tune_models(X_all, y, fast=args.fast, jobs=args.jobs, sample_weight=weights)
 
-    print("Ingeniería de características...")
-    X_feat = make_hand_features(X_raw)
-    X_all = pd.concat([X_raw, X_feat], axis=1)
-    X_all.to_csv(os.path.join(OUTPUTS_DIR, "dataset_with_features.csv"), index=False)
+    if args.learning_curve:
+        print("Curva de aprendizaje (Random Forest con warm_start)...")
+        with PROFILER.stage("learning_curve"):
+            learning_curve(X_all, y, fast=args.fast, sample_weight=weights, model_params=params)
+        print("Listo. Curva en outputs/learning_curve.csv y outputs/learning_curve.png.")
+        return
 
     print("Evaluando modelos...")
-    _ = evaluate_models(X_all, y, cv_splits=5, fast=args.fast)
+    with PROFILER.stage("evaluate", rows=len(y)):
+        evaluate_models(X_all, y, cv_splits=5, fast=args.fast, jobs=args.jobs, oof=args.oof, sample_weight=weights,
+                        majority_frac=args.majority_frac, model_meta={"bitboard": args.bitboard, "dedup": args.dedup},
+                        model_params=params, models=args.models)
 
     print("Listo. Resultados en la carpeta 'outputs/' para gráficos y métricas.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,210 @@
+"""
+Capa de datos local para el dataset Poker Hand (UCI).
+
+Cada split (train/test) se busca primero en la caché binaria de `data_dir`, luego
+como fichero `.data` original dentro de `data_dir` y, solo si se permite, se descarga
+de UCI. El texto se convierte una única vez a una matriz `uint8` de forma (n, 11)
+(`S1,R1,...,S5,R5,y`) guardada como `.npy`; las siguientes cargas la abren con
+`mmap_mode="r"` en milisegundos.
+
+`data_dir/cache/manifest.json` registra, por split, el SHA-256 y tamaño del fichero
+original y del `.npy`, junto con el número de filas. Como no hay checksums oficiales
+publicados, el primer fichero convertido fija la referencia: si el `.data` cambia se
+reconvierte, y un `.npy` truncado o que no coincide con el manifest se rechaza.
+Al convertir (y con `verify`) cada etiqueta se contrasta con el evaluador exacto.
+Cualquier split que no pueda obtenerse produce un `PokerDataError` explícito.
+"""
+import hashlib, json, os, shutil, time, urllib.request
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from poker_eval import label_mismatches
+
+DATA_DIR = "data"
+CACHE_SUBDIR = "cache"
+MANIFEST = "manifest.json"
+CACHE_VERSION = 1
+
+COLNAMES = ["S1","R1","S2","R2","S3","R3","S4","R4","S5","R5","y"]
+BASE_URL = "https://archive.ics.uci.edu/ml/machine-learning-databases/poker/"
+
+# split -> (fichero original, filas esperadas)
+SPLITS = {
+    "train": ("poker-hand-training-true.data", 25_010),
+    "test":  ("poker-hand-testing.data", 1_000_000),
+}
+
+class PokerDataError(RuntimeError):
+    """No se pudo obtener o validar un split del dataset."""
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _stat_key(path: Path) -> list:
+    st = path.stat()
+    return [st.st_size, st.st_mtime_ns]
+
+def read_manifest(data_dir=DATA_DIR) -> dict:
+    p = Path(data_dir) / CACHE_SUBDIR / MANIFEST
+    if not p.exists():
+        return {"version": CACHE_VERSION, "splits": {}}
+    with open(p, encoding="utf-8") as f:
+        return json.load(f)
+
+def _write_manifest(data_dir, manifest: dict):
+    cache = Path(data_dir) / CACHE_SUBDIR
+    tmp = cache / (MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, cache / MANIFEST)
+
+def validate_cards(arr: np.ndarray, split: str, expected_rows: int = None):
+    """
+    Comprueba forma, rangos de valores (S 1..4, R 1..13, y 0..9), número de filas y
+    que cada etiqueta coincida con el evaluador exacto (poker_eval).
+    """
+    if arr.ndim != 2 or arr.shape[1] != len(COLNAMES):
+        raise PokerDataError(f"{split}: se esperaban {len(COLNAMES)} columnas, forma {arr.shape}")
+    if expected_rows is not None and arr.shape[0] != expected_rows:
+        raise PokerDataError(f"{split}: {arr.shape[0]} filas, se esperaban {expected_rows} (¿fichero truncado?)")
+    suits, ranks, y = arr[:, 0:10:2], arr[:, 1:10:2], arr[:, 10]
+    if suits.min() < 1 or suits.max() > 4 or ranks.min() < 1 or ranks.max() > 13 or y.min() < 0 or y.max() > 9:
+        raise PokerDataError(f"{split}: valores fuera de rango (S 1..4, R 1..13, y 0..9)")
+    bad = label_mismatches(arr)
+    if len(bad):
+        raise PokerDataError(f"{split}: {len(bad)} etiquetas no coinciden con el evaluador (primeras filas: {bad[:5].tolist()})")
+
+def parse_raw(path: Path, expected_rows: int = None) -> np.ndarray:
+    """Lee y valida un fichero `.data` de UCI como matriz uint8 (n, 11)."""
+    arr = pd.read_csv(path, header=None, names=COLNAMES, dtype=np.int16).to_numpy()
+    validate_cards(arr, path.name, expected_rows)
+    return arr.astype(np.uint8)
+
+def download_raw(split: str, data_dir=DATA_DIR, timeout: float = 60.0) -> Path:
+    """Descarga el fichero original de UCI a `data_dir` (escritura atómica)."""
+    fname = SPLITS[split][0]
+    dest = Path(data_dir) / fname
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(dest.name + ".part")
+    try:
+        with urllib.request.urlopen(BASE_URL + fname, timeout=timeout) as r, open(tmp, "wb") as f:
+            shutil.copyfileobj(r, f)
+    except OSError as e:
+        tmp.unlink(missing_ok=True)
+        raise PokerDataError(f"No se pudo descargar {BASE_URL + fname}: {e}") from e
+    os.replace(tmp, dest)
+    return dest
+
+def _convert(split: str, raw: Path, data_dir, manifest: dict) -> np.ndarray:
+    fname, expected = SPLITS[split]
+    arr = parse_raw(raw, expected)
+    cache = Path(data_dir) / CACHE_SUBDIR
+    cache.mkdir(parents=True, exist_ok=True)
+    npy = cache / f"{split}.npy"
+    tmp = cache / f"{split}.npy.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, arr)
+    os.replace(tmp, npy)
+    manifest["splits"][split] = {
+        "source": fname, "source_sha256": _sha256(raw), "source_stat": _stat_key(raw),
+        "npy": npy.name, "npy_sha256": _sha256(npy), "npy_bytes": npy.stat().st_size,
+        "rows": int(arr.shape[0]), "converted": time.time(),
+    }
+    _write_manifest(data_dir, manifest)
+    return np.load(npy, mmap_mode="r")
+
+def load_split(split: str, data_dir=DATA_DIR, download: bool = True, verify: bool = False) -> np.ndarray:
+    """
+    Devuelve el split como matriz uint8 (n, 11) de solo lectura (memory-mapped).
+    `split` también puede ser la ruta de un `.npy` uint8 (n, 11) ya en el formato de la
+    caché (p. ej. las manos de poker_synth.py), que se abre tal cual.
+    - download: permite descargar de UCI si no hay caché ni fichero local.
+    - verify: recalcula el SHA-256 del `.npy` y lo compara con el manifest (en un `.npy`
+      externo: valida rangos y etiquetas).
+    """
+    if split not in SPLITS and str(split).endswith(".npy"):
+        if not Path(split).exists():
+            raise PokerDataError(f"No existe {split}")
+        arr = np.load(split, mmap_mode="r")
+        if arr.dtype != np.uint8 or arr.ndim != 2 or arr.shape[1] != len(COLNAMES):
+            raise PokerDataError(f"{split}: se esperaba una matriz uint8 (n, {len(COLNAMES)}), {arr.dtype} {arr.shape}")
+        if verify:
+            validate_cards(arr, str(split))
+        return arr
+    if split not in SPLITS:
+        raise ValueError(f"Split desconocido: {split!r} (opciones: {', '.join(SPLITS)})")
+    data_dir = Path(data_dir)
+    fname, expected = SPLITS[split]
+    raw = data_dir / fname
+    manifest = read_manifest(data_dir)
+    entry = manifest["splits"].get(split)
+    npy = data_dir / CACHE_SUBDIR / f"{split}.npy"
+
+    if entry and npy.exists():
+        # El original cambió desde la conversión: reconvertir si el contenido es distinto
+        if raw.exists() and _stat_key(raw) != entry["source_stat"]:
+            if _sha256(raw) != entry["source_sha256"]:
+                return _convert(split, raw, data_dir, manifest)
+            entry["source_stat"] = _stat_key(raw)
+            _write_manifest(data_dir, manifest)
+        if npy.stat().st_size != entry["npy_bytes"] or (verify and _sha256(npy) != entry["npy_sha256"]):
+            if not raw.exists():
+                raise PokerDataError(f"{npy} no coincide con el manifest y no hay {raw} para regenerarlo")
+            return _convert(split, raw, data_dir, manifest)
+        arr = np.load(npy, mmap_mode="r")
+        if verify:
+            validate_cards(arr, split, expected)
+        return arr
+
+    if not raw.exists():
+        if not download:
+            raise PokerDataError(
+                f"Falta el split '{split}': no hay caché en {npy} ni fichero {raw}. "
+                f"Copia {fname} a {data_dir}/ o permite la descarga desde {BASE_URL}"
+            )
+        raw = download_raw(split, data_dir)
+    return _convert(split, raw, data_dir, manifest)
+
+def load_cards(splits=("train", "test"), data_dir=DATA_DIR, download: bool = True, verify: bool = False) -> np.ndarray:
+    """Concatena los splits pedidos en una sola matriz uint8 (n, 11)."""
+    parts = [load_split(s, data_dir, download=download, verify=verify) for s in splits]
+    return parts[0] if len(parts) == 1 else np.concatenate(parts, axis=0)
+
+def split_rows(splits=("train", "test"), data_dir=DATA_DIR, download: bool = True, verify: bool = False) -> int:
+    """Número total de filas de los splits pedidos (sin leer los datos)."""
+    return sum(len(load_split(s, data_dir, download=download, verify=verify)) for s in splits)
+
+def iter_card_chunks(splits=("train", "test"), data_dir=DATA_DIR, chunk_rows: int = 200_000, rows=None,
+                     download: bool = True, verify: bool = False):
+    """
+    Recorre los splits concatenados en bloques uint8 (<= chunk_rows, 11) sin materializar
+    el total. `rows` (índices globales, en cualquier orden) selecciona y ordena las filas.
+    Produce tuplas (posición de inicio en la salida, bloque).
+    """
+    parts = [load_split(s, data_dir, download=download, verify=verify) for s in splits]
+    offs = np.cumsum([0] + [len(p) for p in parts])
+    if rows is None:
+        pos = 0
+        for p in parts:
+            for a in range(0, len(p), chunk_rows):
+                block = np.array(p[a:a + chunk_rows])
+                yield pos, block
+                pos += len(block)
+        return
+    rows = np.asarray(rows, dtype=np.int64)
+    for a in range(0, len(rows), chunk_rows):
+        r = rows[a:a + chunk_rows]
+        which = np.searchsorted(offs, r, side="right") - 1
+        block = np.empty((len(r), len(COLNAMES)), dtype=np.uint8)
+        for j, p in enumerate(parts):
+            m = which == j
+            if m.any():
+                block[m] = p[r[m] - offs[j]]
+        yield a, block
+
@@ -0,0 +1,199 @@
+"""
+Evaluador exacto de manos de 5 cartas con tablas de búsqueda (clases UCI 0..9).
+
+- Manos de color (5 suits iguales): los rangos son distintos, así que la máscara de
+  13 bits de rangos identifica la jugada -> FLUSH_CLASS[mask] (color, escalera de
+  color o escalera real).
+- Resto: los 5 rangos ordenados (red de ordenación de 9 comparadores, vectorizada por
+  columnas) en base 13 indexan directamente RANK_CLASS (13^5 entradas uint8).
+
+El as (rango 1) cuenta alto y bajo en escaleras, como en el dataset UCI.
+También enumera las 2.598.960 manos posibles para obtener frecuencias exactas y
+canonicaliza manos (orden de cartas y permutación de suits), bajo la que la clase
+es invariante: hay 134.459 manos canónicas distintas.
+
+Uso: python poker_eval.py [--enumerate] [--canonical] [--bench 1000000]
+"""
+import itertools, time
+
+import numpy as np
+
+CLASS_NAMES = [
+    "nada", "par", "doble par", "trío", "escalera",
+    "color", "full", "póker", "escalera de color", "escalera real",
+]
+N_CLASSES = len(CLASS_NAMES)
+
+# Frecuencias exactas sobre las C(52,5) manos (orden de las cartas indiferente)
+EXPECTED_COUNTS = np.array([1_302_540, 1_098_240, 123_552, 54_912, 10_200,
+                            5_108, 3_744, 624, 36, 4], dtype=np.int64)
+N_HANDS = int(EXPECTED_COUNTS.sum())  # 2.598.960
+
+# Red de ordenación óptima para 5 elementos (pares de columnas a comparar e intercambiar)
+SORT_NETWORK = [(0, 1), (3, 4), (2, 4), (2, 3), (0, 3), (0, 2), (1, 4), (1, 3), (1, 2)]
+RANK_OFFSET = sum(13 ** k for k in range(5))  # rangos 1..13 en base 13 -> índice desde 0
+
+CARD_COLS = ["S1","R1","S2","R2","S3","R3","S4","R4","S5","R5"]
+
+def _rank_mask(ranks) -> int:
+    return sum(1 << (r - 1) for r in set(ranks))
+
+STRAIGHT_MASKS = frozenset(
+    [_rank_mask(range(lo, lo + 5)) for lo in range(1, 10)] + [_rank_mask((10, 11, 12, 13, 1))]
+)
+ROYAL_MASK = _rank_mask((10, 11, 12, 13, 1))
+
+def _unsuited_class(ranks) -> int:
+    """Clase de un multiconjunto de 5 rangos sin color."""
+    counts = sorted((ranks.count(r) for r in set(ranks)), reverse=True)
+    if counts[0] == 4:
+        return 7
+    if counts[:2] == [3, 2]:
+        return 6
+    if counts[0] == 3:
+        return 3
+    if counts[:2] == [2, 2]:
+        return 2
+    if counts[0] == 2:
+        return 1
+    return 4 if _rank_mask(ranks) in STRAIGHT_MASKS else 0
+
+def _build_tables():
+    ranks_cls = np.zeros(13 ** 5, dtype=np.uint8)  # 5 rangos iguales no existen: entrada sin uso
+    for ranks in itertools.combinations_with_replacement(range(1, 14), 5):  # tuplas ya ordenadas
+        if ranks.count(ranks[0]) == 5:
+            continue
+        idx = 0
+        for r in ranks:
+            idx = idx * 13 + r
+        ranks_cls[idx - RANK_OFFSET] = _unsuited_class(list(ranks))
+    flush = np.full(1 << 13, 5, dtype=np.uint8)
+    for m in STRAIGHT_MASKS:
+        flush[m] = 8
+    flush[ROYAL_MASK] = 9
+    return ranks_cls, flush
+
+RANK_CLASS, FLUSH_CLASS = _build_tables()
+
+def hand_class(suits: np.ndarray, ranks: np.ndarray) -> np.ndarray:
+    """Clase UCI (uint8) para matrices (n, 5) de suits 1..4 y rangos 1..13."""
+    ranks = np.asarray(ranks)
+    suits = np.asarray(suits)
+    cols = [ranks[:, i] for i in range(5)]
+    for i, j in SORT_NETWORK:
+        cols[i], cols[j] = np.minimum(cols[i], cols[j]), np.maximum(cols[i], cols[j])
+    idx = cols[0].astype(np.int32)
+    for c in cols[1:]:
+        idx = idx * 13 + c
+    cls = RANK_CLASS[idx - RANK_OFFSET]
+    s0 = suits[:, 0]
+    flush = (suits[:, 1] == s0) & (suits[:, 2] == s0) & (suits[:, 3] == s0) & (suits[:, 4] == s0)
+    if flush.any():
+        mask = np.bitwise_or.reduce(np.left_shift(1, ranks[flush].astype(np.intp) - 1), axis=1)
+        cls[flush] = FLUSH_CLASS[mask]
+    return cls
+
+def classify_cards(cards) -> np.ndarray:
+    """Clase UCI para filas en formato S1,R1,...,S5,R5[,y] (array (n, >=10) o DataFrame)."""
+    if hasattr(cards, "columns"):
+        cards = cards[CARD_COLS].to_numpy()
+    cards = np.asarray(cards)
+    return hand_class(cards[:, 0:10:2], cards[:, 1:10:2])
+
+def label_mismatches(cards) -> np.ndarray:
+    """Índices de las filas (n, 11) cuya etiqueta `y` no coincide con el evaluador."""
+    cards = np.asarray(cards)
+    return np.flatnonzero(classify_cards(cards) != cards[:, 10])
+
+def duplicate_card_rows(cards) -> np.ndarray:
+    """Índices de las filas en formato S1,R1,...,S5,R5 con alguna carta repetida (manos imposibles)."""
+    cards = np.asarray(cards)
+    ids = np.sort((cards[:, 0:10:2].astype(np.int16) - 1) * 13 + cards[:, 1:10:2] - 1, axis=1)
+    return np.flatnonzero((np.diff(ids, axis=1) == 0).any(axis=1))
+
+N_CANONICAL = 134_459
+SUIT_PERMS = np.array(list(itertools.permutations(range(4))), dtype=np.int64)  # (24, 4)
+_KEY_BASE = 52 ** np.arange(4, -1, -1, dtype=np.int64)
+
+def canonical_keys(suits: np.ndarray, ranks: np.ndarray) -> np.ndarray:
+    """
+    Clave canónica (int64) de cada mano: mínimo, sobre las 24 permutaciones de suits,
+    de las 5 cartas codificadas como (rango-1)*4 + suit y ordenadas, en base 52.
+    Dos manos tienen la misma clave si y solo si son iguales salvo orden y suits.
+    """
+    r4 = (np.asarray(ranks, dtype=np.int64) - 1) * 4
+    s0 = np.asarray(suits, dtype=np.int64) - 1
+    best = None
+    for perm in SUIT_PERMS:
+        key = np.sort(r4 + perm[s0], axis=1) @ _KEY_BASE
+        best = key if best is None else np.minimum(best, key)
+    return best
+
+def decode_keys(keys: np.ndarray) -> np.ndarray:
+    """Mano canónica en formato UCI (n, 10) uint8: cartas ordenadas por rango y suit."""
+    codes = (np.asarray(keys, dtype=np.int64)[:, None] // _KEY_BASE) % 52
+    out = np.empty((len(codes), 10), dtype=np.uint8)
+    out[:, 0::2] = codes % 4 + 1
+    out[:, 1::2] = codes // 4 + 1
+    return out
+
+def canonicalize_cards(cards) -> np.ndarray:
+    """Claves canónicas para filas en formato S1,R1,...,S5,R5[,y] (array o DataFrame)."""
+    if hasattr(cards, "columns"):
+        cards = cards[CARD_COLS].to_numpy()
+    cards = np.asarray(cards)
+    return canonical_keys(cards[:, 0:10:2], cards[:, 1:10:2])
+
+def enumerate_hands() -> np.ndarray:
+    """Todas las manos de 5 cartas como matriz uint8 (2.598.960, 10) en formato UCI."""
+    combos = np.fromiter(itertools.chain.from_iterable(itertools.combinations(range(52), 5)),
+                         dtype=np.uint8, count=5 * N_HANDS).reshape(N_HANDS, 5)
+    out = np.empty((N_HANDS, 10), dtype=np.uint8)
+    out[:, 0::2] = combos // 13 + 1
+    out[:, 1::2] = combos % 13 + 1
+    return out
+
+def exact_class_counts(hands: np.ndarray = None) -> np.ndarray:
+    """Frecuencia de cada clase sobre la enumeración completa (o sobre `hands`)."""
+    hands = enumerate_hands() if hands is None else hands
+    return np.bincount(classify_cards(hands), minlength=N_CLASSES).astype(np.int64)
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Evaluador exacto de manos de póker (clases UCI).")
+    parser.add_argument("--enumerate", action="store_true", help="Enumera las 2.598.960 manos y muestra las frecuencias exactas.")
+    parser.add_argument("--canonical", action="store_true", help="Cuenta las manos canónicas distintas (orden y suits) de la enumeración.")
+    parser.add_argument("--bench", type=int, default=0, help="Clasifica N manos aleatorias y muestra manos/s.")
+    args = parser.parse_args()
+
+    if args.enumerate:
+        t0 = time.perf_counter()
+        hands = enumerate_hands()
+        t1 = time.perf_counter()
+        counts = exact_class_counts(hands)
+        t2 = time.perf_counter()
+        for k, (name, c) in enumerate(zip(CLASS_NAMES, counts)):
+            print(f"{k}  {name:<18}{c:>10,}  {c / N_HANDS:.6%}")
+        status = "OK" if np.array_equal(counts, EXPECTED_COUNTS) else "DISTINTO de las frecuencias conocidas"
+        print(f"Total {counts.sum():,} manos: {status} "
+              f"(enumeración {t1 - t0:.2f}s, evaluación {t2 - t1:.2f}s = {N_HANDS / (t2 - t1) / 1e6:.1f} M manos/s)")
+
+    if args.canonical:
+        t0 = time.perf_counter()
+        keys = canonicalize_cards(enumerate_hands())
+        uniq = np.unique(keys)
+        status = "OK" if len(uniq) == N_CANONICAL else f"DISTINTO de {N_CANONICAL:,}"
+        print(f"{len(uniq):,} manos canónicas en {N_HANDS:,} manos: {status} ({time.perf_counter() - t0:.2f}s)")
+
+    if args.bench:
+        rng = np.random.default_rng(0)
+        cards = np.argsort(rng.random((args.bench, 52)), axis=1)[:, :5]
+        suits, ranks = cards // 13 + 1, cards % 13 + 1
+        hand_class(suits[:1000], ranks[:1000])
+        t0 = time.perf_counter()
+        hand_class(suits, ranks)
+        dt = time.perf_counter() - t0
+        print(f"{args.bench:,} manos en {dt:.3f}s = {args.bench / dt / 1e6:.1f} M manos/s")
+
+if __name__ == "__main__":
+    main()
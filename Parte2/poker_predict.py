@@ -0,0 +1,228 @@
+"""
+Inferencia por lotes con los modelos guardados por poker_analysis.py (outputs/models/).
+
+La entrada puede ser un fichero de texto UCI/CSV (10 u 11 columnas S1,R1,...,S5,R5[,y],
+con o sin cabecera), un `.npy` (n, 10|11) o un split de la caché de poker_data
+(`train`/`test`). Se recorre en lotes de `--batch-rows` filas; cada lote pasa por
+feature_frame con las mismas opciones del entrenamiento (schema.json: bitboard, dedup,
+columnas y tipos) y por el modelo. La salida es columnar, un `.npy` por columna en `--out`:
+- pred.npy (uint8): clase predicha
+- conf.npy (float32): probabilidad de la clase predicha
+más un schema.json con filas, tiempos, manos/s y memoria pico.
+
+Con --workers N los lotes se reparten entre N procesos que cargan el modelo una sola vez
+y usan 1 hilo cada uno; hay como mucho 2·N lotes en vuelo, así que la memoria depende de
+--batch-rows y no del tamaño del fichero. Las predicciones se escriben en orden.
+
+Uso: python poker_predict.py test --model randomforest --batch-rows 100000 --workers 2
+"""
+import argparse, json, os, shutil, sys, time
+import multiprocessing as mp
+from collections import deque
+from typing import Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+from poker_analysis import MODELS_DIR, OUTPUTS_DIR, feature_frame
+from poker_data import DATA_DIR, SPLITS, load_split
+from poker_eval import CARD_COLS, canonicalize_cards, decode_keys, duplicate_card_rows
+
+try:
+    import resource
+except ImportError:  # Windows: sin memoria pico
+    resource = None
+
+PREDICTIONS_DIR = os.path.join(OUTPUTS_DIR, "predictions")
+BATCH_ROWS = 100_000
+
+def read_schema(name: str, models_dir: str = MODELS_DIR) -> dict:
+    """Esquema de save_models, comprobando que el modelo `name` esté guardado."""
+    with open(os.path.join(models_dir, "schema.json"), encoding="utf-8") as f:
+        schema = json.load(f)
+    if name not in schema["models"]:
+        raise ValueError(f"Modelo desconocido: {name!r} (guardados: {', '.join(schema['models'])})")
+    return schema
+
+def load_model(name: str = "randomforest", models_dir: str = MODELS_DIR):
+    """Modelo guardado por save_models y su esquema."""
+    schema = read_schema(name, models_dir)
+    return joblib.load(os.path.join(models_dir, f"{name}.joblib")), schema
+
+def features_for(cards: np.ndarray, schema: dict) -> pd.DataFrame:
+    """Features de un lote (n, >=10) con las mismas columnas, orden y tipos que en el entrenamiento."""
+    cards = np.asarray(cards)[:, :10]
+    if len(cards) and (cards.min() < 1 or cards[:, 0::2].max() > 4 or cards[:, 1::2].max() > 13):
+        raise ValueError("Valores de cartas fuera de rango (S 1..4, R 1..13)")
+    dup = duplicate_card_rows(cards)
+    if len(dup):
+        raise ValueError(f"{len(dup)} manos con cartas repetidas (primeras filas: {dup[:5].tolist()})")
+    if schema.get("dedup"):
+        # Entrenado con manos canónicas: la clase es invariante, se canonicaliza igual
+        cards = decode_keys(canonicalize_cards(cards))
+    X = feature_frame(pd.DataFrame(cards.astype(np.uint8), columns=CARD_COLS), schema.get("bitboard", False))
+    expected = [(c["name"], c["dtype"]) for c in schema["columns"]]
+    if [(c, X[c].dtype.str) for c in X.columns] != expected:
+        raise ValueError("Las features no coinciden con el esquema del modelo (¿versión distinta de poker_analysis?)")
+    return X
+
+def predict_batch(model, cards: np.ndarray, schema: dict) -> Tuple[np.ndarray, np.ndarray]:
+    """(clase predicha uint8, probabilidad de esa clase float32) para un lote de manos."""
+    proba = model.predict_proba(features_for(cards, schema))
+    best = proba.argmax(axis=1)
+    return model.classes_[best].astype(np.uint8), proba[np.arange(len(best)), best].astype(np.float32)
+
+def _count_rows(path: str, header: bool) -> int:
+    n, last = 0, b"\n"
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            n += block.count(b"\n")
+            last = block[-1:]
+    return n + (last != b"\n") - header
+
+def open_hands(source: str, batch_rows: int = BATCH_ROWS, data_dir: str = DATA_DIR):
+    """
+    Retorna (número de filas, iterador de lotes (<= batch_rows, 10|11)) sin cargar la
+    entrada completa: `.npy` y splits de la caché con memory mapping, texto con read_csv
+    por bloques.
+    """
+    if source in SPLITS and not os.path.exists(source):
+        arr = load_split(source, data_dir, download=False)
+    elif source.endswith(".npy"):
+        arr = np.load(source, mmap_mode="r")
+    else:
+        with open(source, encoding="utf-8") as f:
+            header = any(ch.isalpha() for ch in f.readline())
+        reader = pd.read_csv(source, header=0 if header else None, dtype=np.int16, chunksize=batch_rows)
+        def batches():
+            for chunk in reader:
+                if chunk.shape[1] not in (10, 11):
+                    raise ValueError(f"{source}: se esperaban 10 u 11 columnas, hay {chunk.shape[1]}")
+                yield chunk.to_numpy()
+        return _count_rows(source, header), batches()
+    if arr.ndim != 2 or arr.shape[1] not in (10, 11):
+        raise ValueError(f"{source}: se esperaba una matriz (n, 10|11), forma {arr.shape}")
+    return len(arr), (np.array(arr[a:a + batch_rows]) for a in range(0, len(arr), batch_rows))
+
+_worker = {}
+
+def _init_worker(name: str, models_dir: str):
+    threadpool_limits(1)
+    model, schema = load_model(name, models_dir)
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=1)
+    _worker.update(model=model, schema=schema)
+
+def _predict_shard(cards: np.ndarray):
+    return predict_batch(_worker["model"], cards, _worker["schema"])
+
+def _ordered_results(pool, batches, window: int):
+    """Como pool.imap, pero sin leer más de `window` lotes por delante (memoria acotada)."""
+    pending = deque()
+    for block in batches:
+        pending.append((block, pool.apply_async(_predict_shard, (block,))))
+        if len(pending) >= window:
+            block, res = pending.popleft()
+            yield block, res.get()
+    while pending:
+        block, res = pending.popleft()
+        yield block, res.get()
+
+def peak_rss_mb() -> Tuple[float, float]:
+    """Memoria pico (MB) del proceso principal y del mayor worker ya terminado; None sin `resource`."""
+    if resource is None:
+        return None, None
+    unit = 1 if sys.platform == "darwin" else 1024  # ru_maxrss: bytes en macOS, KB en Linux
+    return tuple(resource.getrusage(who).ru_maxrss * unit / 2**20
+                 for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+
+def predict_file(source: str, model_name: str = "randomforest", models_dir: str = MODELS_DIR,
+                 out_dir: str = PREDICTIONS_DIR, batch_rows: int = BATCH_ROWS, workers: int = 1,
+                 data_dir: str = DATA_DIR) -> dict:
+    """
+    Predice todas las manos de `source` por lotes y escribe pred.npy / conf.npy en `out_dir`
+    (escritura atómica). Si la entrada trae etiqueta (11 columnas) calcula el accuracy.
+    Retorna las estadísticas guardadas en schema.json.
+    """
+    t0 = time.perf_counter()
+    n, batches = open_hands(source, batch_rows, data_dir)
+    pool = None
+    if workers > 1:
+        read_schema(model_name, models_dir)  # falla aquí y no en el initializer de cada worker
+        pool = mp.Pool(workers, initializer=_init_worker, initargs=(model_name, models_dir))
+        results = _ordered_results(pool, batches, 2 * workers)
+    else:
+        model, schema = load_model(model_name, models_dir)
+        results = ((block, predict_batch(model, block, schema)) for block in batches)
+
+    tmp = out_dir + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    columns = [("pred", np.uint8), ("conf", np.float32)]
+    files = {}
+    done = correct = labelled = 0
+    try:
+        for c, dtype in columns:
+            f = files[c] = open(os.path.join(tmp, f"{c}.npy"), "wb")
+            np.lib.format.write_array_header_1_0(
+                f, {"descr": np.dtype(dtype).str, "fortran_order": False, "shape": (n,)})
+        for block, (pred, conf) in results:
+            files["pred"].write(pred.tobytes())
+            files["conf"].write(conf.tobytes())
+            done += len(pred)
+            if block.shape[1] == 11:
+                correct += int((pred == block[:, 10]).sum())
+                labelled += len(pred)
+        if done != n:
+            raise ValueError(f"{source}: se esperaban {n} filas y se leyeron {done}")
+    except BaseException:
+        for f in files.values():
+            f.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    finally:
+        for f in files.values():
+            f.close()
+        if pool is not None:
+            pool.close()
+            pool.join()
+    elapsed = time.perf_counter() - t0
+
+    rss_main, rss_worker = peak_rss_mb()
+    stats = {
+        "source": source, "rows": n, "model": model_name, "models_dir": models_dir,
+        "columns": [{"name": c, "file": f"{c}.npy", "dtype": np.dtype(d).str} for c, d in columns],
+        "batch_rows": batch_rows, "workers": workers, "seconds": elapsed, "hands_per_s": n / elapsed,
+        "peak_rss_mb": rss_main, "peak_rss_worker_mb": rss_worker if pool is not None else None,
+        "accuracy": correct / labelled if labelled else None,
+    }
+    with open(os.path.join(tmp, "schema.json"), "w", encoding="utf-8") as f:
+        json.dump(stats, f, ensure_ascii=False, indent=1)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp, out_dir)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Predicción por lotes con los modelos guardados por poker_analysis.py.")
+    parser.add_argument("input", help="Fichero .data/.csv o .npy con S1,R1,...,S5,R5[,y], o un split de la caché (train/test).")
+    parser.add_argument("--model", default="randomforest", help="Modelo guardado a usar: randomforest, logreg o hgb (según --models al entrenar).")
+    parser.add_argument("--models-dir", default=MODELS_DIR, help="Carpeta de save_models (por defecto: outputs/models/).")
+    parser.add_argument("--out", default=PREDICTIONS_DIR, help="Carpeta de salida (pred.npy, conf.npy, schema.json).")
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS, help="Manos por lote.")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos de inferencia (1 = en el proceso principal).")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Carpeta de la caché para entradas train/test.")
+    args = parser.parse_args()
+
+    stats = predict_file(args.input, args.model, args.models_dir, args.out, args.batch_rows, args.workers, args.data_dir)
+    print(f"{stats['rows']:,} manos en {stats['seconds']:.2f}s = {stats['hands_per_s']:,.0f} manos/s "
+          f"({args.model}, lotes de {args.batch_rows}, {args.workers} proceso(s)) -> {args.out}")
+    if stats["peak_rss_mb"] is not None:
+        workers = f", worker {stats['peak_rss_worker_mb']:.0f} MB" if stats["peak_rss_worker_mb"] else ""
+        print(f"Memoria pico: principal {stats['peak_rss_mb']:.0f} MB{workers}")
+    if stats["accuracy"] is not None:
+        print(f"Accuracy frente a la etiqueta de la entrada: {stats['accuracy']:.4f}")
+
+if __name__ == "__main__":
+    main()
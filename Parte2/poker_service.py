@@ -0,0 +1,218 @@
+"""
+Servicio local de clasificación de manos (HTTP en localhost) con micro-batching.
+
+Mantiene en memoria el modelo guardado por poker_analysis.py (outputs/models/) y el
+código de features ya "caliente". Las peticiones concurrentes se encolan y un único
+hilo las agrupa en micro-lotes: toma la primera, espera como mucho `--max-wait-ms` a
+que lleguen más (hasta `--max-batch-rows` manos), calcula features y predicción del
+lote completo de forma vectorizada (poker_predict.predict_batch) y reparte los
+resultados.
+
+Endpoints:
+- POST /predict  {"hands": [[S1,R1,...,S5,R5], ...]} -> {"pred": [...], "conf": [...]}
+- GET  /stats    peticiones, manos, lotes, tamaño medio de lote, latencia p50/p99 (ms)
+                 de las últimas peticiones y throughput
+- GET  /health
+
+Uso: python poker_service.py --model randomforest --port 8765 --max-wait-ms 2
+     (carga: python benchmarks/loadtest_service.py --spawn)
+"""
+import argparse, json, queue, threading, time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from poker_analysis import MODELS_DIR
+from poker_eval import duplicate_card_rows
+from poker_predict import load_model, predict_batch
+
+HOST = "127.0.0.1"
+PORT = 8765
+MAX_BATCH_ROWS = 4096
+MAX_WAIT_MS = 2.0
+LATENCY_WINDOW = 10_000  # Peticiones recientes para los percentiles
+
+class ServiceStats:
+    """Contadores del servicio (thread-safe) y latencias de las últimas peticiones."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.requests = self.hands = self.batches = self.errors = 0
+        self.latencies = deque(maxlen=window)
+
+    def record_batch(self, n_requests: int, n_hands: int):
+        with self.lock:
+            self.batches += 1
+            self.requests += n_requests
+            self.hands += n_hands
+
+    def record_latency(self, seconds: float):
+        with self.lock:
+            self.latencies.append(seconds)
+
+    def record_error(self):
+        with self.lock:
+            self.errors += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            lat = np.array(self.latencies) * 1000
+            uptime = time.perf_counter() - self.started
+            return {
+                "uptime_s": uptime, "requests": self.requests, "hands": self.hands,
+                "batches": self.batches, "errors": self.errors,
+                "mean_batch_hands": self.hands / self.batches if self.batches else 0.0,
+                "mean_batch_requests": self.requests / self.batches if self.batches else 0.0,
+                "latency_ms": {k: float(np.percentile(lat, q)) if len(lat) else None
+                               for k, q in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))},
+                "requests_per_s": self.requests / uptime, "hands_per_s": self.hands / uptime,
+            }
+
+class MicroBatcher:
+    """Agrupa las peticiones concurrentes en lotes y los predice en un hilo dedicado."""
+
+    def __init__(self, model, schema: dict, max_batch_rows: int = MAX_BATCH_ROWS, max_wait_ms: float = MAX_WAIT_MS):
+        self.model, self.schema = model, schema
+        self.max_batch_rows, self.max_wait = max_batch_rows, max_wait_ms / 1000
+        self.stats = ServiceStats()
+        self.queue = queue.Queue()
+        predict_batch(model, np.array([[1, 1, 2, 2, 3, 3, 4, 4, 1, 5]], dtype=np.uint8), schema)  # calentamiento
+        threading.Thread(target=self._run, name="micro-batcher", daemon=True).start()
+
+    def submit(self, cards: np.ndarray):
+        """Encola una petición (n, 10) y espera su (pred, conf)."""
+        item = {"cards": cards, "done": threading.Event()}
+        self.queue.put(item)
+        item["done"].wait()
+        if "error" in item:
+            raise item["error"]
+        return item["result"]
+
+    def _collect(self) -> list:
+        items = [self.queue.get()]
+        rows = len(items[0]["cards"])
+        deadline = time.perf_counter() + self.max_wait
+        while rows < self.max_batch_rows:
+            try:
+                item = self.queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except queue.Empty:
+                break
+            items.append(item)
+            rows += len(item["cards"])
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            sizes = [len(it["cards"]) for it in items]
+            try:
+                pred, conf = predict_batch(self.model, np.concatenate([it["cards"] for it in items]), self.schema)
+                bounds = np.cumsum([0] + sizes)
+                for it, a, b in zip(items, bounds[:-1], bounds[1:]):
+                    it["result"] = (pred[a:b], conf[a:b])
+            except Exception as e:  # el error llega a cada petición del lote
+                for it in items:
+                    it["error"] = e
+            self.stats.record_batch(len(items), int(sum(sizes)))
+            for it in items:
+                it["done"].set()
+
+def parse_hands(payload: bytes) -> np.ndarray:
+    """Valida el cuerpo JSON de /predict y devuelve las manos como uint8 (n, 10)."""
+    body = json.loads(payload)
+    if not isinstance(body, dict) or "hands" not in body:
+        raise ValueError("El cuerpo debe ser un objeto JSON con la clave 'hands'")
+    cards = np.asarray(body["hands"])
+    if cards.ndim != 2 or cards.shape[1] != 10 or len(cards) == 0:
+        raise ValueError("'hands' debe ser una lista no vacía de manos [S1,R1,...,S5,R5]")
+    # sin dtype forzado: 1.7 se truncaría a 1 y otra mano se clasificaría en silencio
+    if cards.dtype.kind not in "iu":
+        raise ValueError("Los valores de las cartas deben ser enteros")
+    if cards.min() < 1 or cards[:, 0::2].max() > 4 or cards[:, 1::2].max() > 13:
+        raise ValueError("Valores de cartas fuera de rango (S 1..4, R 1..13)")
+    dup = duplicate_card_rows(cards)
+    if len(dup):
+        raise ValueError(f"{len(dup)} manos con cartas repetidas (primeras filas: {dup[:5].tolist()})")
+    return cards.astype(np.uint8)
+
+class PokerHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # conexiones persistentes
+    batcher: MicroBatcher = None
+
+    def _send(self, code: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send(200, self.batcher.stats.snapshot())
+        elif self.path == "/health":
+            self._send(200, {"status": "ok"})
+        else:
+            self._send(404, {"error": f"ruta desconocida: {self.path}"})
+
+    def do_POST(self):
+        t0 = time.perf_counter()
+        payload = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path != "/predict":
+            self._send(404, {"error": f"ruta desconocida: {self.path}"})
+            return
+        try:
+            cards = parse_hands(payload)
+        except (ValueError, KeyError, TypeError, OverflowError) as e:
+            self.batcher.stats.record_error()
+            self._send(400, {"error": str(e)})
+            return
+        try:
+            pred, conf = self.batcher.submit(cards)
+        except Exception as e:
+            self.batcher.stats.record_error()
+            self._send(500, {"error": str(e)})
+            return
+        self._send(200, {"pred": pred.tolist(), "conf": np.round(conf, 6).tolist()})
+        self.batcher.stats.record_latency(time.perf_counter() - t0)
+
+    def log_message(self, format, *args):
+        pass  # sin una línea por petición
+
+def make_server(batcher: MicroBatcher, host: str = HOST, port: int = PORT) -> ThreadingHTTPServer:
+    handler = type("Handler", (PokerHandler,), {"batcher": batcher})
+    server_cls = type("Server", (ThreadingHTTPServer,), {"request_queue_size": 128, "daemon_threads": True})
+    return server_cls((host, port), handler)
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP local de clasificación de manos con micro-batching.")
+    parser.add_argument("--model", default="randomforest", help="Modelo guardado a servir: randomforest, logreg o hgb (según --models al entrenar).")
+    parser.add_argument("--models-dir", default=MODELS_DIR, help="Carpeta de save_models (por defecto: outputs/models/).")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--max-batch-rows", type=int, default=MAX_BATCH_ROWS, help="Manos máximas por micro-lote.")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS,
+                        help="Espera máxima para agrupar peticiones (0 = solo las ya encoladas).")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="n_jobs del modelo al predecir (1 minimiza la latencia con lotes pequeños).")
+    args = parser.parse_args()
+
+    model, schema = load_model(args.model, args.models_dir)
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=args.threads)
+    batcher = MicroBatcher(model, schema, args.max_batch_rows, args.max_wait_ms)
+    server = make_server(batcher, args.host, args.port)
+    print(f"Sirviendo {args.model} en http://{args.host}:{args.port} "
+          f"(lotes <= {args.max_batch_rows} manos, espera <= {args.max_wait_ms} ms)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(batcher.stats.snapshot(), indent=1))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Generador vectorizado de manos sintéticas con el esquema del dataset UCI (S1,R1,...,S5,R5,y).
+
+- Sin estratificar (`none`): 5 cartas distintas de la baraja de 52 por Fisher-Yates
+  parcial vectorizado (rangos que se reducen 52, 51, ..., 48 y un mapa de intercambios
+  por fila; sin rechazo ni ordenaciones) y etiqueta del evaluador exacto (poker_eval).
+  Las clases siguen la distribución natural, como en UCI.
+- Estratificado (`sqrt`, `uniform`): se eligen las clases con probabilidad proporcional
+  a la raíz de su frecuencia natural o uniforme, y cada mano se toma al azar de las
+  2.598.960 manos enumeradas de esa clase (uniforme dentro de la clase) con sus cartas
+  en orden aleatorio. Sobremuestrea las clases raras (escalera de color, real...).
+
+Todo se genera por bloques (memoria acotada) y con semilla fija es reproducible. La
+salida `.npy` uint8 (n, 11) puede usarse directamente como fuente de datos de
+poker_analysis.py (`--synthetic N`) o de poker_data.load_split.
+
+Uso: python poker_synth.py --rows 10000000 --stratify none --out data/synth.npy
+     python poker_synth.py --bench 10000000
+"""
+import argparse, itertools, os, time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from poker_eval import EXPECTED_COUNTS, N_CLASSES, classify_cards, enumerate_hands
+
+STRATIFY = ("none", "sqrt", "uniform")
+SYNTH_CHUNK = 1 << 17  # Filas por bloque: cabe en caché y es el tamaño más rápido en 1 CPU
+SUIT_OF = (np.arange(52) // 13 + 1).astype(np.uint8)  # Misma codificación que enumerate_hands
+RANK_OF = (np.arange(52) % 13 + 1).astype(np.uint8)
+PERMS5 = np.array(list(itertools.permutations(range(5))), dtype=np.intp)  # (120, 5)
+
+def draw_cards(n: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    (n, 5) uint8 con 5 cartas distintas 0..51 por fila, uniformes y en orden de extracción.
+    Paso k: índice j uniforme en [0, 52-k) (multiplicación de 32 bits, sesgo < 1e-8); la
+    carta es la que ocupa la posición j tras los intercambios anteriores, y esa posición
+    pasa a contener la última carta del rango, como en Fisher-Yates.
+    """
+    raw = rng.bit_generator.random_raw((5 * n + 1) // 2).view(np.uint32)[:5 * n].reshape(5, n)
+    out = np.empty((n, 5), dtype=np.uint8)
+    pos, val = [], []  # intercambios previos: posición -> carta que contiene ahora
+    for k in range(5):
+        last = 51 - k
+        j = ((raw[k].astype(np.uint64) * (last + 1)) >> 32).astype(np.uint8)
+        card = j.copy()
+        moved = np.full(n, last, dtype=np.uint8)
+        for p, v in zip(pos, val):
+            np.copyto(card, v, where=p == j)
+            np.copyto(moved, v, where=p == last)
+        out[:, k] = card
+        pos.append(j)
+        val.append(moved)
+    return out
+
+def cards_to_uci(cards: np.ndarray) -> np.ndarray:
+    """Cartas 0..51 (n, 5) -> formato UCI (n, 10) uint8: S1,R1,...,S5,R5."""
+    out = np.empty((len(cards), 10), dtype=np.uint8)
+    out[:, 0::2] = SUIT_OF[cards]
+    out[:, 1::2] = RANK_OF[cards]
+    return out
+
+def class_probs(stratify: str) -> np.ndarray:
+    """Probabilidad de cada clase para `sqrt`/`uniform` (None para la distribución natural)."""
+    if stratify == "none":
+        return None
+    if stratify == "sqrt":
+        p = np.sqrt(EXPECTED_COUNTS.astype(np.float64))
+    elif stratify == "uniform":
+        p = np.ones(N_CLASSES)
+    else:
+        raise ValueError(f"stratify desconocido: {stratify!r} (opciones: {', '.join(STRATIFY)})")
+    return p / p.sum()
+
+_ENUM = {}
+
+def _hands_by_class():
+    """
+    Enumeración completa como cartas 0..51 (uint8 (2.598.960, 5)) e índices de las manos
+    de cada clase (una vez por proceso).
+    """
+    if not _ENUM:
+        hands = enumerate_hands()
+        labels = classify_cards(hands)
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(N_CLASSES + 1))
+        cards = (hands[:, 0::2] - 1) * 13 + hands[:, 1::2] - 1
+        _ENUM.update(cards=cards, members=[order[a:b] for a, b in zip(bounds[:-1], bounds[1:])])
+    return _ENUM["cards"], _ENUM["members"]
+
+def synthetic_block(n: int, rng: np.random.Generator, probs: np.ndarray = None) -> np.ndarray:
+    """Bloque (n, 11) uint8 S1,R1,...,S5,R5,y."""
+    out = np.empty((n, 11), dtype=np.uint8)
+    if probs is None:
+        out[:, :10] = cards_to_uci(draw_cards(n, rng))
+        out[:, 10] = classify_cards(out)
+        return out
+    cards, members = _hands_by_class()
+    counts = rng.multinomial(n, probs)
+    idx = np.concatenate([m[rng.integers(0, len(m), c)] for m, c in zip(members, counts)])
+    labels = np.repeat(np.arange(N_CLASSES, dtype=np.uint8), counts)
+    shuffle = rng.permutation(n)
+    idx, labels = idx[shuffle], labels[shuffle]
+    # Cartas en orden aleatorio dentro de cada mano (la enumeración las da ordenadas):
+    # una permutación de las 120 por fila, aplicada con un único gather plano
+    flat = cards[idx].ravel()
+    perm = PERMS5[rng.integers(0, len(PERMS5), n)] + np.arange(0, 5 * n, 5)[:, None]
+    out[:, :10] = cards_to_uci(flat[perm])
+    out[:, 10] = labels
+    return out
+
+def iter_synthetic(n: int, seed: int = 0, stratify: str = "none", chunk_rows: int = SYNTH_CHUNK):
+    """Genera `n` manos en bloques uint8 (<= chunk_rows, 11) sin materializar el total."""
+    rng = np.random.default_rng(seed)
+    probs = class_probs(stratify)
+    for a in range(0, n, chunk_rows):
+        yield synthetic_block(min(chunk_rows, n - a), rng, probs)
+
+def generate(n: int, seed: int = 0, stratify: str = "none") -> np.ndarray:
+    """Matriz uint8 (n, 11) completa en memoria."""
+    return np.concatenate(list(iter_synthetic(n, seed, stratify))) if n else np.empty((0, 11), dtype=np.uint8)
+
+def write_synthetic(path, n: int, seed: int = 0, stratify: str = "none") -> Path:
+    """
+    Escribe `n` manos en `path` por bloques (escritura atómica): `.npy` uint8 (n, 11)
+    (cabecera al principio y bloques añadidos) o texto UCI sin cabecera para otra extensión.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        if path.suffix == ".npy":
+            np.lib.format.write_array_header_1_0(f, {"descr": "|u1", "fortran_order": False, "shape": (n, 11)})
+        for block in iter_synthetic(n, seed, stratify):
+            if path.suffix == ".npy":
+                f.write(block.tobytes())
+            else:
+                pd.DataFrame(block).to_csv(f, header=False, index=False)
+    os.replace(tmp, path)
+    return path
+
+def ensure_synthetic(n: int, data_dir="data", seed: int = 0, stratify: str = "none") -> Path:
+    """Ruta de la caché `data_dir/cache/synthetic_<n>_<stratify>_s<seed>.npy`, generándola si no existe."""
+    path = Path(data_dir) / "cache" / f"synthetic_{n}_{stratify}_s{seed}.npy"
+    if not path.exists():
+        t0 = time.perf_counter()
+        write_synthetic(path, n, seed, stratify)
+        print(f"Generadas {n:,} manos sintéticas ({stratify}) en {time.perf_counter() - t0:.1f}s -> {path}")
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de manos de póker sintéticas (esquema UCI).")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Número de manos a generar.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stratify", choices=STRATIFY, default="none",
+                        help="none: distribución natural; sqrt / uniform: sobremuestrea las clases raras.")
+    parser.add_argument("--out", default=None, help="Fichero de salida (.npy uint8 o texto UCI con otra extensión).")
+    parser.add_argument("--bench", type=int, default=0, help="Mide manos/s de extracción y etiquetado para N manos.")
+    args = parser.parse_args()
+
+    if args.out:
+        t0 = time.perf_counter()
+        write_synthetic(args.out, args.rows, args.seed, args.stratify)
+        dt = time.perf_counter() - t0
+        print(f"{args.rows:,} manos ({args.stratify}) en {dt:.2f}s = {args.rows / dt / 1e6:.1f} M manos/s -> {args.out}")
+
+    if args.bench:
+        n = args.bench
+        rng = np.random.default_rng(args.seed)
+        draw_cards(1000, rng)
+        blocks = range(0, n, SYNTH_CHUNK)
+        t0 = time.perf_counter()
+        cards = [draw_cards(min(SYNTH_CHUNK, n - a), rng) for a in blocks]
+        t1 = time.perf_counter()
+        labels = [classify_cards(cards_to_uci(c)) for c in cards]
+        t2 = time.perf_counter()
+        print(f"Extracción: {n:,} manos en {t1 - t0:.2f}s = {n / (t1 - t0) / 1e6:.1f} M manos/s")
+        print(f"Etiquetado: {n / (t2 - t1) / 1e6:.1f} M manos/s; total {n / (t2 - t0) / 1e6:.1f} M manos/s")
+        freq = np.bincount(np.concatenate(labels), minlength=N_CLASSES) / n
+        expected = EXPECTED_COUNTS / EXPECTED_COUNTS.sum()
+        print("Frecuencias por clase (generadas / exactas):")
+        for k in range(N_CLASSES):
+            print(f"  {k}  {freq[k]:.6f}  {expected[k]:.6f}")
+        for strat in STRATIFY[1:]:
+            _hands_by_class()
+            t0 = time.perf_counter()
+            blocks = list(iter_synthetic(n, args.seed, strat))
+            dt = time.perf_counter() - t0
+            freq = np.bincount(np.concatenate([b[:, 10] for b in blocks]), minlength=N_CLASSES) / n
+            print(f"Estratificado {strat}: {n / dt / 1e6:.1f} M manos/s, clases {np.round(freq, 4).tolist()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Startup-time benchmark for DnD.py.
+
+Every measurement runs in a fresh interpreter:
+  import_engine     `import DnD` (what each spawned worker pays)
+  cli_help          `python DnD.py --help`
+  worker_bootstrap  spawn-context pool with one worker running a 1-fight chunk
+  import_plots      `import dnd_plots`, i.e. the Matplotlib cost that is now deferred
+
+Usage: python benchmarks/bench_startup.py [--repeat 7]
+"""
+import argparse, statistics, subprocess, sys, time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+WORKER_SNIPPET = """
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+import DnD
+t0 = time.perf_counter()
+with ProcessPoolExecutor(1, mp_context=mp.get_context("spawn")) as ex:
+    ex.submit(DnD.run_chunk, DnD.simulate_battle_1v1, 8, DnD.CLOAKER, 1, 0).result()
+print(time.perf_counter() - t0)
+"""
+
+CASES = {
+    "import_engine": [sys.executable, "-c", "import DnD"],
+    "cli_help": [sys.executable, str(ROOT / "DnD.py"), "--help"],
+    "import_plots": [sys.executable, "-c", "import dnd_plots"],
+}
+
+def wall(cmd) -> float:
+    t0 = time.perf_counter()
+    subprocess.run(cmd, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - t0
+
+def worker_bootstrap() -> float:
+    # Time measured inside the parent: pool start + child import + first result
+    out = subprocess.run([sys.executable, "-c", WORKER_SNIPPET], cwd=ROOT, check=True,
+                         capture_output=True, text=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--repeat", type=int, default=7)
+    args = p.parse_args()
+
+    baseline = [wall([sys.executable, "-c", "pass"]) for _ in range(args.repeat)]
+    print(f"{'case':<18}{'median ms':>11}{'min ms':>9}")
+    print(f"{'python -c pass':<18}{statistics.median(baseline) * 1e3:>11.1f}{min(baseline) * 1e3:>9.1f}")
+    for name, cmd in CASES.items():
+        ts = [wall(cmd) for _ in range(args.repeat)]
+        print(f"{name:<18}{statistics.median(ts) * 1e3:>11.1f}{min(ts) * 1e3:>9.1f}")
+    ts = [worker_bootstrap() for _ in range(args.repeat)]
+    print(f"{'worker_bootstrap':<18}{statistics.median(ts) * 1e3:>11.1f}{min(ts) * 1e3:>9.1f}")
+
+if __name__ == "__main__":
+    main()
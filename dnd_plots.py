@@ -0,0 +1,127 @@
+"""
+Charts for DnD.py. Kept out of the simulator module so that importing the
+engine (CLI startup, worker processes) does not pay for Matplotlib.
+"""
+from pathlib import Path
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg') #for headless servers
+import matplotlib.pyplot as plt
+from matplotlib.patches import Patch
+
+def _sanitize_filename(s: str) -> str:
+    return "".join(ch if ch.isalnum() or ch in ("-", "_") else "_" for ch in s)
+
+def _numeric_metrics(rows: list[dict]) -> list[str]:
+    # take keys from first row that are numeric in all rows
+    metrics = []
+    for k, v in rows[0].items():
+        if k == "warrior_die":
+            continue
+        if all(isinstance(r.get(k), (int, float)) for r in rows):
+            metrics.append(k)
+    return metrics
+
+def _ensure_same_dice(rows: list[dict]) -> list[str]:
+    return [r["warrior_die"] for r in rows]
+
+def plot_per_monster(monster_key: str,
+                     rows_solo: list[dict],
+                     rows_heal: list[dict],
+                     rows_full: list[dict],
+                     out_dir: Path):
+    dice_labels = _ensure_same_dice(rows_solo)  # assumes same dice order across scenarios
+    x = np.arange(len(dice_labels))
+    width = 0.27
+
+    metrics = _numeric_metrics(rows_solo)  # same schema for all three
+
+    for metric in metrics:
+        y_solo  = [r[metric] for r in rows_solo]
+        y_heal  = [r[metric] for r in rows_heal]
+        y_full  = [r[metric] for r in rows_full]
+
+        fig, ax = plt.subplots(figsize=(10, 6))
+        ax.bar(x - width, y_solo,  width, label="Solo")
+        ax.bar(x,          y_heal, width, label="Healer")
+        ax.bar(x + width,  y_full, width, label="Full Party")
+
+        ax.set_xlabel("Damage Die")
+        ax.set_ylabel("Data Value")
+        ax.set_title(f"{metric} - {monster_key}")
+        ax.set_xticks(x, dice_labels)
+        ax.legend()
+        fig.tight_layout()
+
+        fname = out_dir / f"plot_{_sanitize_filename(metric)}_{monster_key}.png"
+        fig.savefig(fname, dpi=150)
+        plt.close(fig)
+        
+# Plot all monsters together for each metric & scenario
+def plot_all_monsters(results_by_monster: dict[str, dict[str, list[dict]]], out_dir: Path):
+    if not results_by_monster:
+        return
+
+    # Use any monster to derive metric keys & dice labels
+    sample_monster = next(iter(results_by_monster))
+    dice_labels = _ensure_same_dice(results_by_monster[sample_monster]['solo'])
+    n_dice = len(dice_labels)
+    metrics = _numeric_metrics(results_by_monster[sample_monster]['solo'])
+
+    team_keys = [("solo", "Solo"), ("healer", "Healer"), ("full", "Full Party")]
+    monsters = list(results_by_monster.keys())
+    x = np.arange(len(monsters))
+    width = 0.8 / n_dice  # fit all dice per monster
+
+    # Consistent colors per die + proper legend using proxy patches
+    color_cycle = plt.rcParams['axes.prop_cycle'].by_key().get('color', plt.cm.tab10.colors)
+    colors = [color_cycle[i % len(color_cycle)] for i in range(n_dice)]
+    legend_patches = [Patch(facecolor=colors[i], label=dlabel) for i, dlabel in enumerate(dice_labels)]
+
+    for metric in metrics:
+        for team_key, team_label in team_keys:
+            fig, ax = plt.subplots(figsize=(12, 6))
+            for i, dlabel in enumerate(dice_labels):
+                ys = []
+                for m in monsters:
+                    rows = results_by_monster[m][team_key]
+                    idx = [row["warrior_die"] for row in rows].index(dlabel)
+                    ys.append(rows[idx][metric])
+                # One bar per monster, offset by die index; color fixed per die
+                ax.bar(x + (i - (n_dice - 1) / 2) * width, ys, width, color=colors[i])
+
+            ax.set_xlabel("Monster")
+            ax.set_ylabel("Data Value")
+            ax.set_title(f"{metric} - All Monsters - {team_label}")
+            ax.set_xticks(x, monsters)
+            ax.legend(handles=legend_patches, title="Damage Die")
+            fig.tight_layout()
+
+            fname = out_dir / f"final_{_sanitize_filename(metric)}_{_sanitize_filename(team_key)}_all_monsters.png"
+            fig.savefig(fname, dpi=150)
+            plt.close(fig)
+
+# Sobol first / total order indices with their bootstrap intervals
+def plot_sensitivity(monster_key: str, rows: list[dict], out_dir: Path):
+    params = [r["param"] for r in rows]
+    x = np.arange(len(params))
+    width = 0.4
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    for offset, key, label in ((-width / 2, "S1", "First order"), (width / 2, "ST", "Total order")):
+        vals = np.array([r[key] for r in rows])
+        err = np.array([[r[key] - r[key + "_lo"] for r in rows], [r[key + "_hi"] - r[key] for r in rows]])
+        ax.bar(x + offset, vals, width, yerr=np.clip(err, 0, None), capsize=3, label=label)
+
+    r0 = rows[0]
+    ax.set_xlabel("Tunable")
+    ax.set_ylabel("Sobol index")
+    ax.set_title(f"Sensitivity of baseline P(win) - {monster_key} - {r0['scenario']} d{r0['die']}")
+    ax.set_xticks(x, params, rotation=30, ha="right")
+    ax.axhline(0, color="black", linewidth=0.8)
+    ax.legend()
+    fig.tight_layout()
+
+    fig.savefig(out_dir / f"sensitivity_{_sanitize_filename(monster_key)}.png", dpi=150)
+    plt.close(fig)
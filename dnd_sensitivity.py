@@ -0,0 +1,220 @@
+"""
+Global sensitivity analysis of baseline P(win) to the DnD.py tunables (Sobol indices).
+
+Each tunable in SENSITIVITY_PARAMS gets a declared range. A Saltelli design (base
+matrices A and B plus the d matrices AB_i, i.e. A with column i taken from B) is
+drawn from a scrambled Sobol sequence (scipy.stats.qmc when installed, plain
+uniform draws otherwise). Every design point runs `fights` fights of one
+scenario with the overrides applied to the module globals / monster stat block.
+All points reuse the same seed (common random numbers), so the Monte Carlo noise
+largely cancels in the f(A) - f(AB_i) differences the estimators are built on.
+Points are evaluated in batches, serially or on a process pool.
+
+Estimators: first order S_i = mean(f_B * (f_AB_i - f_A)) / V (Saltelli 2010) and
+total order ST_i = mean((f_A - f_AB_i)^2) / (2V) (Jansen), V = var([f_A, f_B]),
+with percentile bootstrap intervals over the base rows.
+
+Cost is n * (d + 2) * fights fights per monster; the defaults (n=64, d=10,
+200 fights) are ~154k fights, about a minute per monster on one core.
+"""
+import math, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+import DnD
+import dnd_store
+
+# name: (low, high, kind). "int" draws uniformly from low..high inclusive.
+# MONSTER.* entries modify the analysed monster: AC offset, HP multiplier and a
+# REGEN value that replaces the monster's own (0 disables it).
+SENSITIVITY_PARAMS = {
+    "WARRIOR.AC": (12, 20, "int"),
+    "WARRIOR.HP": (50, 100, "int"),
+    "WARRIOR.ATK_MOD": (1, 7, "int"),
+    "SUPERIORITY_DICE_N": (0, 6, "int"),
+    "SECOND_WIND_THRESHOLD": (0.1, 0.6, "float"),
+    "SNEAK_ATTACK_DICE": (3, 7, "int"),
+    "WIZARD_SLOTS_SCALE": (0.0, 2.0, "float"),  # multiplies every WIZARD_SLOTS_L10 count
+    "MONSTER.AC_DELTA": (-3, 3, "int"),
+    "MONSTER.HP_SCALE": (0.7, 1.3, "float"),
+    "MONSTER.REGEN": (0, 20, "int"),
+}
+PARAM_NAMES = tuple(SENSITIVITY_PARAMS)
+SENSITIVITY_CSV = "dnd_sensitivity.csv"
+SENSITIVITY_STORE = "sensitivity"  # sub-store of --store (its own schema)
+
+def scale_unit(U: np.ndarray) -> np.ndarray:
+    """Maps points of the unit cube (n, d) onto the declared ranges."""
+    X = np.empty_like(U, dtype=np.float64)
+    for j, (lo, hi, kind) in enumerate(SENSITIVITY_PARAMS.values()):
+        if kind == "int":
+            X[:, j] = np.minimum(lo + np.floor(U[:, j] * (hi - lo + 1)), hi)
+        else:
+            X[:, j] = lo + U[:, j] * (hi - lo)
+    return X
+
+def saltelli_design(n_base: int, seed: int = 0):
+    """Unit-cube A, B (n, d) and AB (d, n, d) where AB[i] is A with column i from B."""
+    d = len(PARAM_NAMES)
+    try:
+        from scipy.stats import qmc
+        sampler = qmc.Sobol(2 * d, scramble=True, seed=seed)
+        m = math.log2(n_base)
+        U = sampler.random_base2(int(m)) if m.is_integer() else sampler.random(n_base)
+    except ImportError:
+        U = np.random.default_rng(seed).random((n_base, 2 * d))
+    A, B = U[:, :d], U[:, d:]
+    AB = np.repeat(A[None], d, axis=0)
+    for i in range(d):
+        AB[i, :, i] = B[:, i]
+    return A, B, AB
+
+@contextmanager
+def tunables(values: dict, monster: dict):
+    """
+    Applies `values` (name -> number) to the DnD module globals for the duration
+    of the block and yields the modified copy of `monster`; restores everything after.
+    """
+    saved = {k: getattr(DnD, k) for k in ("SUPERIORITY_DICE_N", "SECOND_WIND_THRESHOLD",
+                                           "SNEAK_ATTACK_DICE", "WIZARD_SLOTS_L10")}
+    saved_warrior = dict(DnD.WARRIOR)
+    try:
+        # WARRIOR is updated in place: PARTY_STATS holds the same dict
+        DnD.WARRIOR.update(AC=int(values["WARRIOR.AC"]), HP=int(values["WARRIOR.HP"]),
+                           ATK_MOD=int(values["WARRIOR.ATK_MOD"]))
+        DnD.SUPERIORITY_DICE_N = int(values["SUPERIORITY_DICE_N"])
+        DnD.SECOND_WIND_THRESHOLD = float(values["SECOND_WIND_THRESHOLD"])
+        DnD.SNEAK_ATTACK_DICE = int(values["SNEAK_ATTACK_DICE"])
+        scale = values["WIZARD_SLOTS_SCALE"]
+        DnD.WIZARD_SLOTS_L10 = {lvl: int(round(n * scale)) for lvl, n in saved["WIZARD_SLOTS_L10"].items()}
+        yield dict(monster, AC=monster["AC"] + int(values["MONSTER.AC_DELTA"]),
+                   HP=max(1, int(round(monster["HP"] * values["MONSTER.HP_SCALE"]))),
+                   REGEN=int(values["MONSTER.REGEN"]))
+    finally:
+        DnD.WARRIOR.clear()
+        DnD.WARRIOR.update(saved_warrior)
+        for k, v in saved.items():
+            setattr(DnD, k, v)
+
+def evaluate_points(X: np.ndarray, monster_key: str, scenario: str, w_die: int,
+                    party=DnD.FULL_PARTY, group: int = 1, fights: int = 200, seed=None) -> np.ndarray:
+    """baseline P(win) at each row of X (n, d); every row is run with the same `seed`."""
+    out = np.empty(len(X))
+    for k, row in enumerate(X):
+        with tunables(dict(zip(PARAM_NAMES, row)), DnD.MONSTERS[monster_key]) as monster:
+            sim_fn, opponent = DnD.scenario_sims(monster, party, group)[scenario]
+            out[k] = DnD.run_chunk(sim_fn, w_die, opponent, fights, seed)["wins"] / fights
+    return out
+
+def sobol_indices(fA: np.ndarray, fB: np.ndarray, fAB: np.ndarray):
+    """
+    First and total order indices. fA, fB: (..., n); fAB: (d, ..., n). Leading
+    axes (bootstrap resamples) broadcast; returns (S1, ST) shaped (d, ...).
+    NaN when the output does not vary.
+    """
+    V = np.var(np.concatenate([fA, fB], axis=-1), axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        V = np.where(V > 0, V, np.nan)
+        S1 = np.mean(fB * (fAB - fA), axis=-1) / V
+        ST = 0.5 * np.mean((fA - fAB) ** 2, axis=-1) / V
+    return S1, ST
+
+def bootstrap_indices(fA, fB, fAB, n_boot: int = 500, seed: int = 0, level: float = 0.95):
+    """Percentile bootstrap over base rows: (S1_lo, S1_hi, ST_lo, ST_hi), each (d,)."""
+    idx = np.random.default_rng(seed).integers(0, len(fA), (n_boot, len(fA)))
+    S1, ST = sobol_indices(fA[idx], fB[idx], fAB[:, idx])
+    q = [50 * (1 - level), 50 * (1 + level)]
+    with np.errstate(invalid="ignore"):
+        s1_lo, s1_hi = np.nanpercentile(S1, q, axis=1) if np.isfinite(S1).any() else (S1[:, 0], S1[:, 0])
+        st_lo, st_hi = np.nanpercentile(ST, q, axis=1) if np.isfinite(ST).any() else (ST[:, 0], ST[:, 0])
+    return s1_lo, s1_hi, st_lo, st_hi
+
+def run_design(X: np.ndarray, executor=None, batch: int = None, progress: bool = True, **kw) -> np.ndarray:
+    """Evaluates all design points, in batches of `batch` rows on `executor` (or in-process)."""
+    if executor is None:
+        return evaluate_points(X, **kw)
+    workers = getattr(executor, "_max_workers", 1)
+    batch = batch or max(1, math.ceil(len(X) / (4 * workers)))
+    out = np.empty(len(X))
+    futures = {executor.submit(evaluate_points, X[a:a + batch], **kw): a for a in range(0, len(X), batch)}
+    done, last = 0, time.perf_counter()
+    for fut in as_completed(futures):
+        a = futures[fut]
+        res = fut.result()
+        out[a:a + len(res)] = res
+        done += len(res)
+        if progress and time.perf_counter() - last >= 1.0:
+            last = time.perf_counter()
+            print(f"  {done}/{len(X)} points", flush=True)
+    return out
+
+def analyse_monster(monster_key: str, scenario: str = "full", w_die: int = 10, party=DnD.FULL_PARTY,
+                    group: int = 1, n_base: int = 64, fights: int = 200, n_boot: int = 500,
+                    seed: int = 0, executor=None, progress: bool = True) -> list[dict]:
+    """Sobol indices (with bootstrap CIs) of baseline P(win) for one monster; one row per tunable."""
+    A, B, AB = saltelli_design(n_base, seed)
+    n, d = A.shape
+    X = scale_unit(np.concatenate([A, B, AB.reshape(-1, d)]))
+    t0 = time.perf_counter()
+    f = run_design(X, executor, progress=progress, monster_key=monster_key, scenario=scenario,
+                   w_die=w_die, party=tuple(party), group=group, fights=fights,
+                   seed=f"{seed}:{monster_key}:sobol")
+    elapsed = time.perf_counter() - t0
+    fA, fB, fAB = f[:n], f[n:2 * n], f[2 * n:].reshape(d, n)
+    S1, ST = sobol_indices(fA, fB, fAB)
+    s1_lo, s1_hi, st_lo, st_hi = bootstrap_indices(fA, fB, fAB, n_boot, seed)
+    fAB_all = np.concatenate([fA, fB])
+    rows = []
+    for i, name in enumerate(PARAM_NAMES):
+        lo, hi, _ = SENSITIVITY_PARAMS[name]
+        rows.append({"monster": monster_key, "scenario": scenario, "die": w_die,
+                     "party": ",".join(party), "group": group, "n_base": n, "fights": fights,
+                     "param": name, "low": float(lo), "high": float(hi),
+                     "S1": float(S1[i]), "S1_lo": float(s1_lo[i]), "S1_hi": float(s1_hi[i]),
+                     "ST": float(ST[i]), "ST_lo": float(st_lo[i]), "ST_hi": float(st_hi[i]),
+                     "mean_P(win)": float(fAB_all.mean()), "var_P(win)": float(fAB_all.var()),
+                     "elapsed": elapsed})
+    return rows
+
+def print_table(rows: list[dict]):
+    r0 = rows[0]
+    print(f"Sobol indices of baseline P(win): {r0['monster']} / {r0['scenario']} / d{r0['die']} "
+          f"({r0['n_base']} base samples x {len(rows) + 2} x {r0['fights']} fights, {r0['elapsed']:.1f}s)")
+    print(f"mean P(win) {r0['mean_P(win)']:.3f}, variance {r0['var_P(win)']:.4f}")
+    if not r0["var_P(win)"] > 0:
+        print("P(win) does not vary over the declared ranges: indices undefined "
+              "(try a harder --sobol-scenario or a larger --group).")
+    print(f"{'param':<24}{'S1':>8}{'95% CI':>18}{'ST':>8}{'95% CI':>18}")
+    for r in sorted(rows, key=lambda r: -r["ST"] if r["ST"] == r["ST"] else 0):
+        print(f"{r['param']:<24}{r['S1']:>8.3f}  [{r['S1_lo']:>6.3f}, {r['S1_hi']:>6.3f}]"
+              f"{r['ST']:>8.3f}  [{r['ST_lo']:>6.3f}, {r['ST_hi']:>6.3f}]")
+    print()
+
+def main(args, party, group, store):
+    """--sensitivity entrypoint of DnD.py: one analysis per selected monster."""
+    keys = list(DnD.MONSTERS) if args.all_monsters else [DnD.get_monster(args.monster)[1]]
+    sens_store = Path(store) / SENSITIVITY_STORE
+    run = dnd_store.begin_run(sens_store, dict(seed=args.seed, n_base=args.sobol_n, fights=args.sobol_fights,
+                                               scenario=args.sobol_scenario, die=args.sobol_die,
+                                               party=",".join(party), group=group))
+    workers = max(1, args.workers)
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        for key in keys:
+            rows = analyse_monster(key, args.sobol_scenario, args.sobol_die, party, group, args.sobol_n,
+                                   args.sobol_fights, args.sobol_bootstrap, args.seed, executor,
+                                   progress=not args.no_progress)
+            dnd_store.append_rows(sens_store, [dict(run=run, **r) for r in rows])
+            print_table(rows)
+            if not args.no_csv:
+                DnD.write_csv(DnD.monster_csv_dir(key) / SENSITIVITY_CSV, rows)
+            if not args.no_plots:
+                from dnd_plots import plot_sensitivity
+                plot_sensitivity(key, rows, out_dir=DnD.monster_graph_dir(key))
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+    print(f"Sensitivity run {run} stored in {sens_store}")
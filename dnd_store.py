@@ -0,0 +1,158 @@
+"""
+Columnar result store for simulator cells.
+
+A store is a directory with one raw little-endian file per column plus a
+`manifest.json` holding the schema, the committed row count and per-run
+metadata. Rows are appended cell by cell; the manifest is replaced atomically
+after the column files are flushed, so a crash mid-append leaves the previous
+rows intact. Numeric columns load as read-only `np.memmap` views; string
+columns are stored as int32 codes into a category list kept in the manifest.
+"""
+import json, os, time
+from pathlib import Path
+
+import numpy as np
+
+MANIFEST = "manifest.json"
+STORE_VERSION = 1
+
+def _sanitize(s: str) -> str:
+    return "".join(ch if ch.isalnum() or ch in ("-", "_") else "_" for ch in s)
+
+def _dtype_for(value) -> str:
+    if isinstance(value, str):
+        return "category"
+    if isinstance(value, (bool, np.bool_)):
+        return "|u1"
+    if isinstance(value, (int, np.integer)):
+        return "<i8"
+    if isinstance(value, (float, np.floating)):
+        return "<f8"
+    raise TypeError(f"Unsupported column value {value!r}")
+
+def read_manifest(path) -> dict:
+    p = Path(path) / MANIFEST
+    if not p.exists():
+        return {"version": STORE_VERSION, "rows": 0, "columns": {}, "runs": []}
+    with open(p, encoding="utf-8") as f:
+        return json.load(f)
+
+def _write_manifest(path: Path, manifest: dict):
+    tmp = path / (MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path / MANIFEST)
+
+def begin_run(path, meta: dict) -> int:
+    """Registers a new run and returns its id (stored in the `run` column)."""
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    manifest = read_manifest(path)
+    run_id = len(manifest["runs"])
+    manifest["runs"].append(dict(meta, run=run_id, started=time.time()))
+    _write_manifest(path, manifest)
+    return run_id
+
+def append_rows(path, rows: list[dict]):
+    """Appends rows (dicts with identical keys) to the store, full precision."""
+    if not rows:
+        return
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    manifest = read_manifest(path)
+    cols = manifest["columns"]
+    n = manifest["rows"]
+
+    if not cols:
+        for k, v in rows[0].items():
+            kind = _dtype_for(v)
+            spec = {"file": f"{len(cols):03d}_{_sanitize(k)}.bin"}
+            if kind == "category":
+                spec.update(dtype="<i4", categories=[])
+            else:
+                spec.update(dtype=kind)
+            cols[k] = spec
+
+    missing = [k for k in cols if any(k not in r for r in rows)]
+    extra = [k for k in rows[0] if k not in cols]
+    if missing or extra:
+        raise ValueError(f"Row schema mismatch: missing={missing} unexpected={extra}")
+
+    for k, spec in cols.items():
+        values = [r[k] for r in rows]
+        if "categories" in spec:
+            cats = spec["categories"]
+            index = {c: i for i, c in enumerate(cats)}
+            codes = []
+            for v in values:
+                if v not in index:
+                    index[v] = len(cats)
+                    cats.append(v)
+                codes.append(index[v])
+            arr = np.asarray(codes, dtype=spec["dtype"])
+        else:
+            arr = np.asarray(values, dtype=spec["dtype"])
+        fpath = path / spec["file"]
+        with open(fpath, "ab") as f:
+            # Drop bytes past the committed row count left by an interrupted append
+            committed = n * arr.dtype.itemsize
+            if f.tell() != committed:
+                f.truncate(committed)
+                f.seek(committed)
+            f.write(arr.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    manifest["rows"] = n + len(rows)
+    _write_manifest(path, manifest)
+
+def load_columns(path, mmap: bool = True) -> dict:
+    """
+    Returns {column: array}. Numeric columns are memory-mapped (read-only) when
+    `mmap` is true; category columns are decoded to object arrays of strings.
+    """
+    path = Path(path)
+    manifest = read_manifest(path)
+    n = manifest["rows"]
+    out = {}
+    for k, spec in manifest["columns"].items():
+        dt = np.dtype(spec["dtype"])
+        fpath = path / spec["file"]
+        if n == 0:
+            arr = np.empty(0, dtype=dt)
+        elif mmap:
+            arr = np.memmap(fpath, dtype=dt, mode="r", shape=(n,))
+        else:
+            arr = np.fromfile(fpath, dtype=dt, count=n)
+        if "categories" in spec:
+            arr = np.asarray(spec["categories"], dtype=object)[arr] if n else np.empty(0, dtype=object)
+        out[k] = arr
+    return out
+
+def select_rows(path, keys=None, **where) -> list[dict]:
+    """Rows (as dicts, Python scalars) matching all `where` column == value filters."""
+    cols = load_columns(path)
+    if not cols:
+        return []
+    n = len(next(iter(cols.values())))
+    mask = np.ones(n, dtype=bool)
+    for k, v in where.items():
+        mask &= (cols[k] == v)
+    keys = list(cols) if keys is None else keys
+    picked = {k: cols[k][mask] for k in keys}
+    return [{k: picked[k][i].item() if hasattr(picked[k][i], "item") else picked[k][i] for k in keys}
+            for i in range(int(mask.sum()))]
+
+def export_npz(path, out_file=None) -> Path:
+    """Writes a compressed `.npz` snapshot of the whole store (manifest included)."""
+    path = Path(path)
+    out_file = Path(out_file) if out_file else path / "snapshot.npz"
+    manifest = read_manifest(path)
+    arrays = {_sanitize(k): np.asarray(v) for k, v in load_columns(path, mmap=False).items()}
+    for k, spec in manifest["columns"].items():
+        if "categories" in spec:
+            arrays[_sanitize(k)] = arrays[_sanitize(k)].astype(str)
+    np.savez_compressed(out_file, __manifest__=np.asarray(json.dumps(manifest, ensure_ascii=False)), **arrays)
+    return out_file
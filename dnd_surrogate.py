@@ -0,0 +1,362 @@
+"""
+Surrogate model of the simulator: predicts the summary metrics of a cell
+(baseline P(win) and the conditional ones) from its configuration in
+microseconds, with an uncertainty estimate, and falls back to summarize_many
+when the estimate is too uncertain.
+
+Model: one Bayesian ridge regression per metric on a fixed feature map of the
+cell: scenario and scenario x monster one-hots, plus die, group, effective party role
+counts and the monster stat columns of the store, scaled to ~[0, 1] and squared,
+each with its own slope per scenario. Probabilities are fitted on the logit
+scale. A cell is weighted by the inverse Monte Carlo variance of its metric
+(n * p * (1 - p) on the logit scale; n / (p1 * (1 - p1) + p2 * (1 - p2)) for a
+difference p1 - p2 of probabilities, fitted as is, plus a variance floor so
+cells at P(win) ~ 0 or 1 do not dominate), so the posterior
+covariance A^-1 (A = X'WX + LAMBDA * I) gives the parameter part x'A^-1 x of
+the predictive variance. Configurations the training cells do not pin down (a
+stat value never seen for that monster, an unseen party) get a large x'A^-1 x
+and are simulated instead. The features never fit the simulator exactly, so a
+discrepancy variance tau2 is added: the mean squared residual of the training
+cells minus their Monte Carlo variance, on the probability scale for the
+P(win) metrics (scaled to logits by p * (1 - p), so it shrinks near 0 and 1).
+Probabilities report half the width of the sigmoid-mapped logit interval
+mean +- std (at most 0.5); differences are clipped to [-1, 1], with std <= 1.
+
+Training is incremental: X'WX and X'Wy per metric are updated with the new
+rows only, and sync() folds in just the rows appended to each source store
+since the last call. Sources are the suite runs in --store and the cells
+simulated by fallbacks, which go to its `surrogate/` sub-store. The store is
+the training set: a new process retrains from it in milliseconds per thousand
+cells, so no model file is kept.
+
+Usage: python dnd_surrogate.py --monster CLOAKER --die 10 --scenario full --set AC=19
+       python dnd_surrogate.py --explore 100 --sims 1000
+       python dnd_surrogate.py --bench 10000
+"""
+import argparse, random, time
+from pathlib import Path
+
+import numpy as np
+
+import DnD
+import dnd_store
+
+SURROGATE_STORE = "surrogate"  # sub-store of --store for cells simulated on fallback
+SCENARIO_KEYS = tuple(s for s, _ in DnD.SCENARIOS)
+MONSTER_KEYS = tuple(DnD.MONSTERS)
+ROLES = ("warrior", "healer", "rogue", "wizard")
+# Numeric inputs and the scale that brings each to ~[0, 1]
+NUMERIC_SCALES = dict(die=20, group=4, monster_HP=200, monster_AC=20, monster_ATK_MOD=10,
+                      monster_DMG_MOD=10, monster_DMG_DIE=12, monster_ATTACKS=3, monster_REGEN=20,
+                      **{f"party_{r}": 4 for r in ROLES})
+_SCALES = np.array(list(NUMERIC_SCALES.values()), dtype=np.float64)
+# Metrics predicted; True = probability, fitted on the logit scale
+TARGETS = {"baseline_P(win)": True,
+           "P(win | party first)": True,
+           "P(win | first attack crit)": True,
+           "ΔP(win) if first attack missed": False,
+           "ΔP(win) if received crit on monster first turn": False}
+_LOGIT = np.array(list(TARGETS.values()))
+LAMBDA = 0.01      # prior precision of every coefficient
+LOGIT_EPS = 0.5   # pseudo-count that keeps logits finite at p = 0 or 1
+DELTA_VAR_FLOOR = 1e-3  # variance floor of ΔP cells (model discrepancy, ~0.03 std)
+MAX_STD = 0.03    # default fallback threshold on the std of baseline P(win)
+
+_N_S, _N_M, _N_Q = len(SCENARIO_KEYS), len(MONSTER_KEYS), len(NUMERIC_SCALES)
+_INTER = 1 + _N_S + _N_S * _N_M  # first per-scenario slope column
+N_FEATURES = _INTER + 2 * _N_S * _N_Q
+
+def party_counts(scenario: str, party) -> tuple:
+    """Role counts of the characters actually fighting in `scenario`."""
+    if scenario == "solo":
+        return (1, 0, 0, 0)
+    if scenario == "healer":
+        return (1, 1, 0, 0)
+    roles = party.split(",") if isinstance(party, str) else list(party)
+    return tuple(roles.count(r) for r in ROLES)
+
+def feature_matrix(scenario, monster, numeric: np.ndarray) -> np.ndarray:
+    """Features (n, N_FEATURES) from scenario / monster keys (n,) and raw NUMERIC_SCALES values (n, q)."""
+    n = len(numeric)
+    s = (np.asarray(scenario, dtype=object)[:, None] == np.array(SCENARIO_KEYS, dtype=object)).astype(np.float64)
+    m = (np.asarray(monster, dtype=object)[:, None] == np.array(MONSTER_KEYS, dtype=object)).astype(np.float64)
+    sm = (s[:, :, None] * m[:, None, :]).reshape(n, -1)
+    z = numeric / _SCALES
+    zz = np.concatenate([z, z * z], axis=1)
+    inter = (s[:, :, None] * zz[:, None, :]).reshape(n, -1)
+    return np.concatenate([np.ones((n, 1)), s, sm, inter], axis=1)
+
+def cell_features(cols: dict) -> np.ndarray:
+    """Feature matrix of store rows (columns as returned by dnd_store.load_columns)."""
+    scenario = np.asarray(cols["scenario"], dtype=object)
+    numeric = np.empty((len(scenario), _N_Q))
+    for j, k in enumerate(NUMERIC_SCALES):
+        if k in cols:
+            numeric[:, j] = cols[k]
+    full = scenario == "full"
+    numeric[:, 1] = np.where(full, cols["group"], 1)
+    counts = {}
+    for i, (s, p) in enumerate(zip(scenario, cols["party"])):
+        c = counts.get((s, p))
+        if c is None:
+            c = counts[(s, p)] = party_counts(s, p)
+        numeric[i, -len(ROLES):] = c
+    return feature_matrix(scenario, cols["monster"], numeric)
+
+def cell_targets(cols: dict):
+    """Targets and weights (T, n) on the fitting scale; weight 0 where a metric is undefined (NaN)."""
+    n = np.asarray(cols["n_sims"], dtype=np.float64)
+
+    def smooth(v):
+        return (np.clip(v, 0.0, 1.0) * n + LOGIT_EPS) / (n + 2 * LOGIT_EPS)
+    base = smooth(np.nan_to_num(np.asarray(cols["baseline_P(win)"], dtype=np.float64)))
+    Y, W = [], []
+    for name, logit in TARGETS.items():
+        v = np.asarray(cols[name], dtype=np.float64)
+        ok = np.isfinite(v)
+        v = np.where(ok, v, 0.0)
+        if logit:
+            p = smooth(v)
+            y, w = np.log(p / (1 - p)), n * p * (1 - p)
+        else:
+            # ΔP = P(win | condition) - baseline: variance ~ (p1(1-p1) + p2(1-p2)) / n
+            p1 = smooth(v + base)
+            y, w = v, 1.0 / ((p1 * (1 - p1) + base * (1 - base)) / n + DELTA_VAR_FLOOR)
+        Y.append(y)
+        W.append(np.where(ok, w, 0.0))
+    return np.array(Y), np.array(W)
+
+class Surrogate:
+    def __init__(self, store=DnD.STORE_BASE):
+        self.store = Path(store)
+        T = len(TARGETS)
+        self.xtwx = np.zeros((T, N_FEATURES, N_FEATURES))
+        self.xtwy = np.zeros((T, N_FEATURES))
+        self.n_obs = np.zeros(T)
+        self.offsets = {}  # source name -> rows consumed
+        self._cells = []   # (X, metric values (T, n), n_sims, weights (T, n)) per update, for the residuals
+        self._fit = None
+        self._run = None
+
+    @classmethod
+    def from_store(cls, store=DnD.STORE_BASE) -> "Surrogate":
+        s = cls(store)
+        s.sync()
+        return s
+
+    # ---- training ----
+    def sources(self) -> dict:
+        return {".": self.store, SURROGATE_STORE: self.store / SURROGATE_STORE}
+
+    def update(self, cols: dict):
+        """Folds store rows (column dict) into the sufficient statistics."""
+        if not len(cols["scenario"]):
+            return
+        X = cell_features(cols)
+        Y, W = cell_targets(cols)
+        for t in range(len(TARGETS)):
+            XW = X * W[t][:, None]
+            self.xtwx[t] += XW.T @ X
+            self.xtwy[t] += XW.T @ Y[t]
+            self.n_obs[t] += np.count_nonzero(W[t])
+        values = np.array([np.asarray(cols[name], dtype=np.float64) for name in TARGETS])
+        self._cells.append((X, values, np.asarray(cols["n_sims"], dtype=np.float64), W))
+        self._fit = None
+
+    def sync(self) -> int:
+        """Consumes the rows appended to the source stores since the last sync; returns how many."""
+        added = 0
+        for name, path in self.sources().items():
+            rows = dnd_store.read_manifest(path)["rows"]
+            done = self.offsets.get(name, 0)
+            if rows < done:
+                raise ValueError(f"{path} has fewer rows ({rows}) than already trained on ({done})")
+            if rows > done:
+                cols = dnd_store.load_columns(path)
+                self.update({k: v[done:rows] for k, v in cols.items()})
+                self.offsets[name] = rows
+                added += rows - done
+        return added
+
+    def fit(self):
+        """
+        Posterior mean (T, p), posterior covariance flattened to (T * p, p) for
+        one 2-D matmul per query, and discrepancy variance tau2 (T,) on the
+        fitting scale. Cached until the next update.
+        """
+        if self._fit is None:
+            A_inv = np.linalg.inv(self.xtwx + LAMBDA * np.eye(N_FEATURES))
+            beta = np.einsum("tij,tj->ti", A_inv, self.xtwy)
+            tau2 = np.zeros(len(TARGETS))
+            if self._cells:
+                X = np.concatenate([c[0] for c in self._cells])
+                values = np.concatenate([c[1] for c in self._cells], axis=1)
+                n = np.concatenate([c[2] for c in self._cells])
+                W = np.concatenate([c[3] for c in self._cells], axis=1)
+                for t, logit in enumerate(_LOGIT):
+                    ok = np.isfinite(values[t])
+                    if not ok.any():
+                        continue
+                    v, mu = values[t, ok], X[ok] @ beta[t]
+                    if logit:
+                        p = 1.0 / (1.0 + np.exp(-mu))
+                        excess = (v - p) ** 2 - v * (1 - v) / n[ok]
+                        tau2[t] = max(0.0, excess.sum()) / max(((p * (1 - p)) ** 2).sum(), 1e-12)
+                    else:
+                        mc_var = 1.0 / W[t, ok] - DELTA_VAR_FLOOR
+                        tau2[t] = max(0.0, np.mean((v - mu) ** 2 - mc_var))
+            self._fit = (beta, A_inv.reshape(-1, N_FEATURES), tau2)
+        return self._fit
+
+    # ---- queries ----
+    def query_vector(self, monster_key: str, die: int, scenario: str = "full",
+                     party=DnD.FULL_PARTY, group: int = 1, **stats) -> np.ndarray:
+        """Feature vector of one configuration; `stats` override MONSTER_STAT_DEFAULTS keys."""
+        unknown = set(stats) - set(DnD.MONSTER_STAT_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown monster stat(s) {sorted(unknown)}; "
+                             f"choose from {', '.join(DnD.MONSTER_STAT_DEFAULTS)}")
+        mon = DnD.MONSTERS[monster_key]
+        z = np.array([die, group if scenario == "full" else 1,
+                      *(stats.get(k, mon.get(k, v)) for k, v in DnD.MONSTER_STAT_DEFAULTS.items()),
+                      *party_counts(scenario, party)], dtype=np.float64) / _SCALES
+        si = SCENARIO_KEYS.index(scenario)
+        x = np.zeros(N_FEATURES)
+        x[0] = 1.0
+        x[1 + si] = 1.0
+        x[1 + _N_S + si * _N_M + MONSTER_KEYS.index(monster_key)] = 1.0
+        a = _INTER + si * 2 * _N_Q
+        x[a:a + _N_Q] = z
+        x[a + _N_Q:a + 2 * _N_Q] = z * z
+        return x
+
+    def predict_vector(self, x: np.ndarray) -> dict:
+        """
+        {metric: (mean, std)} on the metric's own scale. Probabilities map the logit
+        interval mean +- std through the sigmoid and report half its width (<= 0.5);
+        differences of probabilities are clipped to [-1, 1] and their std to 1.
+        """
+        beta, cov, tau2 = self.fit()
+        mu = beta @ x
+        sd = np.sqrt(np.dot((cov @ x).reshape(len(mu), -1), x) + tau2)
+        lo, mid, hi = 1.0 / (1.0 + np.exp(-np.array([mu - sd, mu, mu + sd])))
+        mean = np.where(_LOGIT, mid, np.clip(mu, -1.0, 1.0)).tolist()
+        std = np.where(_LOGIT, (hi - lo) / 2, np.minimum(sd, 1.0)).tolist()
+        return dict(zip(TARGETS, zip(mean, std)))
+
+    def predict(self, monster_key: str, die: int, scenario: str = "full",
+                party=DnD.FULL_PARTY, group: int = 1, **stats) -> dict:
+        return self.predict_vector(self.query_vector(monster_key, die, scenario, party, group, **stats))
+
+    def simulate(self, monster_key: str, die: int, scenario: str = "full", party=DnD.FULL_PARTY,
+                 group: int = 1, n_sims: int = 2_000, **stats) -> dict:
+        """Runs summarize_many for the configuration, stores the cell and trains on it."""
+        monster = dict(DnD.MONSTERS[monster_key], **stats)
+        sim_fn, opponent = DnD.scenario_sims(monster, party, group)[scenario]
+        row = DnD.summarize_many(sim_fn, die, opponent, n_sims)
+        path = self.store / SURROGATE_STORE
+        if self._run is None:
+            self._run = dnd_store.begin_run(path, dict(source="surrogate"))
+        group = group if scenario == "full" else 1
+        dnd_store.append_rows(path, [DnD.cell_record(self._run, monster_key, scenario, party, group,
+                                                     n_sims, row, monster=monster)])
+        self.sync()
+        return row
+
+    def query(self, monster_key: str, die: int, scenario: str = "full", party=DnD.FULL_PARTY,
+              group: int = 1, max_std: float = MAX_STD, n_sims: int = 2_000,
+              fallback: bool = True, **stats) -> dict:
+        """
+        Surrogate estimate of a cell, or a fresh simulation when the std of
+        baseline P(win) exceeds `max_std` (and `fallback` is on).
+        Returns dict(source="surrogate"|"simulated", estimate={metric: (mean, std)}, row=...).
+        """
+        est = self.predict(monster_key, die, scenario, party, group, **stats)
+        if est["baseline_P(win)"][1] <= max_std or not fallback:
+            return dict(source="surrogate", estimate=est, row=None)
+        row = self.simulate(monster_key, die, scenario, party, group, n_sims, **stats)
+        return dict(source="simulated", estimate=est, row=row)
+
+    def explore(self, n: int, n_sims: int = 2_000, rng: random.Random = None, progress: bool = True):
+        """Simulates `n` random cells around the stock monsters (AC +-3, HP x0.7-1.3, REGEN 0-20)."""
+        rng = rng or random.Random()
+        t0 = time.perf_counter()
+        for i in range(n):
+            key = rng.choice(MONSTER_KEYS)
+            mon = DnD.MONSTERS[key]
+            scenario = rng.choice(SCENARIO_KEYS)
+            stats = dict(AC=mon["AC"] + rng.randint(-3, 3), HP=max(1, round(mon["HP"] * rng.uniform(0.7, 1.3))),
+                         REGEN=rng.choice([mon.get("REGEN", 0), rng.randint(0, 20)]))
+            group = rng.randint(1, 3) if scenario == "full" else 1
+            self.simulate(key, rng.choice(DnD.DICE_TO_TEST), scenario, DnD.FULL_PARTY, group, n_sims, **stats)
+            if progress:
+                print(f"  explored {i + 1}/{n} cells ({time.perf_counter() - t0:.1f}s)", end="\r", flush=True)
+        if progress and n:
+            print()
+
+def parse_stats(items) -> dict:
+    out = {}
+    for item in items or ():
+        k, sep, v = item.partition("=")
+        if not sep:
+            raise SystemExit(f"--set expects KEY=VALUE, got {item!r}")
+        out[k.strip().upper()] = int(v)
+    return out
+
+def main():
+    p = argparse.ArgumentParser(description="Surrogate win-rate model trained on the simulator's result store.")
+    p.add_argument("--store", default=str(DnD.STORE_BASE), help="Result store to train on (default results/).")
+    p.add_argument("--monster", default="CLOAKER", help="Monster key or alias (see DnD.py --monster).")
+    p.add_argument("--die", type=int, default=10, help="Warrior damage die (default 10).")
+    p.add_argument("--scenario", choices=SCENARIO_KEYS, default="full")
+    p.add_argument("--party", default=",".join(DnD.FULL_PARTY), help="Roles for the full-party scenario.")
+    p.add_argument("--group", type=int, default=1, help="Monsters faced in the full-party scenario.")
+    p.add_argument("--set", action="append", metavar="STAT=VALUE",
+                   help=f"Override a monster stat ({', '.join(DnD.MONSTER_STAT_DEFAULTS)}); repeatable.")
+    p.add_argument("--max-std", type=float, default=MAX_STD,
+                   help=f"Simulate when the std of baseline P(win) exceeds this (default {MAX_STD}).")
+    p.add_argument("--sims", type=int, default=2_000, help="Fights per simulated cell (default 2000).")
+    p.add_argument("--no-fallback", action="store_true", help="Always answer from the surrogate.")
+    p.add_argument("--explore", type=int, default=0, help="First simulate N random cells to widen the training set.")
+    p.add_argument("--bench", type=int, default=0, help="Time N surrogate predictions and report microseconds/query.")
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+
+    random.seed(args.seed)
+    try:
+        party = DnD.parse_party(args.party)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    key = DnD.get_monster(args.monster)[1]
+    stats = parse_stats(args.set)
+    t0 = time.perf_counter()
+    s = Surrogate.from_store(args.store)
+    print(f"Trained on {int(s.n_obs[0])} cells ({time.perf_counter() - t0:.2f}s)")
+    if args.explore:
+        s.explore(args.explore, args.sims, random.Random(args.seed))
+    try:
+        res = s.query(key, args.die, args.scenario, party, args.group, args.max_std, args.sims,
+                      fallback=not args.no_fallback, **stats)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    desc = ", ".join(f"{k}={v}" for k, v in stats.items()) or "stock stats"
+    source = "the surrogate" if res["source"] == "surrogate" else "simulation"
+    print(f"{key} ({desc}) / {args.scenario} / d{args.die}: answered by {source}")
+    for name, (mean, sd) in res["estimate"].items():
+        line = f"  {name:<48}{mean:>8.3f} ± {sd:.3f}"
+        if res["row"] is not None:
+            line += f"   simulated {res['row'][name]:.3f}"
+        print(line)
+
+    if args.bench:
+        x = s.query_vector(key, args.die, args.scenario, party, args.group, **stats)
+        s.predict_vector(x)
+        t0 = time.perf_counter()
+        for _ in range(args.bench):
+            s.predict(key, args.die, args.scenario, party, args.group, **stats)
+        dt = time.perf_counter() - t0
+        print(f"{args.bench:,} queries in {dt:.3f}s = {dt / args.bench * 1e6:.1f} µs/query")
+
+if __name__ == "__main__":
+    main()